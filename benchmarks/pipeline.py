@@ -0,0 +1,182 @@
+"""Scaled benchmarks for every stage of the family tree pipeline.
+
+Usage::
+
+    python -m benchmarks.pipeline --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.pipeline --sizes 1000 10000 --baseline bench.json --threshold 0.25
+
+Families are generated with a fixed seed, every stage is timed (best of
+``--repeat`` runs) and traced once for peak memory, and results are written as
+JSON. With ``--baseline`` the run exits non-zero when any stage is slower or
+larger than the stored baseline by more than ``--threshold``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from src.filter import filter_subtree
+from src.generator import generate_family_csv
+from src.migration import build_migration_timeline
+from src.parser import read_family_csv
+from src.service import FamilyTreeService
+from src.traversal import iter_subtree
+from src.tree import build_tree
+from src.validate import validate_family
+from src.visualize import visualize_family
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINEAGE_PATH = os.path.join(ROOT, "data", "lineage.yaml")
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_THRESHOLD = 0.25
+# 浏览器端力导向布局在超大图上无法交互，应用实际渲染的都是截断后的子树，
+# 可视化阶段同样只取子树前 N 个节点
+VISUALIZE_NODE_CAP = 2_000
+# 计时过短时噪声过大，低于该值的阶段不参与回归判定
+MIN_COMPARABLE_SECONDS = 0.005
+
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+
+def generate_fixture(size: int, output_path: str, seed: int = 42) -> int:
+    """Write a seeded single-root family of exactly `size` people."""
+    return generate_family_csv(output_path, size, seed=seed)
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": float(peak)}
+
+
+def run_size(size: int, workdir: str, repeat: int = 3, seed: int = 42) -> Dict[str, Any]:
+    csv_path = os.path.join(workdir, f"family_{size}.csv")
+    population = generate_fixture(size, csv_path, seed)
+
+    persons = read_family_csv(csv_path)
+    build_tree(persons)
+    service = FamilyTreeService.from_persons(read_family_csv(csv_path))
+    # 子树相关阶段以最大的一支为根
+    root = persons[max(service.roots(), key=lambda p: service.index.subtree_size(p.id)).id]
+    capped = list(iter_subtree(root, max_nodes=VISUALIZE_NODE_CAP))
+    html_path = os.path.join(workdir, f"family_{size}.html")
+
+    stages: Dict[str, Callable[[], Any]] = {
+        "read_family_csv": lambda: read_family_csv(csv_path),
+        "validate_family": lambda: validate_family(persons),
+        "build_tree": lambda: build_tree(persons),
+        "filter_subtree": lambda: filter_subtree(persons, root_id=root.id),
+        # 服务实际走的路径：FamilyIndex 先序区间扫描
+        "filter_subtree_indexed": lambda: filter_subtree(
+            service.persons, root_id=root.id, index=service.index
+        ),
+        "subtree_payload": lambda: service.subtree_payload(root_id=root.id),
+        "build_migration_timeline": lambda: build_migration_timeline(persons),
+        "visualize_family": lambda: visualize_family(capped, html_path, LINEAGE_PATH),
+    }
+    return {
+        "population": population,
+        "stages": {name: _measure(fn, repeat) for name, fn in stages.items()},
+    }
+
+
+def run(sizes: List[int], repeat: int = 3, seed: int = 42) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        # pyvis 会在当前目录写入 lib/，切到临时目录避免污染工作区
+        os.chdir(workdir)
+        try:
+            results = {str(size): run_size(size, workdir, repeat, seed) for size in sizes}
+        finally:
+            os.chdir(cwd)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """Return one message per stage/metric that regressed beyond `threshold`."""
+    regressions = []
+    for size, result in current["results"].items():
+        base_result = baseline.get("results", {}).get(size)
+        if base_result is None:
+            continue
+        for stage, metrics in result["stages"].items():
+            base_metrics = base_result["stages"].get(stage)
+            if base_metrics is None:
+                continue
+            for metric, value in metrics.items():
+                base = base_metrics.get(metric)
+                if not base:
+                    continue
+                if metric == "seconds" and max(value, base) < MIN_COMPARABLE_SECONDS:
+                    continue
+                ratio = value / base
+                if ratio > 1 + threshold:
+                    regressions.append(
+                        f"size={size} {stage}.{metric}: {base:.6g} -> {value:.6g} "
+                        f"(+{(ratio - 1) * 100:.1f}%)"
+                    )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against a stored results JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, repeat=args.repeat, seed=args.seed)
+    for size, result in report["results"].items():
+        print(f"size={size} population={result['population']}")
+        for stage, metrics in result["stages"].items():
+            print(
+                f"  {stage:<26} {metrics['seconds'] * 1000:10.2f} ms "
+                f"{metrics['peak_bytes'] / 1024 / 1024:10.2f} MiB"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 from typing import Dict, List
 
 from .model import Person
+from .traversal import iter_subtree
 
 
 def expand_subtree(
@@ -8,15 +9,4 @@ def expand_subtree(
     root_id: int,
     max_depth: int
 ) -> List[Person]:
-    root = persons[root_id]
-    result = []
-
-    def dfs(node: Person, depth: int):
-        if depth > max_depth:
-            return
-        result.append(node)
-        for child in node.children:
-            dfs(child, depth + 1)
-
-    dfs(root, 0)
-    return result
+    return list(iter_subtree(persons[root_id], max_depth=max_depth))
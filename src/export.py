@@ -0,0 +1,250 @@
+import argparse
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, cast
+
+from .filter import find_by_wbs
+from .generator import FIELDNAMES
+from .index import FamilyIndex
+from .model import Person
+from .repository import CsvFamilyRepository
+from .service import FamilyTreeService
+from .traversal import iter_preorder
+
+EXPORT_FORMATS = ("jsonl", "csv", "gedcom")
+CONTENT_TYPES = {
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "gedcom": "text/plain; charset=utf-8",
+}
+FILE_EXTENSIONS = {"jsonl": "jsonl", "csv": "csv", "gedcom": "ged"}
+# 每个输出块的目标字符数
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+_GEDCOM_SEX = {"M": "M", "F": "F"}
+
+
+class ExportScope:
+    """The persons an export covers: one subtree or every root, optionally filtered.
+
+    Filters mean the same as for `FamilyTreeService.iter_subtree`; for the
+    whole family `max_depth` counts from each root.
+    """
+
+    def __init__(
+        self,
+        persons: Mapping[int, Person],
+        index: FamilyIndex,
+        *,
+        root_wbs: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        gen_min: Optional[int] = None,
+        gen_max: Optional[int] = None,
+    ):
+        self.persons = persons
+        self.index = index
+        self.root = find_by_wbs(persons, root_wbs, index) if root_wbs is not None else None
+        self.max_depth = max_depth
+        self.gen_min = gen_min
+        self.gen_max = gen_max
+
+    def members(self) -> Iterator[Person]:
+        """Stream members in preorder without materializing the subtree."""
+        roots: Iterable[Person]
+        if self.root is not None:
+            roots = [self.root]
+        else:
+            roots = (p for p in self.persons.values() if p.parent_id is None)
+        for root in roots:
+            for _, person in iter_preorder(
+                self.persons,
+                self.index,
+                root,
+                max_depth=self.max_depth,
+                gen_min=self.gen_min,
+                gen_max=self.gen_max,
+            ):
+                yield person
+
+    def includes(self, p: Person) -> bool:
+        """Whether `p` is exported; used to resolve links to relatives."""
+        if self.root is not None and not self.index.contains(self.root.id, p.id):
+            return False
+        gen = p.generation or p.depth
+        if self.gen_min is not None and gen < self.gen_min:
+            return False
+        if self.gen_max is not None and gen > self.gen_max:
+            return False
+        base_depth = self.root.depth if self.root is not None else 1
+        return self.max_depth is None or p.depth - base_depth <= self.max_depth
+
+
+def _jsonl_lines(scope: ExportScope) -> Iterator[str]:
+    for p in scope.members():
+        record = {name: getattr(p, name) for name in FIELDNAMES}
+        record["parent_id"] = p.parent_id
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_lines(scope: ExportScope) -> Iterator[str]:
+    """Rows in the input schema, so an exported family can be loaded again."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(FIELDNAMES)
+    for p in scope.members():
+        values = (getattr(p, name) for name in FIELDNAMES)
+        writer.writerow(["" if value is None else value for value in values])
+        # 每行取出后清空缓冲区，内存占用与行数无关
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _gedcom_text(level: int, tag: str, value: str) -> str:
+    first, *rest = value.split("\n")
+    return "".join([f"{level} {tag} {first}\n"] + [f"{level + 1} CONT {line}\n" for line in rest])
+
+
+def _gedcom_lines(scope: ExportScope) -> Iterator[str]:
+    """GEDCOM 5.5.1 individuals in preorder, each followed by the family it heads.
+
+    The model records one parent per person, so each person with exported
+    children heads one ``FAM`` (as ``HUSB``, or ``WIFE`` for women) that lists
+    them; the WBS code is kept as a ``REFN``.
+    """
+    yield "0 HEAD\n1 SOUR py_family_tree3\n1 GEDC\n2 VERS 5.5.1\n2 FORM LINEAGE-LINKED\n"
+    yield "1 CHAR UTF-8\n"
+    for p in scope.members():
+        out = [
+            f"0 @I{p.id}@ INDI\n",
+            _gedcom_text(1, "NAME", f"/{p.name[:1]}/{p.name[1:]}"),
+            _gedcom_text(2, "SURN", p.name[:1]),
+        ]
+        if len(p.name) > 1:
+            out.append(_gedcom_text(2, "GIVN", p.name[1:]))
+        out.append(f"1 SEX {_GEDCOM_SEX.get(p.gender or '', 'U')}\n")
+        if p.birth_year is not None:
+            out.append(f"1 BIRT\n2 DATE {p.birth_year}\n")
+        if p.death_year is not None:
+            out.append(f"1 DEAT\n2 DATE {p.death_year}\n")
+        if p.location:
+            out.append("1 RESI\n" + _gedcom_text(2, "PLAC", p.location))
+        if p.note:
+            out.append(_gedcom_text(1, "NOTE", p.note))
+        out.append(f"1 REFN {p.wbs}\n2 TYPE WBS\n")
+        if p.parent_id is not None and scope.includes(scope.persons[p.parent_id]):
+            out.append(f"1 FAMC @F{p.parent_id}@\n")
+        children = [c for c in p.children if scope.includes(c)]
+        if children:
+            role = "WIFE" if p.gender == "F" else "HUSB"
+            out.append(f"1 FAMS @F{p.id}@\n0 @F{p.id}@ FAM\n1 {role} @I{p.id}@\n")
+            out.extend(f"1 CHIL @I{c.id}@\n" for c in children)
+        yield "".join(out)
+    yield "0 TRLR\n"
+
+
+_WRITERS: Dict[str, Callable[[ExportScope], Iterator[str]]] = {
+    "jsonl": _jsonl_lines,
+    "csv": _csv_lines,
+    "gedcom": _gedcom_lines,
+}
+
+
+def _chunks(lines: Iterable[str], chunk_chars: int) -> Iterator[bytes]:
+    parts: List[str] = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_chars:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def export_family(
+    service: FamilyTreeService,
+    fmt: str,
+    *,
+    root_wbs: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    gen_min: Optional[int] = None,
+    gen_max: Optional[int] = None,
+    chunk_chars: int = EXPORT_CHUNK_CHARS,
+) -> Iterator[bytes]:
+    """Stream a subtree (or the whole family) as UTF-8 chunks of `fmt`.
+
+    Arguments are checked eagerly, so a bad format or unknown WBS raises
+    ``ValueError`` here rather than mid-stream. The returned generator walks
+    the preorder index and holds one chunk at a time, so memory does not grow
+    with the number of exported persons.
+    """
+    return export_persons(
+        service.persons,
+        service.index,
+        fmt,
+        root_wbs=root_wbs,
+        max_depth=max_depth,
+        gen_min=gen_min,
+        gen_max=gen_max,
+        chunk_chars=chunk_chars,
+    )
+
+
+def export_persons(
+    persons: Mapping[int, Person],
+    index: FamilyIndex,
+    fmt: str,
+    *,
+    root_wbs: Optional[str] = None,
+    max_depth: Optional[int] = None,
+    gen_min: Optional[int] = None,
+    gen_max: Optional[int] = None,
+    chunk_chars: int = EXPORT_CHUNK_CHARS,
+) -> Iterator[bytes]:
+    """`export_family` over linked `persons` and their index, without a service."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {EXPORT_FORMATS}, got {fmt!r}")
+    scope = ExportScope(
+        persons, index, root_wbs=root_wbs, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max
+    )
+    return _chunks(_WRITERS[fmt](scope), chunk_chars)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export a family CSV as JSONL, CSV or GEDCOM")
+    parser.add_argument("input", help="family CSV")
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    parser.add_argument("--root-wbs")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--gen-min", type=int)
+    parser.add_argument("--gen-max", type=int)
+    parser.add_argument(
+        "--write-snapshot",
+        action="store_true",
+        help="write a binary snapshot next to the CSV when none is current",
+    )
+    args = parser.parse_args(argv)
+
+    # 列式存储无需常驻 Person 对象；已有的最新快照直接读取，默认不在输入旁写文件
+    store = CsvFamilyRepository(path=args.input).load_store(save_snapshot=args.write_snapshot)
+    chunks = export_persons(
+        cast(Mapping[int, Person], store),
+        FamilyIndex.from_store(store),
+        args.format,
+        root_wbs=args.root_wbs,
+        max_depth=args.max_depth,
+        gen_min=args.gen_min,
+        gen_max=args.gen_max,
+    )
+    with open(args.output, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,40 @@
 from typing import List, Mapping, Optional
 
+from .index import FamilyIndex
+from .metrics import timed
 from .model import Person
+from .traversal import iter_preorder, iter_subtree
 
 
-def find_by_wbs(persons: Mapping[int, Person], wbs: str) -> Person:
+def find_by_wbs(
+    persons: Mapping[int, Person], wbs: str, index: Optional[FamilyIndex] = None
+) -> Person:
     """Locate a person by WBS code."""
+    if index is not None:
+        return persons[index.id_for_wbs(wbs)]
     for person in persons.values():
         if person.wbs == wbs:
             return person
     raise ValueError(f"WBS not found: {wbs}")
 
 
+def resolve_root(
+    persons: Mapping[int, Person],
+    root_id: Optional[int] = None,
+    root_wbs: Optional[str] = None,
+    index: Optional[FamilyIndex] = None,
+) -> Person:
+    """Pick the subtree root from either a WBS code or an id."""
+    if root_wbs is not None:
+        return find_by_wbs(persons, root_wbs, index)
+    if root_id is not None:
+        if root_id not in persons:
+            raise ValueError(f"root_id not found: {root_id}")
+        return persons[root_id]
+    raise ValueError("Either root_id or root_wbs must be provided")
+
+
+@timed("filter_subtree")
 def filter_subtree(
     persons: Mapping[int, Person],
     root_id: Optional[int] = None,
@@ -18,29 +42,18 @@ def filter_subtree(
     max_depth: Optional[int] = None,
     gen_min: Optional[int] = None,
     gen_max: Optional[int] = None,
+    index: Optional[FamilyIndex] = None,
 ) -> List[Person]:
-    """Return subtree members filtered by root, depth and generation range."""
-    if root_wbs is not None:
-        root = find_by_wbs(persons, root_wbs)
-    elif root_id is not None:
-        if root_id not in persons:
-            raise ValueError(f"root_id not found: {root_id}")
-        root = persons[root_id]
-    else:
-        raise ValueError("Either root_id or root_wbs must be provided")
-
-    result: List[Person] = []
-
-    def dfs(node: Person, depth: int) -> None:
-        gen = node.generation or node.depth
-        if max_depth is not None and depth > max_depth:
-            return
-        if gen_max is not None and gen > gen_max:
-            return
-        if gen_min is None or gen >= gen_min:
-            result.append(node)
-        for child in node.children:
-            dfs(child, depth + 1)
-
-    dfs(root, 0)
-    return result
+    """Return subtree members filtered by root, depth and generation range.
+
+    When a prebuilt `index` is given, the root is resolved by hash lookup and
+    the subtree is scanned as a contiguous preorder slice, jumping over pruned
+    branches. Otherwise the linked tree is walked iteratively.
+    """
+    root = resolve_root(persons, root_id=root_id, root_wbs=root_wbs, index=index)
+    if index is not None:
+        scan = iter_preorder(
+            persons, index, root, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max
+        )
+        return [node for _, node in scan]
+    return list(iter_subtree(root, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max))
@@ -1,7 +1,13 @@
+import argparse
 import csv
+import os
 import random
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from itertools import count
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 FIRST_NAMES = [
     "伟", "芳", "娜", "敏", "静", "丽", "强", "磊", "军", "洋",
@@ -9,70 +15,93 @@ FIRST_NAMES = [
 ]
 LOCATIONS = ["北京", "上海", "广州", "深圳", "杭州", "南京", "西安", "成都", "武汉", "重庆"]
 CLAN_NAMES = ["张", "王", "李", "刘", "陈", "杨", "黄", "赵", "周", "吴"]
+FIELDNAMES = [
+    "id",
+    "wbs",
+    "name",
+    "gender",
+    "birth_year",
+    "death_year",
+    "generation",
+    "clan_name",
+    "location",
+    "note",
+]
+START_YEAR = 1800
 
 
 PersonRow = Dict[str, Optional[object]]
 
 
+@dataclass
+class _Frame:
+    """One person on the `generate_family_data` walk and how many children it expanded."""
+
+    wbs: str
+    generation: int
+    birth_year: int
+    num_children: int
+    done: int = 0
+
+
+def _make_row(rng, pid: int, wbs: str, generation: int, birth_year: int) -> PersonRow:
+    name = rng.choice(CLAN_NAMES) + rng.choice(FIRST_NAMES)
+    gender = rng.choice(["M", "F"])
+    death_year = birth_year + rng.randint(50, 90) if rng.random() > 0.1 else None
+    return {
+        "id": pid,
+        "wbs": wbs,
+        "name": name,
+        "gender": gender,
+        "birth_year": birth_year,
+        "death_year": death_year,
+        "generation": generation,
+        "clan_name": rng.choice(CLAN_NAMES),
+        "location": rng.choice(LOCATIONS),
+        "note": "",
+    }
+
+
 def generate_family_data(
     num_roots: int = 1,
     max_depth: int = 5,
     max_children: int = 3,
     output_path: str = "data/random_family.csv",
+    seed: Optional[int] = None,
 ) -> List[PersonRow]:
+    """Generate a random family sized indirectly by depth and branching.
+
+    Uses the global `random` state unless `seed` is given. The walk keeps an
+    explicit stack, so deep settings cannot hit the recursion limit.
+    """
+    rng = random.Random(seed) if seed is not None else random
     persons: List[PersonRow] = []
     next_id = count(start=1)
-    start_year = 1800
-
-    def generate_person(wbs: str, generation: int, birth_year: int) -> int:
-        pid = next(next_id)
-        name = random.choice(CLAN_NAMES) + random.choice(FIRST_NAMES)
-        gender = random.choice(["M", "F"])
-        death_year = birth_year + random.randint(50, 90) if random.random() > 0.1 else None
-
-        persons.append(
-            {
-                "id": pid,
-                "wbs": wbs,
-                "name": name,
-                "gender": gender,
-                "birth_year": birth_year,
-                "death_year": death_year,
-                "generation": generation,
-                "clan_name": random.choice(CLAN_NAMES),
-                "location": random.choice(LOCATIONS),
-                "note": "",
-            }
-        )
-        return pid
-
-    def build_subtree(wbs: str, generation: int, birth_year: int) -> None:
-        if generation > max_depth:
-            return
-        generate_person(wbs, generation, birth_year)
-        num_children = random.randint(0, max_children)
-        for i in range(num_children):
-            child_wbs = f"{wbs}.{i + 1}"
-            child_birth_year = birth_year + random.randint(20, 40)
-            build_subtree(child_wbs, generation + 1, child_birth_year)
 
     for root_idx in range(num_roots):
-        build_subtree(str(root_idx + 1), 1, start_year + random.randint(0, 50))
+        root_birth = START_YEAR + rng.randint(0, 50)
+        if max_depth < 1:
+            continue
+        persons.append(_make_row(rng, next(next_id), str(root_idx + 1), 1, root_birth))
+        stack = [_Frame(str(root_idx + 1), 1, root_birth, rng.randint(0, max_children))]
+        while stack:
+            frame = stack[-1]
+            if frame.done == frame.num_children:
+                stack.pop()
+                continue
+            frame.done += 1
+            child_wbs = f"{frame.wbs}.{frame.done}"
+            child_birth_year = frame.birth_year + rng.randint(20, 40)
+            generation = frame.generation + 1
+            if generation > max_depth:
+                continue
+            persons.append(_make_row(rng, next(next_id), child_wbs, generation, child_birth_year))
+            stack.append(
+                _Frame(child_wbs, generation, child_birth_year, rng.randint(0, max_children))
+            )
 
     with open(output_path, "w", encoding="utf-8-sig", newline="") as f:
-        fieldnames = [
-            "id",
-            "wbs",
-            "name",
-            "gender",
-            "birth_year",
-            "death_year",
-            "generation",
-            "clan_name",
-            "location",
-            "note",
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
         writer.writerows(persons)
 
@@ -83,6 +112,141 @@ def generate_family_data(
     return persons
 
 
+def _root_quotas(population: int, num_roots: int) -> List[Tuple[int, int]]:
+    """Split `population` over roots as ``(first_id, size)`` pairs."""
+    base, extra = divmod(population, num_roots)
+    quotas = []
+    first_id = 1
+    for root_idx in range(num_roots):
+        size = base + (1 if root_idx < extra else 0)
+        quotas.append((first_id, size))
+        first_id += size
+    return quotas
+
+
+def iter_root_rows(
+    root_idx: int, size: int, first_id: int, seed: int, max_children: int = 3
+) -> Iterator[PersonRow]:
+    """Yield exactly `size` rows for one root in preorder, in bounded memory.
+
+    Each node receives a budget (the size of its subtree) and splits what is
+    left after itself into 1..`max_children` random positive parts, one per
+    child. Only the pending siblings along the current path are held in
+    memory. Randomness comes from a per-root seed, so output is identical
+    whichever process generates the root.
+    """
+    if size <= 0:
+        return
+    rng = random.Random(f"{seed}:{root_idx}")
+    next_id = count(start=first_id)
+    stack = [(str(root_idx + 1), 1, START_YEAR + rng.randint(0, 50), size)]
+    while stack:
+        wbs, generation, birth_year, budget = stack.pop()
+        yield _make_row(rng, next(next_id), wbs, generation, birth_year)
+        remaining = budget - 1
+        if remaining == 0:
+            continue
+        k = min(rng.randint(1, max_children), remaining)
+        cuts = sorted(rng.sample(range(1, remaining), k - 1))
+        budgets = [b - a for a, b in zip([0] + cuts, cuts + [remaining])]
+        children = [
+            (f"{wbs}.{i + 1}", generation + 1, birth_year + rng.randint(20, 40), child_budget)
+            for i, child_budget in enumerate(budgets)
+        ]
+        stack.extend(reversed(children))
+
+
+def _write_root_part(
+    path: str, root_idx: int, size: int, first_id: int, seed: int, max_children: int
+) -> str:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writerows(iter_root_rows(root_idx, size, first_id, seed, max_children))
+    return path
+
+
+def generate_family_csv(
+    output_path: str,
+    population: int,
+    *,
+    seed: int = 0,
+    num_roots: int = 1,
+    max_children: int = 3,
+    workers: Optional[int] = None,
+) -> int:
+    """Stream a reproducible family of exactly `population` people to CSV.
+
+    The population is split evenly over `num_roots` independent roots with
+    contiguous id ranges. With ``workers > 1`` roots are generated in a
+    process pool, each into its own part file, and the parts are concatenated
+    in root order; the result is byte-identical to a serial run with the same
+    seed. Returns the number of rows written.
+    """
+    if population < 0 or num_roots < 1:
+        raise ValueError("population must be >= 0 and num_roots >= 1")
+    quotas = _root_quotas(population, num_roots)
+
+    with open(output_path, "w", encoding="utf-8-sig", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        if workers is None or workers <= 1 or num_roots == 1:
+            for root_idx, (first_id, size) in enumerate(quotas):
+                writer.writerows(iter_root_rows(root_idx, size, first_id, seed, max_children))
+            return population
+
+        part_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = [
+                    pool.submit(
+                        _write_root_part,
+                        os.path.join(part_dir, f"part_{root_idx}.csv"),
+                        root_idx,
+                        size,
+                        first_id,
+                        seed,
+                        max_children,
+                    )
+                    for root_idx, (first_id, size) in enumerate(quotas)
+                ]
+                for part in parts:
+                    with open(part.result(), encoding="utf-8", newline="") as f:
+                        shutil.copyfileobj(f, out)
+        finally:
+            shutil.rmtree(part_dir, ignore_errors=True)
+    return population
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate random family data")
+    parser.add_argument("--output", default="data/random_family.csv")
+    parser.add_argument("--population", type=int, help="exact number of people (streaming mode)")
+    parser.add_argument("--seed", type=int, help="RNG seed (streaming mode defaults to 0)")
+    parser.add_argument("--roots", type=int, default=1)
+    parser.add_argument("--max-children", type=int, default=3)
+    parser.add_argument("--workers", type=int, help="worker processes (streaming mode only)")
+    args = parser.parse_args(argv)
+
+    if args.population is None:
+        if args.workers is not None:
+            parser.error("--workers requires --population")
+        generate_family_data(
+            num_roots=args.roots,
+            max_children=args.max_children,
+            output_path=args.output,
+            seed=args.seed,
+        )
+    else:
+        generate_family_csv(
+            args.output,
+            args.population,
+            seed=0 if args.seed is None else args.seed,
+            num_roots=args.roots,
+            max_children=args.max_children,
+            workers=args.workers,
+        )
+
+
 if __name__ == "__main__":
-    generate_family_data()
+    main()
     print("Random family data generated!")
@@ -0,0 +1,151 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Mapping, Sequence
+
+from .model import Person
+from .store import MISSING, PersonStore
+
+
+class _RowColumn(Mapping[int, int]):
+    """Person id -> value of an array aligned with the rows of a `PersonStore`."""
+
+    __slots__ = ("_store", "_values")
+
+    def __init__(self, store: PersonStore, values: Sequence[int]):
+        self._store = store
+        self._values = values
+
+    def __getitem__(self, pid: int) -> int:
+        return self._values[self._store.row_of(pid)]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class _WbsLookup(Mapping[str, int]):
+    """WBS code -> person id, bisecting store rows kept sorted by WBS code."""
+
+    __slots__ = ("_store", "_rows")
+
+    def __init__(self, store: PersonStore, rows: Sequence[int]):
+        self._store = store
+        self._rows = rows
+
+    def __getitem__(self, wbs: str) -> int:
+        store, rows = self._store, self._rows
+        pos = bisect_left(rows, wbs, key=store.wbs_at)
+        if pos == len(rows) or store.wbs_at(rows[pos]) != wbs:
+            raise KeyError(wbs)
+        return store.ids[rows[pos]]
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._store.wbs_at(row) for row in self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+@dataclass
+class FamilyIndex:
+    """Lookup tables built once over a linked family tree.
+
+    ``preorder`` lists person ids in DFS order. Each person's subtree occupies
+    the contiguous slice ``preorder[entry[id]:exit[id]]`` (Euler-tour intervals),
+    so subtree membership and ancestor checks are O(1) comparisons.
+
+    `build` keeps the tables in dicts keyed by id; `from_store` keeps them in
+    typed arrays aligned with the store's rows (about 32 bytes per person),
+    behind the same mapping interface.
+    """
+
+    wbs_to_id: Mapping[str, int] = field(default_factory=dict)
+    entry: Mapping[int, int] = field(default_factory=dict)
+    exit: Mapping[int, int] = field(default_factory=dict)
+    preorder: Sequence[int] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, persons: Mapping[int, Person]) -> "FamilyIndex":
+        """Build the index; `persons` must already be linked by `build_tree`."""
+        wbs_to_id: Dict[str, int] = {}
+        entry: Dict[int, int] = {}
+        exit_: Dict[int, int] = {}
+        preorder: List[int] = []
+
+        for p in persons.values():
+            wbs_to_id[p.wbs] = p.id
+
+        for root in persons.values():
+            if root.parent_id is not None:
+                continue
+            stack = [(root, False)]
+            while stack:
+                node, finished = stack.pop()
+                if finished:
+                    exit_[node.id] = len(preorder)
+                    continue
+                entry[node.id] = len(preorder)
+                preorder.append(node.id)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+
+        return cls(wbs_to_id=wbs_to_id, entry=entry, exit=exit_, preorder=preorder)
+
+    @classmethod
+    def from_store(cls, store: PersonStore) -> "FamilyIndex":
+        """Build the index from a store's CSR child arrays, without per-person objects."""
+        ids = store.ids
+        child_offsets = store.child_offsets
+        child_rows = store.child_rows
+        entry = array("q", bytes(8 * len(store)))
+        exit_ = array("q", bytes(8 * len(store)))
+        preorder = array("q")
+
+        for root in store.file_rows:
+            if store.parent_ids[root] != MISSING:
+                continue
+            # 栈中的 ~row（负数）表示该行子树已遍历完，记录退出位置
+            stack = [root]
+            while stack:
+                row = stack.pop()
+                if row < 0:
+                    exit_[~row] = len(preorder)
+                    continue
+                entry[row] = len(preorder)
+                preorder.append(ids[row])
+                stack.append(~row)
+                stack.extend(reversed(child_rows[child_offsets[row] : child_offsets[row + 1]]))
+
+        wbs_rows = array("q", sorted(range(len(store)), key=store.wbs_at))
+        return cls(
+            wbs_to_id=_WbsLookup(store, wbs_rows),
+            entry=_RowColumn(store, entry),
+            exit=_RowColumn(store, exit_),
+            preorder=preorder,
+        )
+
+    def id_for_wbs(self, wbs: str) -> int:
+        """Resolve a WBS code to a person id."""
+        try:
+            return self.wbs_to_id[wbs]
+        except KeyError:
+            raise ValueError(f"WBS not found: {wbs}") from None
+
+    def subtree_ids(self, root_id: int) -> List[int]:
+        """Return ids of `root_id` and all its descendants in preorder."""
+        return list(self.preorder[self.entry[root_id] : self.exit[root_id]])
+
+    def subtree_size(self, root_id: int) -> int:
+        return self.exit[root_id] - self.entry[root_id]
+
+    def contains(self, root_id: int, person_id: int) -> bool:
+        """Whether `person_id` lies in the subtree rooted at `root_id` (inclusive)."""
+        pos = self.entry[person_id]
+        return self.entry[root_id] <= pos < self.exit[root_id]
+
+    def is_ancestor(self, ancestor_id: int, person_id: int) -> bool:
+        """Whether `ancestor_id` is a strict ancestor of `person_id`."""
+        return ancestor_id != person_id and self.contains(ancestor_id, person_id)
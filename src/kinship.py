@@ -0,0 +1,151 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .index import FamilyIndex
+from .model import Person
+
+# 直系称谓 (男, 女, 性别不详)，按相差代数索引
+_DESCENDANTS: Dict[int, Tuple[str, str, str]] = {
+    1: ("儿子", "女儿", "子女"),
+    2: ("孙子", "孙女", "孙辈"),
+    3: ("曾孙", "曾孙女", "曾孙辈"),
+    4: ("玄孙", "玄孙女", "玄孙辈"),
+}
+_ANCESTORS: Dict[int, Tuple[str, str, str]] = {
+    1: ("父亲", "母亲", "父母"),
+    2: ("祖父", "祖母", "祖辈"),
+    3: ("曾祖父", "曾祖母", "曾祖辈"),
+    4: ("高祖父", "高祖母", "高祖辈"),
+}
+# 同辈旁系前缀：从兄弟姐妹的远近（按共同祖先距离）
+_COLLATERAL_PREFIX = {2: "堂", 3: "再从", 4: "族"}
+
+
+@dataclass
+class Kinship:
+    """How `b` is related to `a`; the label reads "b 是 a 的 <label>"."""
+
+    a: str
+    b: str
+    lca: Optional[str]
+    a_distance: Optional[int]
+    b_distance: Optional[int]
+    generation_gap: int
+    generation_label: str
+    label: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _gendered(person: Person, terms: Tuple[str, str, str]) -> str:
+    male, female, neutral = terms
+    if person.gender == "M":
+        return male
+    if person.gender == "F":
+        return female
+    return neutral
+
+
+def _is_older(a: Person, b: Person) -> bool:
+    """Whether `a` is older than `b`; falls back to WBS sibling order."""
+    if a.birth_year and b.birth_year and a.birth_year != b.birth_year:
+        return a.birth_year < b.birth_year
+    return a.wbs_path < b.wbs_path
+
+
+def _peer_term(a: Person, b: Person) -> str:
+    older = _is_older(b, a)
+    if b.gender == "M":
+        return "兄" if older else "弟"
+    if b.gender == "F":
+        return "姐" if older else "妹"
+    return "兄姐" if older else "弟妹"
+
+
+def _generation_label(gap: int) -> str:
+    if gap == 0:
+        return "同辈"
+    return f"晚{gap}代" if gap > 0 else f"长{-gap}代"
+
+
+class KinshipEngine:
+    """Lowest common ancestor and kinship labels from WBS materialized paths.
+
+    A WBS code encodes the whole ancestor chain, so the LCA of two persons is
+    their longest common WBS prefix, resolved with one ``wbs_to_id`` lookup:
+    O(depth) per pair with no tree walk and no extra index to build.
+    """
+
+    def __init__(self, persons: Mapping[int, Person], index: FamilyIndex):
+        self.persons = persons
+        self.index = index
+
+    def _ancestor_at(self, person: Person, depth: int) -> Person:
+        """The ancestor of `person` (or itself) whose WBS has `depth` segments."""
+        if depth == len(person.wbs_path):
+            return person
+        wbs = ".".join(person.wbs.split(".")[:depth])
+        return self.persons[self.index.wbs_to_id[wbs]]
+
+    def lca(self, a: Person, b: Person) -> Optional[Person]:
+        common = 0
+        for x, y in zip(a.wbs_path, b.wbs_path):
+            if x != y:
+                break
+            common += 1
+        if common == 0:
+            return None
+        return self._ancestor_at(a, common)
+
+    def relate(self, a: Person, b: Person) -> Kinship:
+        gap = len(b.wbs_path) - len(a.wbs_path)
+        ancestor = self.lca(a, b)
+        if ancestor is None:
+            return Kinship(
+                a.wbs, b.wbs, None, None, None, gap, _generation_label(gap), "无亲缘关系"
+            )
+
+        depth = len(ancestor.wbs_path)
+        up = len(a.wbs_path) - depth
+        down = len(b.wbs_path) - depth
+        label = self._label(a, b, depth, up, down)
+        return Kinship(a.wbs, b.wbs, ancestor.wbs, up, down, gap, _generation_label(gap), label)
+
+    def _label(self, a: Person, b: Person, depth: int, up: int, down: int) -> str:
+        if up == 0 and down == 0:
+            return "本人"
+        if up == 0:
+            terms = _DESCENDANTS.get(down)
+            return _gendered(b, terms) if terms else f"第{down}代孙"
+        if down == 0:
+            terms = _ANCESTORS.get(up)
+            return _gendered(b, terms) if terms else f"第{up}代祖"
+
+        if up == down == 1:
+            terms = ("哥哥", "姐姐", "兄姐") if _is_older(b, a) else ("弟弟", "妹妹", "弟妹")
+            return _gendered(b, terms)
+        if up == down:
+            # 同辈旁系：两条支线均经男性传承为堂（再从、族），否则为表
+            patrilineal = all(
+                self._ancestor_at(p, d).gender == "M"
+                for p in (a, b)
+                for d in range(depth + 1, depth + up)
+            )
+            prefix = _COLLATERAL_PREFIX.get(up, "族") if patrilineal else "表"
+            return prefix + _peer_term(a, b)
+        if up == 1 and down == 2:
+            # 兄弟的子女为侄，姐妹的子女为外甥
+            if self._ancestor_at(b, depth + 1).gender == "F":
+                return _gendered(b, ("外甥", "外甥女", "外甥"))
+            return _gendered(b, ("侄子", "侄女", "侄辈"))
+        if up == 2 and down == 1:
+            parent = self._ancestor_at(a, depth + 1)
+            if parent.gender == "F":
+                return _gendered(b, ("舅父", "姨母", "舅姨"))
+            if b.gender == "F":
+                return "姑母"
+            return "伯父" if _is_older(b, parent) else "叔父"
+        if down > up:
+            return f"旁系晚辈（晚{down - up}代）"
+        return f"旁系长辈（长{up - down}代）"
@@ -1,25 +1,114 @@
-from typing import Optional
-
-import yaml
-
-
-class LineageSystem:
-    def __init__(self, poem: list):
-        self.poem = poem
-
-    @classmethod
-    def from_yaml(cls, path: str):
-        with open(path, encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        return cls(data["lineage_poem"])
-
-    def generation_char(self, generation: int) -> Optional[str]:
-        if generation <= 0:
-            return None
-        return self.poem[(generation - 1) % len(self.poem)]
-
-    def annotate_name(self, name: str, generation: int) -> str:
-        char = self.generation_char(generation)
-        if not char:
-            return name
-        return name[0] + char + name[1:]
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+from .model import Person
+
+# 预先计算的世代→行辈字表长度，更深的世代按取模计算
+GENERATION_TABLE_SIZE = 256
+# 批量标注结果按数据版本缓存的份数
+ANNOTATION_CACHE_VERSIONS = 16
+# 各版本缓存合计的姓名条数上限
+ANNOTATION_CACHE_MAX_ENTRIES = 500_000
+
+
+class LineageSystem:
+    def __init__(self, poem: list, version: str = ""):
+        self.poem = poem
+        # 文件版本（大小与修改时间），由 `load` 填写
+        self.version = version
+        self._table: Tuple[Optional[str], ...] = ()
+        if poem:
+            self._table = (None,) + tuple(
+                poem[(gen - 1) % len(poem)] for gen in range(1, GENERATION_TABLE_SIZE)
+            )
+        self._memo: "OrderedDict[str, Dict[int, str]]" = OrderedDict()
+        self._memo_entries = 0
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def from_yaml(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+        return cls(data["lineage_poem"])
+
+    @classmethod
+    def load(cls, path: str) -> "LineageSystem":
+        """Cached `from_yaml`; the file is parsed again only when its size or mtime changes."""
+        st = os.stat(path)
+        return _load_version(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+    def generation_char(self, generation: int) -> Optional[str]:
+        if generation <= 0:
+            return None
+        if generation < len(self._table):
+            return self._table[generation]
+        return self.poem[(generation - 1) % len(self.poem)]
+
+    def annotate_name(self, name: str, generation: int) -> str:
+        char = self.generation_char(generation)
+        if not char:
+            return name
+        return name[0] + char + name[1:]
+
+    def annotate_batch(
+        self, persons: Iterable[Person], data_version: Optional[str] = None
+    ) -> List[str]:
+        """Annotated names for `persons`, in order.
+
+        With a non-empty `data_version` each person's name is memoized by id
+        for that version, so graph renders, API payloads and search results
+        label a person once per data version. The memo keeps at most
+        `ANNOTATION_CACHE_VERSIONS` versions and `ANNOTATION_CACHE_MAX_ENTRIES`
+        names in total, dropping the least recently used versions first.
+        """
+        if not data_version:
+            # 空版本号无法区分不同家族，不做缓存
+            return [self.annotate_name(p.name, p.generation or p.depth) for p in persons]
+        with self._memo_lock:
+            memo = self._memo.get(data_version)
+            if memo is None:
+                memo = self._memo[data_version] = {}
+                while len(self._memo) > ANNOTATION_CACHE_VERSIONS:
+                    self._memo_entries -= len(self._memo.popitem(last=False)[1])
+            else:
+                self._memo.move_to_end(data_version)
+        names = []
+        fresh: List[Tuple[int, str]] = []
+        for p in persons:
+            name = memo.get(p.id)
+            if name is None:
+                name = self.annotate_name(p.name, p.generation or p.depth)
+                fresh.append((p.id, name))
+            names.append(name)
+        if fresh:
+            self._remember(data_version, memo, fresh)
+        return names
+
+    def _remember(
+        self, data_version: str, memo: Dict[int, str], fresh: List[Tuple[int, str]]
+    ) -> None:
+        with self._memo_lock:
+            if self._memo.get(data_version) is not memo:
+                return  # 该版本已被淘汰
+            while (
+                self._memo_entries + len(fresh) > ANNOTATION_CACHE_MAX_ENTRIES
+                and next(iter(self._memo)) != data_version
+            ):
+                self._memo_entries -= len(self._memo.popitem(last=False)[1])
+            room = ANNOTATION_CACHE_MAX_ENTRIES - self._memo_entries
+            for pid, name in fresh[: max(room, 0)]:
+                if pid not in memo:
+                    memo[pid] = name
+                    self._memo_entries += 1
+
+
+@lru_cache(maxsize=16)
+def _load_version(path: str, size: int, mtime_ns: int) -> LineageSystem:
+    lineage = LineageSystem.from_yaml(path)
+    lineage.version = f"{size:x}-{mtime_ns:x}"
+    return lineage
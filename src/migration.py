@@ -1,8 +1,16 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from collections import defaultdict
-from typing import Dict, List, Mapping
+from dataclasses import dataclass
+from itertools import count
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
+from .index import FamilyIndex
 from .model import Person
 
+# (birth_year, insertion sequence)：同年记录保持插入顺序
+TimelineKey = Tuple[int, int]
+
 
 def build_migration_timeline(persons: Mapping[int, Person]) -> Dict[int, List[Dict[str, str]]]:
     """Build a birth-year sorted migration timeline from person records."""
@@ -17,3 +25,199 @@ def build_migration_timeline(persons: Mapping[int, Person]) -> Dict[int, List[Di
                 }
             )
     return dict(sorted(timeline.items()))
+
+
+@dataclass
+class TimelinePage:
+    entries: List[Dict[str, object]]
+    next_offset: Optional[int]
+
+
+class MigrationTimeline:
+    """Migration timeline kept sorted by birth year across incremental updates.
+
+    Keys are held in sorted lists (one global, one per location) so year-range
+    and location queries bisect to the matching window instead of scanning
+    every person. Subtree-scoped queries bisect the subtree's preorder interval
+    in a per-index list of keys ordered by position, then sort only those keys
+    (or filter the window, whichever is smaller).
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[TimelineKey] = []
+        self._by_location: Dict[str, List[TimelineKey]] = defaultdict(list)
+        self._records: Dict[TimelineKey, Tuple[int, Dict[str, str]]] = {}
+        self._key_of: Dict[int, TimelineKey] = {}
+        self._seq = count()
+        self._dict_cache: Optional[Dict[int, List[Dict[str, str]]]] = None
+        # (索引, 先序位置, 按位置排列的键)，随索引或条目变化重建
+        self._position_cache: Optional[Tuple[FamilyIndex, array, List[TimelineKey]]] = None
+
+    @classmethod
+    def build(cls, persons: Mapping[int, Person]) -> "MigrationTimeline":
+        """Build from scratch, sorting once instead of inserting one by one."""
+        timeline = cls()
+        for person in persons.values():
+            if person.birth_year and person.location:
+                key = (person.birth_year, next(timeline._seq))
+                entry = {"name": person.name, "location": person.location, "wbs": person.wbs}
+                timeline._keys.append(key)
+                timeline._by_location[person.location].append(key)
+                timeline._records[key] = (person.id, entry)
+                timeline._key_of[person.id] = key
+        timeline._keys.sort()
+        for keys in timeline._by_location.values():
+            keys.sort()
+        return timeline
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def copy(self) -> "MigrationTimeline":
+        """Independent copy for copy-on-write updates; entry dicts are shared."""
+        clone = MigrationTimeline()
+        clone._keys = list(self._keys)
+        clone._by_location = defaultdict(
+            list, {loc: list(keys) for loc, keys in self._by_location.items()}
+        )
+        clone._records = dict(self._records)
+        clone._key_of = dict(self._key_of)
+        clone._seq = count(max(self._records, key=lambda k: k[1])[1] + 1 if self._records else 0)
+        return clone
+
+    def _insert(self, person: Person, seq: Optional[int] = None) -> None:
+        if not (person.birth_year and person.location):
+            return
+        key = (person.birth_year, next(self._seq) if seq is None else seq)
+        entry = {"name": person.name, "location": person.location, "wbs": person.wbs}
+        insort(self._keys, key)
+        insort(self._by_location[person.location], key)
+        self._records[key] = (person.id, entry)
+        self._key_of[person.id] = key
+
+    def add(self, person: Person) -> None:
+        """Add or replace the entry for `person`.
+
+        A replaced entry keeps its insertion sequence, so it stays where a
+        fresh `build` would put it among same-year entries; new persons are
+        appended after the existing entries of their year.
+        """
+        previous = self._key_of.get(person.id)
+        self.remove(person.id)
+        self._insert(person, None if previous is None else previous[1])
+        self._dict_cache = None
+        self._position_cache = None
+
+    def remove(self, person_id: int) -> None:
+        key = self._key_of.pop(person_id, None)
+        if key is None:
+            return
+        _, entry = self._records.pop(key)
+        del self._keys[bisect_left(self._keys, key)]
+        location_keys = self._by_location[entry["location"]]
+        del location_keys[bisect_left(location_keys, key)]
+        if not location_keys:
+            del self._by_location[entry["location"]]
+        self._dict_cache = None
+        self._position_cache = None
+
+    def _window(
+        self, year_min: Optional[int], year_max: Optional[int], location: Optional[str]
+    ) -> Tuple[List[TimelineKey], int, int]:
+        keys = self._keys if location is None else self._by_location.get(location, [])
+        lo = 0 if year_min is None else bisect_left(keys, (year_min,))
+        hi = len(keys) if year_max is None else bisect_right(keys, (year_max, float("inf")))
+        return keys, lo, hi
+
+    def _by_position(self, index: FamilyIndex) -> Tuple[array, List[TimelineKey]]:
+        """Keys ordered by their person's preorder position in `index`, with the positions."""
+        cached = self._position_cache
+        if cached is None or cached[0] is not index:
+            entry = index.entry
+            pairs = sorted((entry[pid], key) for key, (pid, _) in self._records.items())
+            cached = (index, array("q", (pos for pos, _ in pairs)), [key for _, key in pairs])
+            self._position_cache = cached
+        return cached[1], cached[2]
+
+    def _matching(
+        self,
+        year_min: Optional[int],
+        year_max: Optional[int],
+        location: Optional[str],
+        index: Optional[FamilyIndex],
+        root_id: Optional[int],
+    ) -> Tuple[Sequence[TimelineKey], int, int]:
+        """Matching keys in timeline order, as ``keys[lo:hi]``."""
+        keys, lo, hi = self._window(year_min, year_max, location)
+        if index is None or root_id is None:
+            return keys, lo, hi
+        # 子树在先序数组中连续，二分得到其全部条目
+        positions, ordered = self._by_position(index)
+        first = bisect_left(positions, index.entry[root_id])
+        last = bisect_left(positions, index.exit[root_id])
+        if last - first == len(positions):
+            return keys, lo, hi
+        if last - first < hi - lo:
+            # 子树条目少于年份/地点窗口：仅对子树条目排序后再按年份二分
+            scoped = sorted(ordered[first:last])
+            if location is not None:
+                scoped = [key for key in scoped if self._records[key][1]["location"] == location]
+            lo = 0 if year_min is None else bisect_left(scoped, (year_min,))
+            hi = len(scoped) if year_max is None else bisect_right(scoped, (year_max, float("inf")))
+            return scoped, lo, hi
+        start, end = index.entry[root_id], index.exit[root_id]
+        scoped = [key for key in keys[lo:hi] if start <= index.entry[self._records[key][0]] < end]
+        return scoped, 0, len(scoped)
+
+    def iter_entries(
+        self,
+        *,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+        location: Optional[str] = None,
+        index: Optional[FamilyIndex] = None,
+        root_id: Optional[int] = None,
+    ) -> Iterator[Dict[str, object]]:
+        """Yield ``{"year", "name", "location", "wbs"}`` entries in timeline order."""
+        keys, lo, hi = self._matching(year_min, year_max, location, index, root_id)
+        for pos in range(lo, hi):
+            key = keys[pos]
+            yield {"year": key[0], **self._records[key][1]}
+
+    def query(
+        self,
+        *,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+        location: Optional[str] = None,
+        index: Optional[FamilyIndex] = None,
+        root_id: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> TimelinePage:
+        """Return one page of matching entries and the offset of the next page."""
+        if offset < 0 or limit <= 0:
+            raise ValueError("offset must be >= 0 and limit must be positive")
+        keys, lo, hi = self._matching(year_min, year_max, location, index, root_id)
+        # 按下标直接定位分页起点，无需逐条跳过
+        start = min(lo + offset, hi)
+        end = min(start + limit, hi)
+        entries = [
+            {"year": keys[pos][0], **self._records[keys[pos]][1]} for pos in range(start, end)
+        ]
+        return TimelinePage(entries, offset + limit if end < hi else None)
+
+    def as_dict(self) -> Dict[int, List[Dict[str, str]]]:
+        """Same shape as `build_migration_timeline`.
+
+        The grouping is cached until the next update; callers get copies, so
+        mutating the result never leaks into the timeline.
+        """
+        if self._dict_cache is None:
+            grouped: Dict[int, List[Dict[str, str]]] = {}
+            for key in self._keys:
+                grouped.setdefault(key[0], []).append(self._records[key][1])
+            self._dict_cache = grouped
+        return {
+            year: [dict(entry) for entry in entries] for year, entries in self._dict_cache.items()
+        }
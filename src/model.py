@@ -1,5 +1,10 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Tuple
+
+
+def parse_wbs(wbs: str) -> Tuple[int, ...]:
+    """Split a WBS code such as ``"1.3.2"`` into integer segments ``(1, 3, 2)``."""
+    return tuple(int(segment) for segment in wbs.split("."))
 
 
 @dataclass
@@ -16,10 +21,16 @@ class Person:
     location: Optional[str] = None
     note: Optional[str] = None
     children: list["Person"] = field(default_factory=list)
+    # 创建时解析的 WBS 整数路径；修改 wbs 后需重新创建记录
+    wbs_path: Tuple[int, ...] = field(default=(), repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.wbs_path:
+            self.wbs_path = parse_wbs(self.wbs)
 
     @property
     def depth(self) -> int:
-        return len(self.wbs.split("."))
+        return len(self.wbs_path)
 
     def __repr__(self):
         return f"<Person {self.wbs} {self.name}>"
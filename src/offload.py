@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolBusyError(RuntimeError):
+    """The pool's queue is full; the caller should retry later."""
+
+
+class PoolTimeoutError(TimeoutError):
+    """A job did not finish within the caller's timeout."""
+
+
+class WorkPool:
+    """Bounded worker pool with backpressure and coalescing of identical jobs.
+
+    At most `max_pending` distinct jobs may be queued or running; beyond that
+    `submit` raises `PoolBusyError` instead of growing an unbounded queue.
+    Jobs submitted under a key that is already in flight share its future and
+    do not take a slot. A timed-out caller stops waiting, but the job keeps
+    running and its result still reaches any other waiters.
+    """
+
+    def __init__(self, workers: int, *, max_pending: int, name: str = "work"):
+        if workers < 1 or max_pending < workers:
+            raise ValueError("workers must be >= 1 and max_pending >= workers")
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def submit(self, key: str, fn: Callable[[], T]) -> "Future[T]":
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if len(self._inflight) >= self.max_pending:
+                raise PoolBusyError(f"{len(self._inflight)} jobs pending")
+            future = self._executor.submit(fn)
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._release(key, future))
+        return future
+
+    def _release(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def run(self, key: str, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """Submit (or join) the job for `key` and wait up to `timeout` seconds."""
+        future = self.submit(key, fn)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise PoolTimeoutError(f"job did not finish within {timeout}s") from None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
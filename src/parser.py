@@ -1,7 +1,23 @@
 import csv
+import io
 import re
-from typing import Dict, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
+from .metrics import timed
 from .model import Person
 
 REQUIRED_FIELDS = {"id", "wbs", "name"}
@@ -16,6 +32,52 @@ OPTIONAL_FIELDS = {
 }
 ALLOWED_FIELDS = REQUIRED_FIELDS | OPTIONAL_FIELDS | {"parent_id"}
 WBS_PATTERN = re.compile(r"^\d+(?:\.\d+)*$")
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# (id, wbs, name, gender, birth_year, death_year, generation, clan_name, location, note,
+#  wbs_path)
+Record = Tuple[
+    int,
+    str,
+    str,
+    Optional[str],
+    Optional[int],
+    Optional[int],
+    Optional[int],
+    Optional[str],
+    Optional[str],
+    Optional[str],
+    Tuple[int, ...],
+]
+# ("ok", lineno, record), ("error", lineno, detail) or
+# ("field_error", lineno, (id, wbs, detail)) for a bad integer field, in file order
+ChunkItem = Tuple[str, int, object]
+
+
+class CsvRowError(ValueError):
+    """A single bad CSV row; the message keeps the ``Line N: ...`` format."""
+
+    def __init__(self, lineno: int, detail: str):
+        super().__init__(f"Line {lineno}: {detail}")
+        self.lineno = lineno
+        self.detail = detail
+
+
+class _FieldError(CsvRowError):
+    """A bad integer field in a row whose id and WBS are otherwise valid."""
+
+    def __init__(self, lineno: int, detail: str, pid: int, wbs: str):
+        super().__init__(lineno, detail)
+        self.pid = pid
+        self.wbs = wbs
+
+
+class FamilyCsvError(ValueError):
+    """All problems found in one load when ``collect_errors=True``."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__(f"{len(errors)} error(s) in CSV:\n" + "\n".join(errors))
+        self.errors = errors
 
 
 def _clean(value):
@@ -29,10 +91,8 @@ def _clean(value):
 
 def _get_parent_wbs(wbs: str) -> Optional[str]:
     """从 WBS 推导父节点 WBS"""
-    parts = wbs.split(".")
-    if len(parts) == 1:
-        return None
-    return ".".join(parts[:-1])
+    parent, sep, _ = wbs.rpartition(".")
+    return parent if sep else None
 
 
 def _parse_int(row: dict, field: str, lineno: int) -> Optional[int]:
@@ -42,66 +102,267 @@ def _parse_int(row: dict, field: str, lineno: int) -> Optional[int]:
     try:
         return int(value)
     except ValueError as exc:
-        raise ValueError(f"Line {lineno}: field '{field}' must be integer, got {value!r}") from exc
+        raise CsvRowError(lineno, f"field '{field}' must be integer, got {value!r}") from exc
 
 
-def read_family_csv(path: str) -> Dict[int, Person]:
-    persons: Dict[int, Person] = {}
-    wbs_to_id: Dict[str, int] = {}
+def _check_header(fieldnames: Iterable[str]) -> None:
+    fields = set(fieldnames)
+    missing_required = REQUIRED_FIELDS - fields
+    if missing_required:
+        raise ValueError(f"CSV missing required columns: {sorted(missing_required)}")
+
+    unknown_fields = fields - ALLOWED_FIELDS
+    if unknown_fields:
+        raise ValueError(f"CSV contains unknown columns: {sorted(unknown_fields)}")
+
+
+def _parse_record(raw: Mapping[Optional[str], Any], lineno: int) -> Record:
+    """Clean and type-check one row; raises `CsvRowError` on bad input.
+
+    A bad integer field raises `_FieldError`, which carries the row's id and
+    WBS so the merge pass can still report a duplicate WBS first.
+    """
+    if None in raw:
+        # csv.DictReader 将多出的字段归入键 None
+        width = len(raw) - 1
+        raise CsvRowError(lineno, f"row has {width + len(raw[None])} fields, header has {width}")
+    row = {k: _clean(v) for k, v in raw.items()}
+    for field in REQUIRED_FIELDS:
+        if not row.get(field):
+            raise CsvRowError(lineno, f"missing required field '{field}'")
+
+    pid = _parse_int(row, "id", lineno)
+    assert pid is not None
+
+    wbs = row["wbs"]
+    if not WBS_PATTERN.match(wbs):
+        raise CsvRowError(
+            lineno, f"invalid wbs format {wbs!r}; expected digits separated by '.'"
+        )
+
+    segments = wbs.split(".")
+    if any(segment.startswith("0") and segment != "0" for segment in segments):
+        raise CsvRowError(lineno, f"invalid wbs segment with leading zero in {wbs!r}")
+
+    try:
+        generation = _parse_int(row, "generation", lineno)
+        birth_year = _parse_int(row, "birth_year", lineno)
+        death_year = _parse_int(row, "death_year", lineno)
+    except CsvRowError as exc:
+        raise _FieldError(lineno, exc.detail, pid, wbs) from exc
+
+    return (
+        pid,
+        wbs,
+        row["name"],
+        row.get("gender"),
+        birth_year,
+        death_year,
+        generation,
+        row.get("clan_name"),
+        row.get("location"),
+        row.get("note"),
+        tuple(map(int, segments)),
+    )
+
+
+def _parse_item(raw: Mapping[Optional[str], Any], lineno: int) -> ChunkItem:
+    try:
+        return ("ok", lineno, _parse_record(raw, lineno))
+    except _FieldError as exc:
+        return ("field_error", lineno, (exc.pid, exc.wbs, exc.detail))
+    except CsvRowError as exc:
+        return ("error", lineno, exc.detail)
+
 
+def _ingest(
+    item: ChunkItem,
+    persons: Dict[int, Person],
+    wbs_to_id: Dict[str, int],
+    validate: bool = False,
+) -> None:
+    """Add one parsed row, raising its first problem as `CsvRowError`.
+
+    Checks run in the original single-pass order: row format, duplicate WBS,
+    integer fields, duplicate id, then (with `validate`) generation against
+    WBS depth.
+    """
+    kind, lineno, value = item
+    if kind == "error":
+        raise CsvRowError(lineno, cast(str, value))
+    if kind == "field_error":
+        pid, wbs, detail = cast(Tuple[int, str, str], value)
+        if wbs in wbs_to_id:
+            raise CsvRowError(lineno, f"duplicated wbs {wbs}")
+        raise CsvRowError(lineno, detail)
+
+    record = cast(Record, value)
+    pid, wbs, generation, wbs_path = record[0], record[1], record[6], record[10]
+    if wbs in wbs_to_id:
+        raise CsvRowError(lineno, f"duplicated wbs {wbs}")
+    if pid in persons:
+        raise CsvRowError(lineno, f"duplicated id {pid}")
+    if validate and generation is not None and generation != len(wbs_path):
+        raise CsvRowError(
+            lineno,
+            f"Generation mismatch for {record[2]}: generation={generation}, wbs={wbs}",
+        )
+    wbs_to_id[wbs] = pid
+
+    persons[pid] = Person(
+        id=pid,
+        parent_id=None,
+        wbs=wbs,
+        name=record[2],
+        gender=record[3],
+        birth_year=record[4],
+        death_year=record[5],
+        generation=generation,
+        clan_name=record[7],
+        location=record[8],
+        note=record[9],
+        wbs_path=wbs_path,
+    )
+
+
+def _parse_chunk(
+    path: str, start: int, end: int, fieldnames: Sequence[str]
+) -> Tuple[List[ChunkItem], int]:
+    """Parse the byte range ``[start, end)``; line numbers are chunk-relative from 1."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    items: List[ChunkItem] = []
+    rows = 0
+    width = len(fieldnames)
+    for values in csv.reader(io.StringIO(text)):
+        if not values:
+            continue
+        rows += 1
+        # 与 csv.DictReader 一致：缺少的字段取 None，多出的字段归入键 None
+        row: Dict[Optional[str], Any] = dict(zip(fieldnames, values))
+        if len(values) > width:
+            row[None] = values[width:]
+        items.append(_parse_item(row, rows))
+    return items, rows
+
+
+def _chunk_ranges(path: str, chunk_bytes: int) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Read the header and split the data section into ranges ending on line breaks."""
+    ranges: List[Tuple[int, int]] = []
+    with open(path, "rb") as f:
+        header = f.readline()
+        fieldnames = next(csv.reader([header.decode("utf-8-sig")]), [])
+        start = f.tell()
+        f.seek(0, io.SEEK_END)
+        size = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return fieldnames, ranges
+
+
+def _iter_serial(path: str) -> Iterable[ChunkItem]:
     with open(path, encoding="utf-8-sig") as f:
         reader = csv.DictReader(f)
-        fieldnames = set(reader.fieldnames or [])
-        missing_required = REQUIRED_FIELDS - fieldnames
-        if missing_required:
-            raise ValueError(f"CSV missing required columns: {sorted(missing_required)}")
+        _check_header(reader.fieldnames or [])
+        for lineno, row in enumerate(reader, start=2):
+            yield _parse_item(row, lineno)
 
-        unknown_fields = fieldnames - ALLOWED_FIELDS
-        if unknown_fields:
-            raise ValueError(f"CSV contains unknown columns: {sorted(unknown_fields)}")
 
-        for lineno, row in enumerate(reader, start=2):
-            row = {k: _clean(v) for k, v in row.items()}
-            for field in REQUIRED_FIELDS:
-                if not row.get(field):
-                    raise ValueError(f"Line {lineno}: missing required field '{field}'")
-
-            pid = _parse_int(row, "id", lineno)
-            assert pid is not None
-
-            wbs = row["wbs"]
-            if not WBS_PATTERN.match(wbs):
-                raise ValueError(
-                    f"Line {lineno}: invalid wbs format {wbs!r}; expected digits separated by '.'"
-                )
+def iter_family_records(path: str) -> Iterator[Tuple[int, Record]]:
+    """Stream ``(lineno, record)`` pairs without building persons.
+
+    Only row-level checks are applied; duplicate and parent checks are left to
+    the consumer. Raises `CsvRowError` at the first bad row.
+    """
+    for kind, lineno, value in _iter_serial(path):
+        if kind == "error":
+            raise CsvRowError(lineno, cast(str, value))
+        if kind == "field_error":
+            raise CsvRowError(lineno, cast(Tuple[int, str, str], value)[2])
+        yield lineno, cast(Record, value)
+
+
+def _iter_parallel(path: str, workers: int, chunk_bytes: int) -> Iterable[ChunkItem]:
+    """Parse chunks in a process pool, yielding items in file order.
+
+    At most 2 × `workers` chunks are in flight and each chunk's result is
+    dropped once yielded, so memory stays bounded however large the file.
+    Closing the generator early cancels the queued chunks.
+    """
+    fieldnames, ranges = _chunk_ranges(path, chunk_bytes)
+    _check_header(fieldnames)
+
+    offset = 1  # 表头占第 1 行
+    remaining = iter(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = next(remaining, None)
+                    if chunk is None:
+                        break
+                    pending.append(pool.submit(_parse_chunk, path, chunk[0], chunk[1], fieldnames))
+                if not pending:
+                    return
+                items, rows = pending.popleft().result()
+                for kind, lineno, value in items:
+                    yield kind, lineno + offset, value
+                offset += rows
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+@timed("parse")
+def read_family_csv(
+    path: str,
+    *,
+    workers: Optional[int] = None,
+    collect_errors: bool = False,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    validate: bool = False,
+) -> Dict[int, Person]:
+    """Parse a family CSV into persons keyed by id, with parent ids resolved from WBS.
+
+    With ``workers > 1`` the data section is split at line boundaries into
+    ``chunk_bytes`` ranges parsed in a process pool; duplicate detection and
+    parent resolution then run as one merge pass in file order, so errors and
+    line numbers match the serial parser. Parallel mode assumes one record per
+    physical line (no quoted line breaks).
+
+    With ``collect_errors=True`` every bad row is reported in a single
+    `FamilyCsvError` instead of raising on the first one.
+
+    With ``validate=True`` the checks of `validate_family` run during the
+    parse (generation against WBS depth per row in the merge pass; WBS
+    uniqueness and parent consistency hold by construction), so the result
+    needs no separate validation pass and errors carry line numbers.
+
+    Rows with more fields than the header are rejected in both modes.
+    """
+    persons: Dict[int, Person] = {}
+    wbs_to_id: Dict[str, int] = {}
+    errors: List[str] = []
+
+    if workers is not None and workers > 1:
+        items = _iter_parallel(path, workers, chunk_bytes)
+    else:
+        items = _iter_serial(path)
 
-            if any(segment.startswith("0") and segment != "0" for segment in wbs.split(".")):
-                raise ValueError(f"Line {lineno}: invalid wbs segment with leading zero in {wbs!r}")
-
-            if wbs in wbs_to_id:
-                raise ValueError(f"Line {lineno}: duplicated wbs {wbs}")
-            wbs_to_id[wbs] = pid
-
-            generation = _parse_int(row, "generation", lineno)
-            birth_year = _parse_int(row, "birth_year", lineno)
-            death_year = _parse_int(row, "death_year", lineno)
-
-            if pid in persons:
-                raise ValueError(f"Line {lineno}: duplicated id {pid}")
-
-            persons[pid] = Person(
-                id=pid,
-                parent_id=None,
-                wbs=wbs,
-                name=row["name"],
-                gender=row.get("gender"),
-                birth_year=birth_year,
-                death_year=death_year,
-                generation=generation,
-                clan_name=row.get("clan_name"),
-                location=row.get("location"),
-                note=row.get("note"),
-            )
+    for item in items:
+        try:
+            _ingest(item, persons, wbs_to_id, validate)
+        except CsvRowError as exc:
+            if not collect_errors:
+                raise
+            errors.append(str(exc))
 
     for pid, person in persons.items():
         parent_wbs = _get_parent_wbs(person.wbs)
@@ -109,8 +370,13 @@ def read_family_csv(path: str) -> Dict[int, Person]:
             if parent_wbs in wbs_to_id:
                 person.parent_id = wbs_to_id[parent_wbs]
             else:
-                raise ValueError(
+                message = (
                     f"Person {person.name} (wbs={person.wbs}): parent wbs {parent_wbs} not found"
                 )
+                if not collect_errors:
+                    raise ValueError(message)
+                errors.append(message)
 
+    if errors:
+        raise FamilyCsvError(errors)
     return persons
@@ -0,0 +1,209 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+from .reload import LiveFamilyService
+from .repository import CsvFamilyRepository, SqliteFamilyRepository
+from .service import FamilyTreeService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+# 常驻内存估算：列式存储、FamilyIndex、搜索索引与时间轴合计的每人开销
+BYTES_PER_PERSON = 1024
+# 按扩展名识别为 SQLite 数据库的文件，其余均按 CSV 处理
+SQLITE_SUFFIXES = (".sqlite", ".db")
+
+DatasetRepository = Union[CsvFamilyRepository, SqliteFamilyRepository]
+
+
+class UnknownDatasetError(KeyError):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"unknown dataset: {self.name}"
+
+
+def estimate_bytes(service: FamilyTreeService) -> int:
+    """Rough resident size of a loaded family, proportional to its population."""
+    return len(service.persons) * BYTES_PER_PERSON
+
+
+def open_repository(path: str) -> DatasetRepository:
+    """Repository for a dataset file: SQLite for ``.sqlite``/``.db``, CSV otherwise."""
+    if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteFamilyRepository(path=path)
+    return CsvFamilyRepository(path=path)
+
+
+@dataclass
+class _Entry:
+    live: LiveFamilyService
+    size: int
+    last_used: float
+
+
+class FamilyRegistry:
+    """Named family datasets loaded on first access and evicted when idle.
+
+    Each dataset is a `CsvFamilyRepository` or `SqliteFamilyRepository`;
+    `get` loads it through ``load_store`` (the snapshot path for CSV) into a
+    `LiveFamilyService` and keeps it in an LRU; either backend is loaded in
+    full, so SQLite datasets count against `memory_budget` like CSV ones.
+    Only CSV datasets are watched for edits. When the estimated size of the loaded families exceeds
+    `memory_budget`, least recently used datasets are dropped (a dataset
+    larger than the whole budget still loads, alone). With `idle_timeout`,
+    datasets untouched for that many seconds are dropped on the next access.
+    Pinned datasets are never evicted. Concurrent first requests for the same
+    dataset share one load.
+    """
+
+    def __init__(
+        self,
+        repositories: Mapping[str, DatasetRepository],
+        *,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        idle_timeout: Optional[float] = None,
+        reload_interval: Optional[float] = None,
+        estimate: Callable[[FamilyTreeService], int] = estimate_bytes,
+    ):
+        self.repositories = dict(repositories)
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+        self.reload_interval = reload_interval
+        self.estimate = estimate
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> "FamilyRegistry":
+        """One dataset per CSV or SQLite file in `directory`, named by file stem."""
+        suffixes = (".csv",) + SQLITE_SUFFIXES
+        repositories = {
+            path.stem: open_repository(str(path))
+            for path in sorted(Path(directory).iterdir())
+            if path.suffix.lower() in suffixes
+        }
+        return cls(repositories, **kwargs)
+
+    def names(self) -> List[str]:
+        return sorted(self.repositories)
+
+    def loaded(self) -> List[str]:
+        """Loaded dataset names, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def pin(self, name: str) -> None:
+        """Exempt `name` from eviction (it still loads lazily)."""
+        if name not in self.repositories:
+            raise UnknownDatasetError(name)
+        self._pinned.add(name)
+
+    def get(self, name: str) -> LiveFamilyService:
+        """Return the live service for `name`, loading it if needed."""
+        if name not in self.repositories:
+            raise UnknownDatasetError(name)
+        self._evict_idle()
+        with self._lock:
+            entry = self._touch(name)
+            if entry is not None:
+                return entry.live
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._touch(name)
+                if entry is not None:
+                    return entry.live
+            live = self._load(name)
+            with self._lock:
+                self._entries[name] = _Entry(live, self.estimate(live.current), time.monotonic())
+                evicted = self._over_budget(keep=name)
+        self._release(evicted)
+        return live
+
+    def evict(self, name: str) -> bool:
+        """Drop a loaded dataset; requests already holding its service finish normally."""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+        if entry is None:
+            return False
+        self._release([(name, entry)])
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        self._release(entries)
+
+    def _touch(self, name: str) -> Optional[_Entry]:
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            self._entries.move_to_end(name)
+        return entry
+
+    def _load(self, name: str) -> LiveFamilyService:
+        repo = self.repositories[name]
+        start = time.perf_counter()
+        service = FamilyTreeService.from_store(repo.load_store(), validated=True)
+        live = LiveFamilyService(service, repo.path)
+        if self.reload_interval and isinstance(repo, CsvFamilyRepository):
+            live.watch(self.reload_interval)
+        logger.info(
+            "Loaded dataset %s (%d persons) in %.2fs",
+            name,
+            len(service.persons),
+            time.perf_counter() - start,
+        )
+        return live
+
+    def _over_budget(self, keep: str) -> List[Tuple[str, _Entry]]:
+        """Pop LRU entries until within budget; caller holds the lock."""
+        evicted = []
+        total = sum(entry.size for entry in self._entries.values())
+        for name in list(self._entries):
+            if total <= self.memory_budget:
+                break
+            if name == keep or name in self._pinned:
+                continue
+            entry = self._entries.pop(name)
+            total -= entry.size
+            evicted.append((name, entry))
+        return evicted
+
+    def _evict_idle(self) -> None:
+        if self.idle_timeout is None:
+            return
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                (name, entry)
+                for name, entry in self._entries.items()
+                if entry.last_used < cutoff and name not in self._pinned
+            ]
+            for name, _ in idle:
+                del self._entries[name]
+        self._release(idle)
+
+    @staticmethod
+    def _release(entries: List[Tuple[str, _Entry]]) -> None:
+        # 停止监视线程可能需要等待进行中的重载，放在锁外执行
+        for name, entry in entries:
+            entry.live.stop()
+            logger.info("Evicted dataset %s (~%d bytes)", name, entry.size)
@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Set, Tuple, cast
+
+from .index import FamilyIndex
+from .model import Person
+from .parser import read_family_csv
+from .service import FamilyTreeService
+from .snapshot import source_key
+from .store import PersonStore
+
+logger = logging.getLogger(__name__)
+
+# 参与比较的字段；children 由 parent_id 推导，不单独比较
+_COMPARED_FIELDS = (
+    "parent_id",
+    "wbs",
+    "name",
+    "gender",
+    "birth_year",
+    "death_year",
+    "generation",
+    "clan_name",
+    "location",
+    "note",
+)
+
+
+def _fields(person: Person) -> Tuple[object, ...]:
+    return tuple(getattr(person, name) for name in _COMPARED_FIELDS)
+
+
+@dataclass
+class FamilyDiff:
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_persons(old: Mapping[int, Person], new: Mapping[int, Person]) -> FamilyDiff:
+    """Compare two person maps by id; a person whose wbs or fields differ is changed."""
+    diff = FamilyDiff()
+    for pid, person in new.items():
+        previous = old.get(pid)
+        if previous is None:
+            diff.added.append(pid)
+        elif _fields(previous) != _fields(person):
+            diff.changed.append(pid)
+    diff.removed = [pid for pid in old if pid not in new]
+    return diff
+
+
+def apply_diff(
+    service: FamilyTreeService,
+    persons: Mapping[int, Person],
+    diff: FamilyDiff,
+    *,
+    data_version: str,
+) -> FamilyTreeService:
+    """Return a new service for the freshly parsed `persons`; `service` is untouched.
+
+    Unchanged `Person` objects are shared with the old service. Touched persons
+    and their ancestors are replaced by the new records (path copying, since
+    parents hold their children by reference) and only their child lists are
+    relinked. The index is reused unless the tree shape changed, and the
+    timeline is copied and updated for the touched persons only; the search
+    index (sorted arrays) is rebuilt lazily on first search.
+
+    A service backed by a `PersonStore` stays store-backed: its columns are
+    immutable, so the new records are packed into a fresh store with an
+    array-backed `FamilyIndex.from_store`, and only the timeline is updated
+    incrementally.
+    """
+    old = service.persons
+    touched = set(diff.added) | set(diff.changed)
+    structural = bool(diff.added or diff.removed) or any(
+        old[pid].wbs != persons[pid].wbs or old[pid].parent_id != persons[pid].parent_id
+        for pid in diff.changed
+    )
+
+    index: Optional[FamilyIndex] = None
+    merged: Mapping[int, Person]
+    if isinstance(old, PersonStore):
+        # 列式存储不可原地修改；重新打包并建数组索引（索引按行号绑定所属存储，不能沿用）
+        store = PersonStore.from_persons(persons)
+        store.version = data_version
+        index = FamilyIndex.from_store(store)
+        merged = cast(Mapping[int, Person], store)
+    else:
+        relink: Set[int] = set(touched)
+        seeds = [persons[pid].parent_id for pid in touched]
+        seeds += [old[pid].parent_id for pid in diff.removed + diff.changed]
+        for pid in seeds:
+            while pid is not None and pid in persons and pid not in relink:
+                relink.add(pid)
+                pid = persons[pid].parent_id
+
+        linked = {
+            pid: (person if pid in relink else old[pid]) for pid, person in persons.items()
+        }
+        position = {pid: pos for pos, pid in enumerate(persons)}
+        incoming: Dict[int, List[int]] = {}
+        for pid in touched:
+            parent_id = persons[pid].parent_id
+            if parent_id is not None:
+                incoming.setdefault(parent_id, []).append(pid)
+        for pid in relink:
+            kept = [c.id for c in old[pid].children] if pid in old else []
+            child_ids = {
+                cid for cid in kept if cid in persons and persons[cid].parent_id == pid
+            }
+            child_ids.update(incoming.get(pid, ()))
+            ordered = sorted(child_ids, key=position.__getitem__)
+            linked[pid].children = [linked[cid] for cid in ordered]
+        merged = linked
+        if structural:
+            index = FamilyIndex.build(linked)
+
+    timeline = service.timeline.copy()
+    for pid in diff.removed:
+        timeline.remove(pid)
+    for pid in diff.changed + diff.added:
+        timeline.add(merged[pid])
+
+    return FamilyTreeService(
+        persons=merged,
+        index=service.index if index is None else index,
+        data_version=data_version,
+        _timeline=timeline,
+    )
+
+
+class LiveFamilyService:
+    """Holds the current `FamilyTreeService` and swaps in reloaded snapshots.
+
+    Readers take ``live.current`` once per request and keep using that
+    snapshot; `reload` builds the next one off to the side and publishes it
+    with a single reference assignment, so nobody sees a half-applied update.
+    """
+
+    def __init__(self, service: FamilyTreeService, csv_path: str):
+        self.csv_path = csv_path
+        self._current = service
+        self._lock = threading.Lock()
+        self._stat = self._stat_key()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def current(self) -> FamilyTreeService:
+        return self._current
+
+    def _stat_key(self) -> Tuple[int, int]:
+        st = os.stat(self.csv_path)
+        return st.st_size, st.st_mtime_ns
+
+    def reload(self) -> FamilyDiff:
+        """Re-read the CSV and publish the changes; raises ``ValueError`` on bad data.
+
+        The old snapshot stays current if parsing or validation fails. The
+        data version is the new file's hash prefix, as for `load_store`.
+        """
+        with self._lock:
+            self._stat = self._stat_key()
+            key = source_key(self.csv_path)
+            persons = read_family_csv(self.csv_path, validate=True)
+            service = self._current
+            diff = diff_persons(service.persons, persons)
+            if diff:
+                self._current = apply_diff(
+                    service, persons, diff, data_version=key.sha256[:16]
+                )
+                logger.info(
+                    "Reloaded %s: %d added, %d removed, %d changed",
+                    self.csv_path,
+                    len(diff.added),
+                    len(diff.removed),
+                    len(diff.changed),
+                )
+            return diff
+
+    def poll(self) -> Optional[FamilyDiff]:
+        """Reload if the file's size or mtime changed since the last load."""
+        try:
+            if self._stat_key() == self._stat:
+                return None
+        except FileNotFoundError:
+            return None
+        return self.reload()
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Start a daemon thread that polls the CSV every `interval` seconds."""
+        if self._thread is not None:
+            return
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.poll()
+                except ValueError as exc:
+                    logger.warning("Reload of %s rejected: %s", self.csv_path, exc)
+                except Exception as exc:  # monitoring hook
+                    logger.exception("Reload of %s failed: %s", self.csv_path, exc)
+
+        self._thread = threading.Thread(target=run, name="family-csv-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict
+
+_NAME_PATTERN = re.compile(r"^render_([0-9a-f]{32})\.html$")
+
+
+def render_key(*parts: object) -> str:
+    """Content address for a render: a digest over its defining inputs."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+class RenderCache:
+    """Bounded, content-addressed cache of rendered HTML files in one directory.
+
+    Files are named ``render_<key>.html``. A hit returns the existing file
+    name; concurrent misses for the same key share one render; least
+    recently used files are deleted once `max_files` or `max_bytes` is exceeded.
+    Files left by a previous process are adopted (oldest first) on startup.
+    """
+
+    def __init__(
+        self, directory: str, *, max_files: int = 200, max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._total_bytes = 0
+        self._adopt_existing()
+
+    @staticmethod
+    def filename(key: str) -> str:
+        return f"render_{key}.html"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, self.filename(key))
+
+    def _adopt_existing(self) -> None:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _NAME_PATTERN.match(name)
+            if match:
+                st = os.stat(os.path.join(self.directory, name))
+                found.append((st.st_mtime, match.group(1), st.st_size))
+        with self._lock:
+            for _, key, size in sorted(found):
+                self._entries[key] = size
+                self._total_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        # 超出字节预算时至少保留最新的一个文件
+        while len(self._entries) > self.max_files or (
+            self._total_bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get_or_render(self, key: str, render: Callable[[str], None]) -> str:
+        """Return the cached file name for `key`, calling ``render(path)`` on a miss."""
+        while True:
+            with self._lock:
+                if key in self._entries and os.path.exists(self._path(key)):
+                    self._entries.move_to_end(key)
+                    return self.filename(key)
+                pending = self._inflight.get(key)
+                if pending is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # 相同请求正在渲染：等待其完成后重新检查（失败时由本线程接手重试）
+            pending.wait()
+
+        path = self._path(key)
+        tmp_path = f"{path[: -len('.html')]}.{threading.get_ident()}.tmp.html"
+        try:
+            render(tmp_path)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self._entries[key] = size
+                self._total_bytes += size
+                self._evict()
+            return self.filename(key)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
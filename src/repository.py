@@ -1,8 +1,17 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from contextlib import closing
 from dataclasses import dataclass
-from typing import Dict, Mapping
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
 
 from .model import Person
-from .parser import read_family_csv
+from .parser import CsvRowError, iter_family_records, read_family_csv
+from .snapshot import load_snapshot, source_key, write_snapshot
+from .store import PersonStore
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -10,9 +19,316 @@ class CsvFamilyRepository:
     """CSV-backed repository for loading family data."""
 
     path: str
+    snapshot_path: Optional[str] = None
+
+    def __post_init__(self):
+        if self.snapshot_path is None:
+            self.snapshot_path = f"{self.path}.snap"
 
     def load_persons(self) -> Dict[int, Person]:
         return read_family_csv(self.path)
 
+    def load_store(self, *, save_snapshot: bool = True) -> PersonStore:
+        """Load a validated columnar store, preferring the binary snapshot.
+
+        The snapshot lives next to the CSV and is keyed by the CSV's size,
+        mtime and content hash; when it is missing or stale the CSV is parsed
+        with validation fused into the same pass and, unless `save_snapshot`
+        is false, a fresh snapshot is written for the next start.
+        """
+        assert self.snapshot_path is not None
+        store = load_snapshot(self.snapshot_path, self.path)
+        if store is not None:
+            return store
+
+        key = source_key(self.path)
+        persons = read_family_csv(self.path, validate=True)
+        store = PersonStore.from_persons(persons)
+        store.version = key.sha256[:16]
+        if not save_snapshot:
+            return store
+        try:
+            write_snapshot(store, self.snapshot_path, key)
+        except OSError as exc:
+            logger.warning("Could not write snapshot %s: %s", self.snapshot_path, exc)
+        return store
+
+
+_PERSON_COLUMNS = (
+    "id",
+    "parent_id",
+    "wbs",
+    "name",
+    "gender",
+    "birth_year",
+    "death_year",
+    "generation",
+    "clan_name",
+    "location",
+    "note",
+)
+_SELECT_PERSONS = f"SELECT {', '.join(_PERSON_COLUMNS)} FROM persons"
+
+_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    parent_id INTEGER,
+    parent_wbs TEXT,
+    wbs TEXT NOT NULL UNIQUE,
+    depth INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    gender TEXT,
+    birth_year INTEGER,
+    death_year INTEGER,
+    generation INTEGER,
+    clan_name TEXT,
+    location TEXT,
+    note TEXT
+)
+"""
+# `id` 即 rowid，文件（导入）顺序另存于 `seq`
+_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_persons_seq ON persons(seq)",
+    "CREATE INDEX IF NOT EXISTS idx_persons_parent_seq ON persons(parent_id, seq)",
+    "CREATE INDEX IF NOT EXISTS idx_persons_depth ON persons(depth)",
+)
+_INSERT_SQL = (
+    "INSERT INTO {table} (id, seq, parent_wbs, wbs, depth, name, gender, birth_year, "
+    "death_year, generation, clan_name, location, note) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _row_to_person(row: Sequence[Any]) -> Person:
+    return Person(**dict(zip(_PERSON_COLUMNS, row)))
+
+
+def _link(persons: List[Person]) -> List[Person]:
+    """Link children within a query result so it can be walked like a built tree."""
+    by_id = {p.id: p for p in persons}
+    for p in persons:
+        if p.parent_id in by_id:
+            by_id[p.parent_id].children.append(p)
+    return persons
+
+
+@dataclass
+class SqliteFamilyRepository:
+    """SQLite-backed repository answering subtree queries without loading every row.
+
+    WBS codes are stored as materialized paths: the subtree under ``1.3`` is
+    the indexed range ``wbs = '1.3' OR wbs >= '1.3.' AND wbs < '1.3/'``
+    (``'/'`` sorts right after ``'.'``). Ancestor chains use a recursive CTE
+    over the ``parent_id`` index.
+
+    These queries are for callers using the repository directly.
+    `FamilyTreeService` does not issue them: `load_store` reads the whole
+    family (or, with `branch`, the whole subtree under that WBS code) into
+    memory, so when serving datasets this backend only provides import and
+    storage.
+    """
+
+    path: str
+    branch: Optional[str] = None
+
+    def __post_init__(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_TABLE_SQL.format(table="persons"))
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(persons)")}
+            if "seq" not in columns:
+                # 早期数据库没有 seq 列，以 rowid 补齐
+                conn.execute("ALTER TABLE persons ADD COLUMN seq INTEGER")
+                conn.execute("UPDATE persons SET seq = rowid")
+            for statement in _INDEX_SQL:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次调用使用独立连接，便于在 Web 多线程中共享仓库对象
+        return sqlite3.connect(self.path)
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Person]:
+        with closing(self._connect()) as conn:
+            return [_row_to_person(row) for row in conn.execute(sql, tuple(params))]
+
+    def import_csv(self, csv_path: str, batch_size: int = 10_000) -> int:
+        """Bulk-load a family CSV, replacing the current contents.
+
+        Rows are inserted into a staging table in batches of `batch_size`, one
+        transaction per batch; parent resolution and consistency checks then
+        run in SQL, and the staging table replaces ``persons`` atomically.
+        Raises the same ``ValueError`` messages as the CSV parser and
+        `validate_family`.
+        """
+        insert = _INSERT_SQL.format(table="persons_import")
+        total = 0
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS persons_import")
+                conn.execute(_TABLE_SQL.format(table="persons_import"))
+
+            batch: List[tuple] = []
+            linenos: List[int] = []
+            for seq, (lineno, record) in enumerate(iter_family_records(csv_path)):
+                pid, wbs = record[0], record[1]
+                parent_wbs = wbs.rpartition(".")[0] or None
+                batch.append((pid, seq, parent_wbs, wbs, len(record[10])) + record[2:10])
+                linenos.append(lineno)
+                if len(batch) >= batch_size:
+                    total += self._insert_batch(conn, insert, batch, linenos)
+                    batch, linenos = [], []
+            if batch:
+                total += self._insert_batch(conn, insert, batch, linenos)
+
+            with conn:
+                conn.execute(
+                    "UPDATE persons_import SET parent_id = (SELECT p.id FROM persons_import p "
+                    "WHERE p.wbs = persons_import.parent_wbs) WHERE parent_wbs IS NOT NULL"
+                )
+                self._check_imported(conn)
+                conn.execute("DROP TABLE persons")
+                conn.execute("ALTER TABLE persons_import RENAME TO persons")
+                for statement in _INDEX_SQL:
+                    conn.execute(statement)
+        return total
+
+    @staticmethod
+    def _insert_batch(
+        conn: sqlite3.Connection, insert: str, batch: List[tuple], linenos: List[int]
+    ) -> int:
+        try:
+            with conn:
+                conn.executemany(insert, batch)
+        except sqlite3.IntegrityError:
+            # 批量失败时逐行重放以定位重复的行号
+            with conn:
+                for row, lineno in zip(batch, linenos):
+                    try:
+                        conn.execute(insert, row)
+                    except sqlite3.IntegrityError:
+                        pid, wbs = row[0], row[3]
+                        dup_wbs = conn.execute(
+                            "SELECT 1 FROM persons_import WHERE wbs = ?", (wbs,)
+                        ).fetchone()
+                        detail = f"duplicated wbs {wbs}" if dup_wbs else f"duplicated id {pid}"
+                        raise CsvRowError(lineno, detail) from None
+        return len(batch)
+
+    @staticmethod
+    def _check_imported(conn: sqlite3.Connection) -> None:
+        orphan = conn.execute(
+            "SELECT name, wbs, parent_wbs FROM persons_import "
+            "WHERE parent_wbs IS NOT NULL AND parent_id IS NULL LIMIT 1"
+        ).fetchone()
+        if orphan:
+            name, wbs, parent_wbs = orphan
+            raise ValueError(f"Person {name} (wbs={wbs}): parent wbs {parent_wbs} not found")
+
+        mismatch = conn.execute(
+            "SELECT name, generation, wbs FROM persons_import "
+            "WHERE generation IS NOT NULL AND generation != depth LIMIT 1"
+        ).fetchone()
+        if mismatch:
+            name, generation, wbs = mismatch
+            raise ValueError(
+                f"Generation mismatch for {name}: generation={generation}, wbs={wbs}"
+            )
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM persons").fetchone()[0]
+
+    def load_persons(self) -> Dict[int, Person]:
+        return {p.id: p for p in self._query(f"{_SELECT_PERSONS} ORDER BY seq")}
+
+    def load_store(self) -> PersonStore:
+        """Load the family (or `branch`) into a columnar store, in CSV file order.
+
+        Every selected row is held in the returned store. The branch is read
+        with the same indexed range scan as `subtree` and its root becomes a
+        root of the store. The store version is derived
+        from the database file's size and mtime plus the branch.
+        """
+        sql = f"{_SELECT_PERSONS} ORDER BY seq"
+        params: List[Any] = []
+        if self.branch is not None:
+            root = self.find_by_wbs(self.branch)
+            sql = f"{_SELECT_PERSONS} WHERE wbs = ? OR (wbs >= ? AND wbs < ?) ORDER BY seq"
+            params = [root.wbs, root.wbs + ".", root.wbs + "/"]
+        persons = {p.id: p for p in self._query(sql, params)}
+        if self.branch is not None:
+            persons[root.id].parent_id = None
+        st = os.stat(self.path)
+        store = PersonStore.from_persons(persons)
+        tag = f"{st.st_size}:{st.st_mtime_ns}:{self.branch or ''}"
+        store.version = hashlib.sha256(tag.encode("utf-8")).hexdigest()[:16]
+        return store
+
+    def get(self, pid: int) -> Person:
+        found = self._query(f"{_SELECT_PERSONS} WHERE id = ?", (pid,))
+        if not found:
+            raise ValueError(f"root_id not found: {pid}")
+        return found[0]
+
+    def find_by_wbs(self, wbs: str) -> Person:
+        found = self._query(f"{_SELECT_PERSONS} WHERE wbs = ?", (wbs,))
+        if not found:
+            raise ValueError(f"WBS not found: {wbs}")
+        return found[0]
+
+    def children(self, parent_id: int) -> List[Person]:
+        return self._query(f"{_SELECT_PERSONS} WHERE parent_id = ? ORDER BY seq", (parent_id,))
+
+    def ancestors(self, pid: int) -> List[Person]:
+        """Return the ancestor chain of `pid`, nearest first."""
+        sql = f"""
+            WITH RECURSIVE chain(id, hops) AS (
+                SELECT parent_id, 1 FROM persons WHERE id = ? AND parent_id IS NOT NULL
+                UNION ALL
+                SELECT p.parent_id, chain.hops + 1 FROM persons p JOIN chain ON p.id = chain.id
+                WHERE p.parent_id IS NOT NULL
+            )
+            SELECT {", ".join("persons." + c for c in _PERSON_COLUMNS)}
+            FROM chain JOIN persons ON persons.id = chain.id ORDER BY chain.hops
+        """
+        return self._query(sql, (pid,))
+
+    def subtree(
+        self,
+        *,
+        root_id: Optional[int] = None,
+        root_wbs: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        gen_min: Optional[int] = None,
+        gen_max: Optional[int] = None,
+    ) -> List[Person]:
+        """Same contract as `filter_subtree`, answered with one indexed range scan.
+
+        Results are in preorder (numeric WBS order) with children linked among
+        the returned persons.
+        """
+        if root_wbs is not None:
+            root = self.find_by_wbs(root_wbs)
+        elif root_id is not None:
+            root = self.get(root_id)
+        else:
+            raise ValueError("Either root_id or root_wbs must be provided")
+
+        clauses = ["(wbs = ? OR (wbs >= ? AND wbs < ?))"]
+        params: List[Any] = [root.wbs, root.wbs + ".", root.wbs + "/"]
+        if max_depth is not None:
+            clauses.append("depth <= ?")
+            params.append(root.depth + max_depth)
+        if gen_min is not None:
+            clauses.append("COALESCE(generation, depth) >= ?")
+            params.append(gen_min)
+        if gen_max is not None:
+            clauses.append("COALESCE(generation, depth) <= ?")
+            params.append(gen_max)
+
+        found = self._query(f"{_SELECT_PERSONS} WHERE {' AND '.join(clauses)}", params)
+        found.sort(key=lambda p: p.wbs_path)
+        return _link(found)
+
 
 FamilyRepository = Mapping[int, Person]
@@ -0,0 +1,187 @@
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .model import Person
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - optional dependency
+    lazy_pinyin = None
+
+SEARCH_FIELDS = ("name", "clan_name", "location", "note")
+
+# 命中类型，按排序优先级排列
+MATCH_KINDS = ("wbs", "exact", "prefix", "pinyin", "ngram")
+
+
+@dataclass
+class SearchHit:
+    person_id: int
+    match: str
+
+
+def _grams(text: str) -> Set[str]:
+    """Character unigrams and bigrams of `text` (lower-cased)."""
+    text = text.lower()
+    grams = set(text)
+    grams.update(text[i : i + 2] for i in range(len(text) - 1))
+    grams.discard(" ")
+    return grams
+
+
+def _pinyin_keys(name: str) -> Tuple[str, ...]:
+    if lazy_pinyin is None:
+        return ()
+    full = "".join(lazy_pinyin(name)).lower()
+    initials = "".join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+    return (full, initials) if initials != full else (full,)
+
+
+@dataclass
+class SearchIndex:
+    """In-memory person search built once per data version.
+
+    Documents are numbered in build order, so every posting list is sorted by
+    construction and stored as a compact ``array``. Lookups run in tiers —
+    exact WBS, exact name, name prefix, pinyin prefix, then character n-grams
+    over `SEARCH_FIELDS` — and stop as soon as `limit` hits are collected, so
+    cost depends on the result size rather than the population. Pinyin keys
+    are only indexed when the optional ``pypinyin`` package is installed.
+    """
+
+    ids: "array[int]" = field(default_factory=lambda: array("q"))
+    wbs_to_doc: Dict[str, int] = field(default_factory=dict)
+    name_to_docs: Dict[str, List[int]] = field(default_factory=dict)
+    prefix_keys: List[str] = field(default_factory=list)
+    prefix_docs: "array[int]" = field(default_factory=lambda: array("q"))
+    pinyin_keys: List[str] = field(default_factory=list)
+    pinyin_docs: "array[int]" = field(default_factory=lambda: array("q"))
+    postings: Dict[str, "array[int]"] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, persons: Mapping[int, Person]) -> "SearchIndex":
+        index = cls()
+        names: List[Tuple[str, int]] = []
+        pinyin: List[Tuple[str, int]] = []
+        postings: Dict[str, List[int]] = {}
+        for doc, person in enumerate(persons.values()):
+            index.ids.append(person.id)
+            index.wbs_to_doc[person.wbs] = doc
+            name = person.name.lower()
+            index.name_to_docs.setdefault(name, []).append(doc)
+            names.append((name, doc))
+            pinyin.extend((key, doc) for key in _pinyin_keys(person.name))
+
+            grams: Set[str] = set()
+            for name_of_field in SEARCH_FIELDS:
+                value = getattr(person, name_of_field)
+                if value:
+                    grams |= _grams(value)
+            for gram in grams:
+                postings.setdefault(gram, []).append(doc)
+
+        names.sort()
+        pinyin.sort()
+        index.prefix_keys = [key for key, _ in names]
+        index.prefix_docs = array("q", (doc for _, doc in names))
+        index.pinyin_keys = [key for key, _ in pinyin]
+        index.pinyin_docs = array("q", (doc for _, doc in pinyin))
+        index.postings = {gram: array("q", docs) for gram, docs in postings.items()}
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _prefix_range(keys: List[str], docs: "array[int]", prefix: str) -> Iterator[int]:
+        pos = bisect_left(keys, prefix)
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            yield docs[pos]
+            pos += 1
+
+    def _ngram_docs(self, query: str) -> Iterator[int]:
+        grams = [query[i : i + 2] for i in range(len(query) - 1)] or [query]
+        lists = [self.postings.get(gram) for gram in grams]
+        if any(docs is None for docs in lists):
+            return
+        lists.sort(key=len)  # type: ignore[arg-type]
+        shortest, others = lists[0], lists[1:]
+        for doc in shortest:  # type: ignore[union-attr]
+            if all(_contains(docs, doc) for docs in others):  # type: ignore[arg-type]
+                yield doc
+
+    def iter_hits(self, query: str) -> Iterator[SearchHit]:
+        """Yield hits for `query` lazily, best match kinds first, without duplicates.
+
+        N-gram candidates for queries longer than two characters are a
+        superset (all bigrams present); callers that need exact substring
+        semantics verify against the person's fields.
+        """
+        query = query.strip().lower()
+        if not query:
+            return
+        seen: Set[int] = set()
+        wbs_doc = self.wbs_to_doc.get(query)
+        tiers = (
+            ([] if wbs_doc is None else [wbs_doc], "wbs"),
+            (self.name_to_docs.get(query, ()), "exact"),
+            (self._prefix_range(self.prefix_keys, self.prefix_docs, query), "prefix"),
+            (self._prefix_range(self.pinyin_keys, self.pinyin_docs, query), "pinyin"),
+            (self._ngram_docs(query), "ngram"),
+        )
+        for docs, kind in tiers:
+            for doc in docs:
+                if doc in seen:
+                    continue
+                seen.add(doc)
+                yield SearchHit(self.ids[doc], kind)
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Return up to `limit` hits for `query`, best match kinds first (see `iter_hits`)."""
+        if limit <= 0:
+            return []
+        return list(islice(self.iter_hits(query), limit))
+
+
+def _contains(docs: "array[int]", doc: int) -> bool:
+    pos = bisect_left(docs, doc)
+    return pos < len(docs) and docs[pos] == doc
+
+
+def search_persons(
+    persons: Mapping[int, Person], index: SearchIndex, query: str, limit: int = 10
+) -> List[Dict[str, object]]:
+    """Search and return display records; n-gram hits are checked as substrings."""
+    needle = query.strip().lower()
+    results: List[Dict[str, object]] = []
+    if limit <= 0:
+        return results
+    # n-gram 候选可能多于真实命中，惰性取候选并逐条核对，直到凑满 limit 或候选耗尽
+    for hit in index.iter_hits(query):
+        person = persons[hit.person_id]
+        if hit.match == "ngram" and not _field_contains(person, needle):
+            continue
+        results.append(
+            {
+                "id": person.id,
+                "wbs": person.wbs,
+                "name": person.name,
+                "generation": person.generation or person.depth,
+                "location": person.location,
+                "match": hit.match,
+            }
+        )
+        if len(results) == limit:
+            break
+    return results
+
+
+def _field_contains(person: Person, needle: str) -> bool:
+    for name in SEARCH_FIELDS:
+        value: Optional[str] = getattr(person, name)
+        if value and needle in value.lower():
+            return True
+    return False
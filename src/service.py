@@ -1,23 +1,91 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Mapping, Optional
+import threading
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 
-from .filter import filter_subtree
-from .migration import build_migration_timeline
+from .filter import filter_subtree, find_by_wbs, resolve_root
+from .index import FamilyIndex
+from .kinship import Kinship, KinshipEngine
+from .lineage import LineageSystem
+from .metrics import timed
+from .migration import MigrationTimeline, TimelinePage
 from .model import Person
+from .search import SearchIndex, search_persons
+from .stats import DEFAULT_TOP_LOCATIONS, FamilyStats
+from .store import PersonStore, PersonView
+from .traversal import iter_preorder, iter_subtree, page_subtree, parse_cursor
 from .tree import build_tree
 from .validate import validate_family
 
 
 @dataclass
 class FamilyTreeService:
-    persons: Dict[int, Person]
+    persons: Mapping[int, Person]
+    index: FamilyIndex = field(default_factory=FamilyIndex)
+    data_version: str = ""
+    # 时间轴与搜索索引在首次使用时构建（见 `timeline`/`search_index`），可由热加载预先传入
+    _timeline: Optional[MigrationTimeline] = field(default=None, repr=False, compare=False)
+    _search_index: Optional[SearchIndex] = field(default=None, repr=False, compare=False)
+    # 统计列在首次查询时构建，随快照（数据版本）一同替换
+    _stats: Optional[FamilyStats] = field(default=None, init=False, repr=False, compare=False)
+    _build_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
 
     @classmethod
-    def from_persons(cls, persons: Mapping[int, Person]) -> "FamilyTreeService":
+    def from_persons(
+        cls, persons: Mapping[int, Person], *, validated: bool = False
+    ) -> "FamilyTreeService":
+        """Link and index `persons`; pass ``validated=True`` after a validating parse."""
         loaded = dict(persons)
-        validate_family(loaded)
+        if not validated:
+            validate_family(loaded)
         build_tree(loaded)
-        return cls(persons=loaded)
+        return cls(persons=loaded, index=FamilyIndex.build(loaded))
+
+    @classmethod
+    def from_store(cls, store: PersonStore, *, validated: bool = False) -> "FamilyTreeService":
+        """Serve directly from a columnar store; children come from its CSR arrays.
+
+        The index is array-backed (`FamilyIndex.from_store`) and persons iterate
+        in source order, as with `from_persons`. Pass ``validated=True`` for
+        stores loaded from a snapshot, whose records were already validated
+        when it was written.
+        """
+        persons = cast(Mapping[int, Person], store)
+        if not validated:
+            validate_family(persons)
+        return cls(persons=persons, index=FamilyIndex.from_store(store), data_version=store.version)
+
+    @property
+    def timeline(self) -> MigrationTimeline:
+        """Migration timeline, built on first use."""
+        if self._timeline is None:
+            with self._build_lock:
+                if self._timeline is None:
+                    self._timeline = MigrationTimeline.build(self.persons)
+        return self._timeline
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Search index, built on first use."""
+        if self._search_index is None:
+            with self._build_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex.build(self.persons)
+        return self._search_index
 
     def roots(self) -> List[Person]:
         return [p for p in self.persons.values() if p.parent_id is None]
@@ -28,6 +96,9 @@ class FamilyTreeService:
             raise RuntimeError("No root person found in data")
         return root
 
+    def find_by_wbs(self, wbs: str) -> Person:
+        return find_by_wbs(self.persons, wbs, self.index)
+
     def subtree(
         self,
         *,
@@ -44,11 +115,63 @@ class FamilyTreeService:
             max_depth=max_depth,
             gen_min=gen_min,
             gen_max=gen_max,
+            index=self.index,
         )
 
+    def iter_subtree(
+        self,
+        *,
+        root_id: Optional[int] = None,
+        root_wbs: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        gen_min: Optional[int] = None,
+        gen_max: Optional[int] = None,
+        order: str = "dfs",
+        max_nodes: Optional[int] = None,
+    ) -> Iterator[Person]:
+        """Stream subtree members in DFS or BFS order, stopping after `max_nodes`."""
+        root = resolve_root(self.persons, root_id=root_id, root_wbs=root_wbs, index=self.index)
+        if order != "dfs":
+            return iter_subtree(
+                root,
+                max_depth=max_depth,
+                gen_min=gen_min,
+                gen_max=gen_max,
+                order=order,
+                max_nodes=max_nodes,
+            )
+        scan = iter_preorder(
+            self.persons, self.index, root, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max
+        )
+        nodes = (node for _, node in scan)
+        return nodes if max_nodes is None else islice(nodes, max(max_nodes, 0))
+
     def migration_timeline(self) -> Dict[int, List[Dict[str, str]]]:
-        return build_migration_timeline(self.persons)
+        return self.timeline.as_dict()
 
+    def timeline_page(
+        self,
+        *,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+        location: Optional[str] = None,
+        root_wbs: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> TimelinePage:
+        """Query the precomputed timeline, optionally scoped to one subtree."""
+        root_id = self.index.id_for_wbs(root_wbs) if root_wbs else None
+        return self.timeline.query(
+            year_min=year_min,
+            year_max=year_max,
+            location=location,
+            index=self.index if root_id is not None else None,
+            root_id=root_id,
+            offset=offset,
+            limit=limit,
+        )
+
+    @timed("subtree_payload")
     def subtree_payload(
         self,
         *,
@@ -57,34 +180,170 @@ class FamilyTreeService:
         max_depth: Optional[int] = None,
         gen_min: Optional[int] = None,
         gen_max: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order: str = "dfs",
+        lineage: Optional[LineageSystem] = None,
     ) -> Dict[str, Any]:
-        nodes = self.subtree(
-            root_id=root_id,
-            root_wbs=root_wbs,
-            max_depth=max_depth,
-            gen_min=gen_min,
-            gen_max=gen_max,
-        )
-        node_ids = {p.id for p in nodes}
-        edges = [
-            {"from": p.parent_id, "to": p.id}
-            for p in nodes
-            if p.parent_id is not None and p.parent_id in node_ids
-        ]
+        """Build the JSON payload for a subtree, optionally one page at a time.
+
+        With `limit`, at most `limit` nodes are returned together with a
+        `next_cursor` (``None`` on the last page) to pass back as `cursor`.
+        With `lineage`, nodes also carry the generation-annotated
+        ``display_name``.
+        """
+        root = resolve_root(self.persons, root_id=root_id, root_wbs=root_wbs, index=self.index)
+        next_cursor = None
+        nodes: Iterable[Person]
+        if limit is not None:
+            page = page_subtree(
+                self.persons,
+                root,
+                limit=limit,
+                cursor=cursor,
+                order=order,
+                index=self.index,
+                max_depth=max_depth,
+                gen_min=gen_min,
+                gen_max=gen_max,
+            )
+            nodes, next_cursor = page.nodes, page.next_cursor
+        else:
+            nodes = self.iter_subtree(
+                root_id=root.id, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max, order=order
+            )
+
+        members: List[Person] = []
+        node_payload: List[Dict[str, Any]] = []
+        edges: List[Dict[str, int]] = []
+        for p in nodes:
+            members.append(p)
+            node_payload.append(_node_payload(p))
+            # 父节点先于子节点遍历；父节点未被 gen_min 过滤时才连边，分页时可跨页连边
+            if p.id != root.id and p.parent_id is not None:
+                parent = self.persons[p.parent_id]
+                if gen_min is None or (parent.generation or parent.depth) >= gen_min:
+                    edges.append({"from": p.parent_id, "to": p.id})
+
+        if lineage is not None:
+            names = lineage.annotate_batch(members, self.data_version)
+            for node, name in zip(node_payload, names):
+                node["display_name"] = name
+
+        payload: Dict[str, Any] = {"nodes": node_payload, "edges": edges}
+        if limit is not None:
+            payload["next_cursor"] = next_cursor
+        return payload
+
+    def children_page(
+        self,
+        wbs: str,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        formatter: Optional[Callable[[Person], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of the direct children of `wbs` for lazy expansion.
+
+        Each child carries its descendant count (from the index's Euler-tour
+        intervals, so O(1) per child) and a `has_children` flag. The cursor is
+        the position of the next child to return. `formatter` replaces the
+        default node dict (e.g. with a graph node for lazy rendering).
+        """
+        formatter = formatter or _node_payload
+        parent = self.find_by_wbs(wbs)
+        start = parse_cursor(cursor, "c") if cursor else 0
+        page: Sequence[Person]
+        if isinstance(parent, PersonView):
+            # 列式存储：只为本页切片 CSR 子节点区间，不构造全部子节点视图
+            total = parent.child_count
+            page = parent.children_slice(start, start + limit)
+        else:
+            total = len(parent.children)
+            page = parent.children[start : start + limit]
+        if start > total:
+            raise ValueError(f"cursor out of range: {cursor!r}")
+        nodes = []
+        for child in page:
+            descendants = self.index.subtree_size(child.id) - 1
+            node = formatter(child)
+            node["wbs"] = child.wbs
+            node["descendant_count"] = descendants
+            node["has_children"] = descendants > 0
+            nodes.append(node)
+        end = start + limit
         return {
-            "nodes": [
-                {
-                    "id": p.id,
-                    "parent_id": p.parent_id,
-                    "wbs": p.wbs,
-                    "name": p.name,
-                    "generation": p.generation or p.depth,
-                    "birth_year": p.birth_year,
-                    "death_year": p.death_year,
-                    "location": p.location,
-                    "note": p.note,
-                }
-                for p in nodes
-            ],
-            "edges": edges,
+            "parent": _node_payload(parent),
+            "total": total,
+            "nodes": nodes,
+            "next_cursor": f"c{end}" if end < total else None,
         }
+
+    def search(
+        self, query: str, limit: int = 10, *, lineage: Optional[LineageSystem] = None
+    ) -> List[Dict[str, Any]]:
+        """Ranked autocomplete over WBS, names, pinyin and field n-grams.
+
+        With `lineage`, results also carry the annotated ``display_name``.
+        """
+        results = search_persons(self.persons, self.search_index, query, limit)
+        if lineage is not None:
+            members = [self.persons[cast(int, r["id"])] for r in results]
+            for result, name in zip(results, lineage.annotate_batch(members, self.data_version)):
+                result["display_name"] = name
+        return results
+
+    def stats(
+        self, root_wbs: Optional[str] = None, *, top_locations: int = DEFAULT_TOP_LOCATIONS
+    ) -> Dict[str, Any]:
+        """Demographic aggregates for the family or one branch, memoized per snapshot."""
+        if self._stats is None:
+            with self._build_lock:
+                if self._stats is None:
+                    self._stats = FamilyStats(self.persons, self.index)
+        return self._stats.summary(root_wbs, top_locations=top_locations)
+
+    def kinship(self, a_wbs: str, b_wbs: str) -> Kinship:
+        """How the person at `b_wbs` is related to the person at `a_wbs`."""
+        engine = KinshipEngine(self.persons, self.index)
+        return engine.relate(self.find_by_wbs(a_wbs), self.find_by_wbs(b_wbs))
+
+    def kinship_batch(self, pairs: Sequence[Sequence[str]]) -> List[Dict[str, Any]]:
+        """Relate many WBS pairs in one call.
+
+        Each pair costs one common-prefix scan; repeated pairs are answered
+        from a per-call memo. A malformed pair or unknown code yields an
+        ``{"error": ...}`` entry in place instead of failing the batch.
+        """
+        engine = KinshipEngine(self.persons, self.index)
+        wbs_to_id = self.index.wbs_to_id
+        memo: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        results: List[Dict[str, Any]] = []
+        for pair in pairs:
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                results.append({"error": f"pair must be two WBS codes, got {pair!r}"})
+                continue
+            key = (str(pair[0]), str(pair[1]))
+            if key not in memo:
+                missing = next((w for w in key if w not in wbs_to_id), None)
+                if missing is not None:
+                    memo[key] = {"a": key[0], "b": key[1], "error": f"WBS not found: {missing}"}
+                else:
+                    a, b = (self.persons[wbs_to_id[w]] for w in key)
+                    memo[key] = engine.relate(a, b).as_dict()
+            results.append(memo[key])
+        return results
+
+
+def _node_payload(p: Person) -> Dict[str, Any]:
+    return {
+        "id": p.id,
+        "parent_id": p.parent_id,
+        "wbs": p.wbs,
+        "name": p.name,
+        "generation": p.generation or p.depth,
+        "birth_year": p.birth_year,
+        "death_year": p.death_year,
+        "location": p.location,
+        "note": p.note,
+    }
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from .store import PersonStore, StringTable
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PFTSNAP\0"
+FORMAT_VERSION = 4
+_PREFIX = struct.Struct("<8sII")  # magic, format version, header length
+_ALIGN = 8
+
+_ARRAY_COLUMNS = (
+    "ids",
+    "parent_ids",
+    "birth_years",
+    "death_years",
+    "generations",
+    "depths",
+    "name_codes",
+    "gender_codes",
+    "clan_codes",
+    "location_codes",
+    "note_codes",
+    "wbs_offsets",
+    "path_segments",
+    "path_offsets",
+    "child_offsets",
+    "child_rows",
+    "file_rows",
+    "string_offsets",
+)
+# 长度等于行数的列；wbs_offsets/path_offsets/child_offsets 为行数 + 1
+_ROW_COLUMNS = (
+    "ids",
+    "parent_ids",
+    "birth_years",
+    "death_years",
+    "generations",
+    "depths",
+    "name_codes",
+    "gender_codes",
+    "clan_codes",
+    "location_codes",
+    "note_codes",
+    "file_rows",
+)
+_BLOB_COLUMNS = ("wbs_blob", "strings")
+_ITEM_SIZES = {code: array(code).itemsize for code in "bBhHiIlLqQ"}
+
+
+@dataclass(frozen=True)
+class SourceKey:
+    """Identity of the CSV a snapshot was built from."""
+
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_key(path: str) -> SourceKey:
+    st = os.stat(path)
+    return SourceKey(size=st.st_size, mtime_ns=st.st_mtime_ns, sha256=_file_sha256(path))
+
+
+def _pad(offset: int) -> int:
+    return (-offset) % _ALIGN
+
+
+def write_snapshot(store: PersonStore, path: str, key: SourceKey) -> None:
+    """Write `store` atomically as a memory-mappable snapshot keyed by `key`."""
+    blobs: Dict[str, bytes] = {}
+    typecodes: Dict[str, str] = {}
+    # 字符串表按字符偏移存放，取值可含任意字符（包括 NUL）
+    string_offsets = array("q", [0])
+    for value in store.strings.values:
+        string_offsets.append(string_offsets[-1] + len(value))
+    for name in _ARRAY_COLUMNS:
+        column = string_offsets if name == "string_offsets" else getattr(store, name)
+        typecodes[name] = column.typecode if isinstance(column, array) else column.format
+        blobs[name] = bytes(column)
+    blobs["wbs_blob"] = bytes(store.wbs_blob)
+    blobs["strings"] = "".join(store.strings.values).encode("utf-8")
+
+    layout: Dict[str, Any] = {}
+    offset = 0
+    for name, blob in blobs.items():
+        layout[name] = [typecodes.get(name, "B"), offset, len(blob)]
+        offset += len(blob) + _pad(len(blob))
+
+    header = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "source": asdict(key),
+            "rows": len(store),
+            "string_count": len(store.strings.values),
+            "layout": layout,
+        }
+    ).encode("utf-8")
+    prefix = _PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)) + header
+    prefix += b"\0" * _pad(len(prefix))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for blob in blobs.values():
+            f.write(blob)
+            f.write(b"\0" * _pad(len(blob)))
+    os.replace(tmp_path, path)
+
+
+def _is_count(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _read_header(mm: mmap.mmap) -> Optional[Dict[str, Any]]:
+    """Parse the header and check that every column fits the file and the row count.
+
+    Returns ``None`` for anything that is not a complete snapshot of this
+    format (wrong magic or version, truncated file, inconsistent layout).
+    """
+    if len(mm) < _PREFIX.size:
+        return None
+    magic, version, header_len = _PREFIX.unpack_from(mm, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    start = _PREFIX.size + header_len
+    if start > len(mm):
+        return None
+    try:
+        header = json.loads(bytes(mm[_PREFIX.size : start]))
+        header["source"] = SourceKey(**header["source"])
+    except (ValueError, TypeError, KeyError):
+        return None
+    if header.get("byteorder") != sys.byteorder:
+        return None
+
+    rows, string_count = header.get("rows"), header.get("string_count")
+    layout = header.get("layout")
+    if not (_is_count(rows) and _is_count(string_count) and isinstance(layout, dict)):
+        return None
+    if set(layout) != set(_ARRAY_COLUMNS) | set(_BLOB_COLUMNS):
+        return None
+    counts = dict.fromkeys(_ROW_COLUMNS, rows)
+    counts.update(
+        wbs_offsets=rows + 1,
+        path_offsets=rows + 1,
+        child_offsets=rows + 1,
+        string_offsets=string_count + 1,
+    )
+
+    data_start = start + _pad(start)
+    for name, spec in layout.items():
+        if not (isinstance(spec, list) and len(spec) == 3):
+            return None
+        typecode, offset, length = spec
+        itemsize = 1 if name in _BLOB_COLUMNS else _ITEM_SIZES.get(typecode)
+        if itemsize is None or not (_is_count(offset) and _is_count(length)):
+            return None
+        if data_start + offset + length > len(mm) or length % itemsize:
+            return None
+        if name in counts and length != counts[name] * itemsize:
+            return None
+    header["data_start"] = data_start
+    return header
+
+
+def _key_matches(stored: SourceKey, csv_path: str) -> bool:
+    st = os.stat(csv_path)
+    if stored.size != st.st_size:
+        return False
+    if stored.mtime_ns == st.st_mtime_ns:
+        return True
+    # 仅修改时间变化（如 touch）时再比对内容哈希
+    return stored.sha256 == _file_sha256(csv_path)
+
+
+def load_snapshot(path: str, csv_path: str) -> Optional[PersonStore]:
+    """Memory-map a snapshot; return ``None`` if missing, stale, incompatible or damaged.
+
+    Numeric columns are zero-copy views into the mapping, which stays open for
+    as long as the returned store is alive.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header = _read_header(mm)
+    if header is None:
+        logger.warning("Ignoring unreadable snapshot %s", path)
+        mm.close()
+        return None
+    if not _key_matches(header["source"], csv_path):
+        mm.close()
+        return None
+
+    base = header["data_start"]
+    data = memoryview(mm)
+    columns: Dict[str, Any] = {}
+    for name, (typecode, offset, length) in header["layout"].items():
+        view = data[base + offset : base + offset + length]
+        columns[name] = view.cast(typecode) if name in _ARRAY_COLUMNS else view
+
+    string_offsets = columns.pop("string_offsets")
+    try:
+        text = bytes(columns.pop("strings")).decode("utf-8")
+    except UnicodeDecodeError:
+        text = None
+    # 偏移须与数据块长度吻合；否则视为损坏（映射随视图一同被回收）
+    if (
+        text is None
+        or string_offsets[-1] != len(text)
+        or columns["wbs_offsets"][-1] != len(columns["wbs_blob"])
+        or columns["path_offsets"][-1] != len(columns["path_segments"])
+        or columns["child_offsets"][-1] != len(columns["child_rows"])
+    ):
+        logger.warning("Ignoring damaged snapshot %s", path)
+        return None
+    strings = [
+        text[string_offsets[i] : string_offsets[i + 1]] for i in range(len(string_offsets) - 1)
+    ]
+    return PersonStore(
+        strings=StringTable(strings), version=header["source"].sha256[:16], **columns
+    )
@@ -0,0 +1,277 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .index import FamilyIndex
+from .model import Person
+
+try:
+    import numpy as np
+
+    HAVE_NUMPY = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAVE_NUMPY = False
+
+# 列中缺失年份的占位值
+MISSING = -1
+# 性别编码
+GENDER_CODES = {"M": 1, "F": 2}
+STATS_CACHE_SIZE = 128
+DEFAULT_TOP_LOCATIONS = 10
+
+# (births, deaths, generations, genders, locations, location_names, top) -> 聚合结果
+Aggregator = Callable[[Any, Any, Any, Any, Any, List[str], int], Dict[str, Any]]
+
+
+def _ratio(male: int, female: int) -> Optional[float]:
+    return round(male / female, 3) if female else None
+
+
+def _mean(total: float, count: int) -> Optional[float]:
+    return round(total / count, 1) if count else None
+
+
+class FamilyStats:
+    """Demographic aggregates over columns laid out in `FamilyIndex` preorder.
+
+    Birth/death year, generation, gender and location code are loaded once
+    into parallel columns (NumPy arrays when installed, ``array`` otherwise).
+    Because every subtree is a contiguous preorder range, scoping to a branch
+    is a slice, and each aggregate is a handful of vectorized passes over it.
+    Results are memoized per (root, options); a `FamilyStats` belongs to one
+    service snapshot, so the memo is per data version.
+    """
+
+    def __init__(self, persons: Mapping[int, Person], index: FamilyIndex):
+        self.index = index
+        births = array("q")
+        deaths = array("q")
+        generations = array("q")
+        genders = array("b")
+        locations = array("q")
+        location_codes: Dict[str, int] = {}
+        for pid in index.preorder:
+            p = persons[pid]
+            births.append(MISSING if p.birth_year is None else p.birth_year)
+            deaths.append(MISSING if p.death_year is None else p.death_year)
+            generations.append(p.generation or p.depth)
+            genders.append(GENDER_CODES.get(p.gender or "", 0))
+            code = MISSING
+            if p.location:
+                code = location_codes.setdefault(p.location, len(location_codes))
+            locations.append(code)
+        self.location_names = list(location_codes)
+        if HAVE_NUMPY:
+            self.columns: Tuple[Any, ...] = tuple(
+                np.frombuffer(col, dtype=np.int64 if col.typecode == "q" else np.int8)
+                for col in (births, deaths, generations, genders, locations)
+            )
+        else:
+            self.columns = (births, deaths, generations, genders, locations)
+        self._cache: "OrderedDict[Tuple[Optional[str], int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index.preorder)
+
+    def summary(
+        self, root_wbs: Optional[str] = None, *, top_locations: int = DEFAULT_TOP_LOCATIONS
+    ) -> Dict[str, Any]:
+        """Aggregates for the whole family, or the subtree of `root_wbs`."""
+        key = (root_wbs, top_locations)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        if root_wbs is None:
+            lo, hi = 0, len(self)
+        else:
+            root_id = self.index.id_for_wbs(root_wbs)
+            lo, hi = self.index.entry[root_id], self.index.exit[root_id]
+        births, deaths, generations, genders, locations = (col[lo:hi] for col in self.columns)
+        aggregate: Aggregator = _aggregate_numpy if HAVE_NUMPY else _aggregate_python
+        result: Dict[str, Any] = {"root": root_wbs, "total": hi - lo}
+        result.update(
+            aggregate(
+                births, deaths, generations, genders, locations, self.location_names, top_locations
+            )
+        )
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > STATS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+
+def _aggregate_numpy(
+    births: Any,
+    deaths: Any,
+    generations: Any,
+    genders: Any,
+    locations: Any,
+    names: List[str],
+    top: int,
+) -> Dict[str, Any]:
+    male = int(np.count_nonzero(genders == 1))
+    female = int(np.count_nonzero(genders == 2))
+    has_span = (births != MISSING) & (deaths != MISSING) & (deaths >= births)
+    spans = (deaths - births)[has_span]
+
+    gen_count = np.bincount(generations)
+    gen_male = np.bincount(generations, weights=genders == 1, minlength=len(gen_count))
+    gen_female = np.bincount(generations, weights=genders == 2, minlength=len(gen_count))
+    gen_span_n = np.bincount(generations[has_span], minlength=len(gen_count))
+    gen_span_sum = np.bincount(generations[has_span], weights=spans, minlength=len(gen_count))
+    by_generation = [
+        {
+            "generation": int(g),
+            "count": int(gen_count[g]),
+            "male": int(gen_male[g]),
+            "female": int(gen_female[g]),
+            "avg_lifespan": _mean(float(gen_span_sum[g]), int(gen_span_n[g])),
+        }
+        for g in np.flatnonzero(gen_count)
+    ]
+
+    located = locations != MISSING
+    loc_count = np.bincount(locations[located], minlength=len(names))
+    loc_span = has_span & located
+    loc_span_n = np.bincount(locations[loc_span], minlength=len(names))
+    loc_span_sum = np.bincount(
+        locations[loc_span], weights=(deaths - births)[loc_span], minlength=len(names)
+    )
+    # 按人数降序，同数时按首次出现顺序
+    order = np.argsort(-loc_count, kind="stable")[:top]
+    by_location = [
+        {
+            "location": names[i],
+            "count": int(loc_count[i]),
+            "avg_lifespan": _mean(float(loc_span_sum[i]), int(loc_span_n[i])),
+        }
+        for i in order
+        if loc_count[i]
+    ]
+
+    born = births != MISSING
+    living: List[Dict[str, int]] = []
+    if born.any():
+        start = births[born] // 10
+        last_year = max(int(births.max()), int(deaths.max()))
+        end = np.where(deaths[born] != MISSING, deaths[born], last_year) // 10
+        end = np.maximum(end, start)
+        first = int(start.min())
+        span = int(end.max()) - first + 2
+        # 差分数组：出生年代 +1，去世年代的下一个年代 -1
+        delta = np.bincount(start - first, minlength=span) - np.bincount(
+            end - first + 1, minlength=span
+        )
+        alive = np.cumsum(delta)[:-1]
+        living = [
+            {"decade": (first + i) * 10, "count": int(n)} for i, n in enumerate(alive)
+        ]
+
+    return {
+        "gender": {
+            "male": male,
+            "female": female,
+            "unknown": len(genders) - male - female,
+            "ratio": _ratio(male, female),
+        },
+        "lifespan": {
+            "count": int(len(spans)),
+            "mean": _mean(float(spans.sum()), len(spans)),
+            "min": int(spans.min()) if len(spans) else None,
+            "max": int(spans.max()) if len(spans) else None,
+        },
+        "generations": by_generation,
+        "locations": by_location,
+        "living_by_decade": living,
+    }
+
+
+def _aggregate_python(
+    births: Any,
+    deaths: Any,
+    generations: Any,
+    genders: Any,
+    locations: Any,
+    names: List[str],
+    top: int,
+) -> Dict[str, Any]:
+    male = female = 0
+    spans: List[int] = []
+    gens: Dict[int, List[int]] = {}  # generation -> [count, male, female, span_n, span_sum]
+    locs: Dict[int, List[int]] = {}  # location code -> [count, span_n, span_sum]
+    for birth, death, gen, gender, loc in zip(births, deaths, generations, genders, locations):
+        g = gens.setdefault(gen, [0, 0, 0, 0, 0])
+        g[0] += 1
+        if gender == 1:
+            male += 1
+            g[1] += 1
+        elif gender == 2:
+            female += 1
+            g[2] += 1
+        has_span = birth != MISSING and death != MISSING and death >= birth
+        if has_span:
+            spans.append(death - birth)
+            g[3] += 1
+            g[4] += death - birth
+        if loc != MISSING:
+            entry = locs.setdefault(loc, [0, 0, 0])
+            entry[0] += 1
+            if has_span:
+                entry[1] += 1
+                entry[2] += death - birth
+
+    by_location = sorted(locs.items(), key=lambda item: (-item[1][0], item[0]))[:top]
+
+    living: List[Dict[str, int]] = []
+    born = [(b, d) for b, d in zip(births, deaths) if b != MISSING]
+    if born:
+        last_year = max(max(births), max(deaths))
+        ranges = [
+            (b // 10, max((d if d != MISSING else last_year) // 10, b // 10)) for b, d in born
+        ]
+        first = min(start for start, _ in ranges)
+        delta = [0] * (max(end for _, end in ranges) - first + 2)
+        for start, end in ranges:
+            delta[start - first] += 1
+            delta[end - first + 1] -= 1
+        alive = 0
+        for i, change in enumerate(delta[:-1]):
+            alive += change
+            living.append({"decade": (first + i) * 10, "count": alive})
+
+    return {
+        "gender": {
+            "male": male,
+            "female": female,
+            "unknown": len(genders) - male - female,
+            "ratio": _ratio(male, female),
+        },
+        "lifespan": {
+            "count": len(spans),
+            "mean": _mean(sum(spans), len(spans)),
+            "min": min(spans) if spans else None,
+            "max": max(spans) if spans else None,
+        },
+        "generations": [
+            {
+                "generation": gen,
+                "count": g[0],
+                "male": g[1],
+                "female": g[2],
+                "avg_lifespan": _mean(g[4], g[3]),
+            }
+            for gen, g in sorted(gens.items())
+        ],
+        "locations": [
+            {"location": names[code], "count": e[0], "avg_lifespan": _mean(e[2], e[1])}
+            for code, e in by_location
+        ],
+        "living_by_decade": living,
+    }
@@ -0,0 +1,314 @@
+from array import array
+from bisect import bisect_left
+from typing import (
+    Dict,
+    ItemsView,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    ValuesView,
+)
+
+from .model import Person
+
+# 缺失整数值的哨兵
+MISSING = -(2**63)
+
+
+class StringTable:
+    """Interned string column: each distinct value is stored once."""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = values if values is not None else []
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        if self._lookup is None:
+            self._lookup = {v: i for i, v in enumerate(self.values)}
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return None if code < 0 else self.values[code]
+
+
+def _opt(value: int) -> Optional[int]:
+    return None if value == MISSING else value
+
+
+class PersonView:
+    """Read-only `Person` look-alike backed by one row of a `PersonStore`."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: "PersonStore", row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def id(self) -> int:
+        return self._store.ids[self._row]
+
+    @property
+    def parent_id(self) -> Optional[int]:
+        return _opt(self._store.parent_ids[self._row])
+
+    @property
+    def wbs(self) -> str:
+        return self._store.wbs_at(self._row)
+
+    @property
+    def name(self) -> str:
+        store = self._store
+        return store.strings.values[store.name_codes[self._row]]
+
+    @property
+    def gender(self) -> Optional[str]:
+        return self._store.strings.value(self._store.gender_codes[self._row])
+
+    @property
+    def birth_year(self) -> Optional[int]:
+        return _opt(self._store.birth_years[self._row])
+
+    @property
+    def death_year(self) -> Optional[int]:
+        return _opt(self._store.death_years[self._row])
+
+    @property
+    def generation(self) -> Optional[int]:
+        return _opt(self._store.generations[self._row])
+
+    @property
+    def clan_name(self) -> Optional[str]:
+        return self._store.strings.value(self._store.clan_codes[self._row])
+
+    @property
+    def location(self) -> Optional[str]:
+        return self._store.strings.value(self._store.location_codes[self._row])
+
+    @property
+    def note(self) -> Optional[str]:
+        return self._store.strings.value(self._store.note_codes[self._row])
+
+    @property
+    def depth(self) -> int:
+        return self._store.depths[self._row]
+
+    @property
+    def wbs_path(self) -> Tuple[int, ...]:
+        store = self._store
+        return tuple(
+            store.path_segments[store.path_offsets[self._row] : store.path_offsets[self._row + 1]]
+        )
+
+    @property
+    def children(self) -> List["PersonView"]:
+        store = self._store
+        rows = store.child_rows[store.child_offsets[self._row] : store.child_offsets[self._row + 1]]
+        return [PersonView(store, r) for r in rows]
+
+    @property
+    def child_count(self) -> int:
+        offsets = self._store.child_offsets
+        return offsets[self._row + 1] - offsets[self._row]
+
+    def children_slice(self, start: int, stop: int) -> List["PersonView"]:
+        """``children[start:stop]`` without building views for the other children."""
+        store = self._store
+        first, last = store.child_offsets[self._row], store.child_offsets[self._row + 1]
+        rows = store.child_rows[min(first + start, last) : min(first + stop, last)]
+        return [PersonView(store, r) for r in rows]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PersonView):
+            return NotImplemented
+        return self._store is other._store and self._row == other._row
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._row))
+
+    def __repr__(self):
+        return f"<Person {self.wbs} {self.name}>"
+
+
+class PersonStore(Mapping[int, PersonView]):
+    """Columnar, array-backed family store.
+
+    Rows are sorted by id so lookups bisect the `ids` column instead of going
+    through a per-person dict; `file_rows` lists the rows in source (CSV)
+    order, which is the order iteration follows. Integers live in typed arrays
+    (``MISSING`` marks absent values), text columns share one interned
+    `StringTable`, WBS codes are packed into a single UTF-8 blob (their parsed
+    integer paths into ``path_segments``, split by ``path_offsets``), and children
+    are kept in CSR form: the child rows of row ``r`` are
+    ``child_rows[child_offsets[r]:child_offsets[r + 1]]``. `version` identifies
+    the source data (the repository sets it from the CSV hash).
+    """
+
+    def __init__(
+        self,
+        *,
+        ids: Sequence[int],
+        parent_ids: Sequence[int],
+        birth_years: Sequence[int],
+        death_years: Sequence[int],
+        generations: Sequence[int],
+        depths: Sequence[int],
+        name_codes: Sequence[int],
+        gender_codes: Sequence[int],
+        clan_codes: Sequence[int],
+        location_codes: Sequence[int],
+        note_codes: Sequence[int],
+        strings: StringTable,
+        wbs_blob: bytes,
+        wbs_offsets: Sequence[int],
+        path_segments: Sequence[int],
+        path_offsets: Sequence[int],
+        child_offsets: Sequence[int],
+        child_rows: Sequence[int],
+        file_rows: Sequence[int],
+        version: str = "",
+    ):
+        self.ids = ids
+        self.parent_ids = parent_ids
+        self.birth_years = birth_years
+        self.death_years = death_years
+        self.generations = generations
+        self.depths = depths
+        self.name_codes = name_codes
+        self.gender_codes = gender_codes
+        self.clan_codes = clan_codes
+        self.location_codes = location_codes
+        self.note_codes = note_codes
+        self.strings = strings
+        self.wbs_blob = wbs_blob
+        self.wbs_offsets = wbs_offsets
+        self.path_segments = path_segments
+        self.path_offsets = path_offsets
+        self.child_offsets = child_offsets
+        self.child_rows = child_rows
+        self.file_rows = file_rows
+        self.version = version
+
+    @classmethod
+    def from_persons(cls, persons: Mapping[int, Person]) -> "PersonStore":
+        """Pack parsed persons into columns; parent ids must already be resolved."""
+        ordered = sorted(persons.values(), key=lambda p: p.id)
+        row_of = {p.id: row for row, p in enumerate(ordered)}
+        strings = StringTable()
+
+        def ints(values) -> array:
+            return array("q", (MISSING if v is None else v for v in values))
+
+        def codes(values) -> array:
+            return array("i", (strings.code(v) for v in values))
+
+        wbs_offsets = array("q", [0])
+        wbs_parts = []
+        path_segments = array("q")
+        path_offsets = array("q", [0])
+        for p in ordered:
+            encoded = p.wbs.encode("utf-8")
+            wbs_parts.append(encoded)
+            wbs_offsets.append(wbs_offsets[-1] + len(encoded))
+            path_segments.extend(p.wbs_path)
+            path_offsets.append(len(path_segments))
+
+        child_counts = [0] * (len(ordered) + 1)
+        for p in ordered:
+            if p.parent_id is not None:
+                child_counts[row_of[p.parent_id] + 1] += 1
+        child_offsets = array("q", [0] * (len(ordered) + 1))
+        for row in range(len(ordered)):
+            child_offsets[row + 1] = child_offsets[row] + child_counts[row + 1]
+        # 保持与 build_tree 一致的子节点顺序（按原始记录顺序）
+        child_rows = array("q", [0] * child_offsets[-1])
+        fill = array("q", child_offsets[:-1])
+        for p in persons.values():
+            if p.parent_id is not None:
+                parent_row = row_of[p.parent_id]
+                child_rows[fill[parent_row]] = row_of[p.id]
+                fill[parent_row] += 1
+
+        return cls(
+            ids=array("q", (p.id for p in ordered)),
+            parent_ids=ints(p.parent_id for p in ordered),
+            birth_years=ints(p.birth_year for p in ordered),
+            death_years=ints(p.death_year for p in ordered),
+            generations=ints(p.generation for p in ordered),
+            depths=array("H", (p.depth for p in ordered)),
+            name_codes=codes(p.name for p in ordered),
+            gender_codes=codes(p.gender for p in ordered),
+            clan_codes=codes(p.clan_name for p in ordered),
+            location_codes=codes(p.location for p in ordered),
+            note_codes=codes(p.note for p in ordered),
+            strings=strings,
+            wbs_blob=b"".join(wbs_parts),
+            wbs_offsets=wbs_offsets,
+            path_segments=path_segments,
+            path_offsets=path_offsets,
+            child_offsets=child_offsets,
+            child_rows=child_rows,
+            file_rows=array("q", (row_of[pid] for pid in persons)),
+        )
+
+    def wbs_at(self, row: int) -> str:
+        return bytes(self.wbs_blob[self.wbs_offsets[row] : self.wbs_offsets[row + 1]]).decode(
+            "utf-8"
+        )
+
+    def row_of(self, pid: int) -> int:
+        row = bisect_left(self.ids, pid)
+        if row == len(self.ids) or self.ids[row] != pid:
+            raise KeyError(pid)
+        return row
+
+    def __getitem__(self, pid: int) -> PersonView:
+        return PersonView(self, self.row_of(pid))
+
+    def __contains__(self, pid: object) -> bool:
+        try:
+            self.row_of(pid)  # type: ignore[arg-type]
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[int]:
+        ids = self.ids
+        return (ids[row] for row in self.file_rows)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def values(self) -> "_StoreValues":
+        return _StoreValues(self)
+
+    def items(self) -> "_StoreItems":
+        return _StoreItems(self)
+
+
+class _StoreValues(ValuesView):
+    """Iterate rows directly (in source order) instead of bisecting each key."""
+
+    _mapping: PersonStore
+
+    def __iter__(self) -> Iterator[PersonView]:
+        store = self._mapping
+        return (PersonView(store, row) for row in store.file_rows)
+
+
+class _StoreItems(ItemsView):
+    _mapping: PersonStore
+
+    def __iter__(self) -> Iterator[Tuple[int, PersonView]]:
+        store = self._mapping
+        return ((store.ids[row], PersonView(store, row)) for row in store.file_rows)
@@ -0,0 +1,155 @@
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Iterator, List, Mapping, Optional, Tuple
+
+from .index import FamilyIndex
+from .model import Person
+
+ORDERS = ("dfs", "bfs")
+
+
+@dataclass
+class TraversalPage:
+    nodes: List[Person]
+    next_cursor: Optional[str]
+
+
+def _generation(node: Person) -> int:
+    return node.generation or node.depth
+
+
+def _check_order(order: str) -> None:
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+
+
+def iter_subtree(
+    root: Person,
+    *,
+    max_depth: Optional[int] = None,
+    gen_min: Optional[int] = None,
+    gen_max: Optional[int] = None,
+    order: str = "dfs",
+    max_nodes: Optional[int] = None,
+) -> Iterator[Person]:
+    """Lazily walk the subtree under `root` without recursion.
+
+    Branches deeper than `max_depth` or beyond `gen_max` are pruned; nodes
+    below `gen_min` are walked through but not yielded. Iteration stops once
+    `max_nodes` nodes have been yielded.
+    """
+    _check_order(order)
+    if max_nodes is not None and max_nodes <= 0:
+        return
+
+    emitted = 0
+    pending: Deque[Tuple[Person, int]] = deque([(root, 0)])
+    pop = pending.pop if order == "dfs" else pending.popleft
+    while pending:
+        node, depth = pop()
+        if max_depth is not None and depth > max_depth:
+            continue
+        gen = _generation(node)
+        if gen_max is not None and gen > gen_max:
+            continue
+        if gen_min is None or gen >= gen_min:
+            yield node
+            emitted += 1
+            if max_nodes is not None and emitted >= max_nodes:
+                return
+        if order == "dfs":
+            pending.extend((child, depth + 1) for child in reversed(node.children))
+        else:
+            pending.extend((child, depth + 1) for child in node.children)
+
+
+def iter_preorder(
+    persons: Mapping[int, Person],
+    index: FamilyIndex,
+    root: Person,
+    *,
+    max_depth: Optional[int] = None,
+    gen_min: Optional[int] = None,
+    gen_max: Optional[int] = None,
+    start: Optional[int] = None,
+) -> Iterator[Tuple[int, Person]]:
+    """Yield ``(preorder_position, person)`` pairs for the subtree under `root`.
+
+    Scans the index's preorder slice and jumps over pruned branches. `start`
+    resumes the scan at a position previously returned by this generator.
+    """
+    preorder = index.preorder
+    exit_ = index.exit
+    base_depth = root.depth
+
+    pos = index.entry[root.id] if start is None else start
+    end = exit_[root.id]
+    while pos < end:
+        node = persons[preorder[pos]]
+        gen = _generation(node)
+        if (max_depth is not None and node.depth - base_depth > max_depth) or (
+            gen_max is not None and gen > gen_max
+        ):
+            # 剪枝：跳过整棵子树
+            pos = exit_[node.id]
+            continue
+        if gen_min is None or gen >= gen_min:
+            yield pos, node
+        pos += 1
+
+
+def parse_cursor(cursor: str, kind: str) -> int:
+    """Decode a page cursor such as ``"p120"``; `kind` is its expected one-letter prefix."""
+    if not cursor.startswith(kind) or not cursor[1:].isdigit():
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return int(cursor[1:])
+
+
+def page_subtree(
+    persons: Mapping[int, Person],
+    root: Person,
+    *,
+    limit: int,
+    cursor: Optional[str] = None,
+    order: str = "dfs",
+    index: Optional[FamilyIndex] = None,
+    max_depth: Optional[int] = None,
+    gen_min: Optional[int] = None,
+    gen_max: Optional[int] = None,
+) -> TraversalPage:
+    """Return at most `limit` subtree members plus a cursor for the next page.
+
+    Indexed DFS cursors record the preorder position to resume from, so later
+    pages cost the same as the first. Other cursors record how many nodes
+    were already returned and are resumed by skipping them lazily.
+    """
+    _check_order(order)
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+
+    if order == "dfs" and index is not None:
+        start = None
+        if cursor:
+            start = parse_cursor(cursor, "p")
+            if not index.entry[root.id] <= start <= index.exit[root.id]:
+                raise ValueError(f"cursor out of range: {cursor!r}")
+        scan = iter_preorder(
+            persons,
+            index,
+            root,
+            max_depth=max_depth,
+            gen_min=gen_min,
+            gen_max=gen_max,
+            start=start,
+        )
+        window = list(islice(scan, limit + 1))
+        nodes = [node for _, node in window[:limit]]
+        next_cursor = f"p{window[limit][0]}" if len(window) > limit else None
+        return TraversalPage(nodes=nodes, next_cursor=next_cursor)
+
+    offset = parse_cursor(cursor, "o") if cursor else 0
+    walk = iter_subtree(root, max_depth=max_depth, gen_min=gen_min, gen_max=gen_max, order=order)
+    nodes = list(islice(walk, offset, offset + limit + 1))
+    next_cursor = f"o{offset + limit}" if len(nodes) > limit else None
+    return TraversalPage(nodes=nodes[:limit], next_cursor=next_cursor)
@@ -1,8 +1,10 @@
 from typing import Dict, List
 
+from .metrics import timed
 from .model import Person
 
 
+@timed("build_tree")
 def build_tree(persons: Dict[int, Person]) -> List[Person]:
     """Build parent/child relations from parent_id and return root nodes.
 
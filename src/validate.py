@@ -1,30 +1,200 @@
-from typing import Dict
-
-from .model import Person
-
-
-def validate_family(persons: Dict[int, Person]):
-    wbs_map = {}
-    for p in persons.values():
-        # WBS 唯一性
-        if p.wbs in wbs_map:
-            raise ValueError(f"Duplicated WBS: {p.wbs}")
-        wbs_map[p.wbs] = p.id
-        
-        # 世代校验
-        if p.generation is not None:
-            if p.generation != p.depth:
-                raise ValueError(
-                    f"Generation mismatch for {p.name}: "
-                    f"generation={p.generation}, wbs={p.wbs}"
-                )
-        
-        # parent 校验（从 WBS 推导的关系）
-        if p.parent_id:
-            if p.parent_id not in persons:
-                raise ValueError(f"{p.name}: parent_id {p.parent_id} not found")
-            parent = persons[p.parent_id]
-            if not p.wbs.startswith(parent.wbs + "."):
-                raise ValueError(
-                    f"WBS-parent mismatch: {p.wbs} not under {parent.wbs}"
-                )
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import closing
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Generator, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .metrics import timed
+from .model import Person, parse_wbs
+
+# 每个分块（并行模式下即每个任务）校验的人数
+VALIDATE_CHUNK_SIZE = 50_000
+
+# (id, name, wbs, generation, parent_id, WBS 是否与前文重复)：发往工作进程的精简记录
+_CheckRow = Tuple[int, str, str, Optional[int], Optional[int], bool]
+# 工作进程中的 id → WBS 映射，由进程池初始化函数写入
+_worker_wbs: Dict[int, str] = {}
+
+
+@dataclass
+class Violation:
+    code: str
+    message: str
+    person_id: Optional[int] = None
+    wbs: Optional[str] = None
+
+
+@dataclass
+class ValidationReport:
+    violations: List[Violation] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def raise_first(self) -> None:
+        if self.violations:
+            raise ValueError(self.violations[0].message)
+
+
+def _under(wbs: str, parent_wbs: str) -> bool:
+    """Whether `wbs` lies strictly below `parent_wbs`, comparing integer segments."""
+    # 规范写法直接按字符串前缀判断；仅对 "1.03" 之类的写法解析整数路径
+    if wbs.startswith(parent_wbs + "."):
+        return True
+    path, parent_path = parse_wbs(wbs), parse_wbs(parent_wbs)
+    return len(path) > len(parent_path) and path[: len(parent_path)] == parent_path
+
+
+def _check(
+    pid: int,
+    name: str,
+    wbs: str,
+    generation: Optional[int],
+    parent_id: Optional[int],
+    parent_wbs: Optional[str],
+    duplicated: bool,
+) -> Iterator[Violation]:
+    """All checks for one person, in order; `parent_wbs` is ``None`` if missing.
+
+    `duplicated` means an earlier person in file order has the same WBS.
+    """
+    # WBS 唯一性
+    if duplicated:
+        yield Violation("duplicated_wbs", f"Duplicated WBS: {wbs}", pid, wbs)
+
+    # 世代校验（WBS 深度即段数）
+    if generation is not None and generation != wbs.count(".") + 1:
+        yield Violation(
+            "generation_mismatch",
+            f"Generation mismatch for {name}: generation={generation}, wbs={wbs}",
+            pid,
+            wbs,
+        )
+
+    # parent 校验（从 WBS 推导的关系）
+    if parent_id:
+        if parent_wbs is None:
+            yield Violation("parent_missing", f"{name}: parent_id {parent_id} not found", pid, wbs)
+        elif not _under(wbs, parent_wbs):
+            yield Violation(
+                "wbs_parent_mismatch",
+                f"WBS-parent mismatch: {wbs} not under {parent_wbs}",
+                pid,
+                wbs,
+            )
+
+
+def _row_chunks(persons: Mapping[int, Person]) -> Iterator[List[_CheckRow]]:
+    """Chunks of `_CheckRow` in input order, flagging WBS codes already seen."""
+    seen: Set[str] = set()
+    people = iter(persons.values())
+    while True:
+        chunk: List[_CheckRow] = []
+        for p in islice(people, VALIDATE_CHUNK_SIZE):
+            duplicated = p.wbs in seen
+            seen.add(p.wbs)
+            chunk.append((p.id, p.name, p.wbs, p.generation, p.parent_id, duplicated))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _check_serial(persons: Mapping[int, Person]) -> Generator[List[Violation], None, None]:
+    """Yield the violations of each chunk of `persons`, in input order."""
+    for chunk in _row_chunks(persons):
+        violations: List[Violation] = []
+        for pid, name, wbs, generation, parent_id, duplicated in chunk:
+            parent = persons.get(parent_id) if parent_id else None
+            parent_wbs = parent.wbs if parent is not None else None
+            violations.extend(_check(pid, name, wbs, generation, parent_id, parent_wbs, duplicated))
+        yield violations
+
+
+def _init_worker(wbs_of: Dict[int, str]) -> None:
+    global _worker_wbs
+    _worker_wbs = wbs_of
+
+
+def _check_rows(rows: List[_CheckRow]) -> List[Violation]:
+    """Worker side: resolve parents in the id → WBS map received at start-up."""
+    violations: List[Violation] = []
+    for pid, name, wbs, generation, parent_id, duplicated in rows:
+        parent_wbs = _worker_wbs.get(parent_id) if parent_id else None
+        violations.extend(_check(pid, name, wbs, generation, parent_id, parent_wbs, duplicated))
+    return violations
+
+
+def _check_parallel(
+    persons: Mapping[int, Person], workers: int
+) -> Generator[List[Violation], None, None]:
+    """Like `_check_serial`, with at most 2 × `workers` chunks queued in a process pool.
+
+    Closing the generator early (after the first violation when not
+    collecting a report) cancels the queued chunks.
+    """
+    chunks = _row_chunks(persons)
+    wbs_of = {pid: p.wbs for pid, p in persons.items()}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(wbs_of,)
+    ) as pool:
+        pending: Dict[Future, int] = {}
+        done_chunks: Dict[int, List[Violation]] = {}
+        submitted = emitted = 0
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending[pool.submit(_check_rows, chunk)] = submitted
+                    submitted += 1
+                if not pending:
+                    return
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done_chunks[pending.pop(future)] = future.result()
+                # 按提交顺序产出，保证首个违规与串行模式一致
+                while emitted in done_chunks:
+                    yield done_chunks.pop(emitted)
+                    emitted += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+@timed("validate")
+def validate_family(
+    persons: Mapping[int, Person],
+    *,
+    workers: Optional[int] = None,
+    report: bool = False,
+) -> Optional[ValidationReport]:
+    """Check WBS uniqueness, generation/WBS depth and parent consistency.
+
+    Each person is checked in input order (duplicate WBS, then generation,
+    then parent), so the first violation is the one a row-by-row pass would
+    hit. With ``workers > 1`` the checks run in a process pool: duplicates
+    are flagged while chunking, each worker receives the id → WBS map once
+    and resolves parents itself, and chunks are submitted a few at a time. By
+    default the
+    first violation is raised as ``ValueError`` (remaining chunks are
+    cancelled); with ``report=True`` every violation is collected and returned
+    in a `ValidationReport`.
+    """
+    result = ValidationReport()
+    if workers is not None and workers > 1:
+        found_chunks = _check_parallel(persons, workers)
+    else:
+        found_chunks = _check_serial(persons)
+    # 提前结束时立即关闭生成器，取消排队中的分块并回收进程池
+    with closing(found_chunks):
+        for found in found_chunks:
+            result.violations.extend(found)
+            if found and not report:
+                break
+
+    if report:
+        return result
+    result.raise_first()
+    return None
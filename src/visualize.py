@@ -1,9 +1,12 @@
+import json
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
 from pyvis.network import Network
 
 from .lineage import LineageSystem
+from .metrics import timed
 from .model import Person
 
 GEN_COLORS = [
@@ -20,22 +23,244 @@ GEN_COLORS = [
 ]
 
 
+BACKENDS = ("native", "pyvis")
+
+GRAPH_OPTIONS: Dict[str, Any] = {
+    "layout": {
+        "hierarchical": {
+            "enabled": True,
+            "direction": "UD",
+            "sortMethod": "directed",
+            "levelSeparation": 150,
+            "nodeSpacing": 200,
+        }
+    },
+    "physics": {"enabled": False},
+    "interaction": {"hover": True, "tooltipDelay": 200},
+    "nodes": {"font": {"size": 14}},
+    "edges": {
+        "arrows": {"to": {"enabled": True, "scaleFactor": 1}},
+        "smooth": {"type": "cubicBezier", "forceDirection": "vertical"},
+    },
+}
+
+_VIS_CSS = "https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/dist/vis-network.min.css"
+_VIS_JS = "https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"
+# 与 pyvis 模板相同的子资源完整性（SRI）哈希，CDN 内容被篡改时浏览器拒绝加载
+_VIS_CSS_SRI = (
+    "sha512-WgxfT5LWjfszlPHXRmBWHkV2eceiWTOBvrKCNbdgDYTHrT2AeLCGbF4sZlZw3UMN3WtL0tGUoIAKsu8mllg/XA=="
+)
+_VIS_JS_SRI = (
+    "sha512-LnvoEWDFrqGHlHmDD2101OrLcbsfkrzoSpvtSQtxK3RMnRV0eOkhhBN2dXHKRrUU8p2DGRTk35n4O8nWSVe1mQ=="
+)
+
+# 与 pyvis 输出相同的 vis-network 页面；节点与边数组在 HEAD 与 TAIL 之间流式写入
+_NATIVE_HEAD = """<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="{css}" integrity="{css_sri}"
+    crossorigin="anonymous" referrerpolicy="no-referrer" />
+<script src="{js}" integrity="{js_sri}"
+    crossorigin="anonymous" referrerpolicy="no-referrer"></script>
+<style type="text/css">
+#mynetwork {{
+    width: {width};
+    height: {height};
+    background-color: {bgcolor};
+    border: 1px solid lightgray;
+    position: relative;
+    float: left;
+}}
+</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script type="text/javascript">
+var nodes = new vis.DataSet("""
+_NATIVE_TAIL = """);
+var network = new vis.Network(
+    document.getElementById("mynetwork"), {{nodes: nodes, edges: edges}}, {options}
+);
+{lazy_script}</script>
+</body>
+</html>
+"""
+# 懒加载模式：点击可展开节点时分页请求 /api/nodes/<wbs>/children 并追加到图中
+_LAZY_SCRIPT = """var childrenUrl = {url};
+function expandNode(node, cursor) {{
+    var url = childrenUrl + encodeURIComponent(node.wbs) + "/children?view=graph";
+    if (cursor) {{
+        url += "&cursor=" + encodeURIComponent(cursor);
+    }}
+    fetch(url).then(function (resp) {{ return resp.json(); }}).then(function (page) {{
+        page.nodes.forEach(function (child) {{
+            child.expandable = child.has_children;
+            child.borderWidth = child.has_children ? 3 : 1;
+            if (!nodes.get(child.id)) {{
+                nodes.add(child);
+                edges.add({{arrows: "to", from: node.id, to: child.id}});
+            }}
+        }});
+        if (page.next_cursor) {{
+            expandNode(node, page.next_cursor);
+        }}
+    }});
+}}
+network.on("click", function (params) {{
+    if (params.nodes.length !== 1) {{
+        return;
+    }}
+    var node = nodes.get(params.nodes[0]);
+    if (node && node.expandable) {{
+        nodes.update({{id: node.id, expandable: false, borderWidth: 1}});
+        expandNode(node, null);
+    }}
+}});
+"""
+
+
 @dataclass
 class VisualizationConfig:
     height: str = "800px"
     width: str = "100%"
     bgcolor: str = "#ffffff"
     font_color: str = "black"
+    backend: str = "native"
+    # 设置后启用懒加载：未展开的分支点击时从该地址前缀加载子节点（仅 native 后端）
+    lazy_children_url: Optional[str] = None
+
+
+def _node_style(
+    p: Person, lineage: LineageSystem, display_name: Optional[str] = None
+) -> Tuple[int, str, str, str]:
+    """Return ``(level, color, label, title)`` shared by both backends."""
+    gen = p.generation or p.depth
+    color = GEN_COLORS[(gen - 1) % len(GEN_COLORS)]
+    lineage_char = lineage.generation_char(gen)
+    if display_name is None:
+        display_name = lineage.annotate_name(p.name, gen)
+    label = f"{display_name}\n({p.wbs})"
+
+    birth = p.birth_year if p.birth_year else "不详"
+    death = p.death_year if p.death_year else "不详"
+    note = p.note if p.note else "无"
+
+    title = (
+        f"【{p.name}】\n━━━━━━━━━━━━\nWBS: {p.wbs}\n世代: 第 {gen} 代\n"
+        f"行辈: {lineage_char}\n生卒: {birth} - {death}\n备注: {note}"
+    )
+    return gen, color, label, title
+
+
+def _to_js(value: Any) -> str:
+    # 防止数据中的 "</script>" 提前结束脚本块
+    return json.dumps(value, ensure_ascii=False).replace("</", "<\\/")
+
+
+def vis_node(
+    p: Person,
+    lineage: LineageSystem,
+    font_color: str = "black",
+    display_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """The vis-network node for `p`, as drawn by both backends.
+
+    Pass `display_name` when it was already annotated (see
+    `LineageSystem.annotate_batch`).
+    """
+    level, color, label, title = _node_style(p, lineage, display_name)
+    return {
+        "color": color,
+        "font": {"color": font_color},
+        "id": p.id,
+        "label": label,
+        "level": level,
+        "shape": "ellipse",
+        "title": title,
+    }
+
+
+@lru_cache(maxsize=16)
+def _native_frame(
+    height: str, width: str, bgcolor: str, lazy_children_url: Optional[str]
+) -> Tuple[str, str]:
+    head = _NATIVE_HEAD.format(
+        css=_VIS_CSS,
+        css_sri=_VIS_CSS_SRI,
+        js=_VIS_JS,
+        js_sri=_VIS_JS_SRI,
+        width=width,
+        height=height,
+        bgcolor=bgcolor,
+    )
+    lazy_script = ""
+    if lazy_children_url is not None:
+        lazy_script = _LAZY_SCRIPT.format(url=_to_js(lazy_children_url))
+    return head, _NATIVE_TAIL.format(options=_to_js(GRAPH_OPTIONS), lazy_script=lazy_script)
 
 
+def _write_native(
+    persons: List[Person],
+    out: TextIO,
+    lineage: LineageSystem,
+    config: VisualizationConfig,
+    names: List[str],
+) -> None:
+    lazy = config.lazy_children_url is not None
+    head, tail = _native_frame(
+        config.height, config.width, config.bgcolor, config.lazy_children_url
+    )
+    node_ids = {p.id for p in persons}
+    out.write(head)
+    out.write("[")
+    for i, (p, name) in enumerate(zip(persons, names)):
+        node = vis_node(p, lineage, config.font_color, name)
+        if lazy:
+            # 子节点未包含在本次渲染中的节点可点击展开
+            expandable = any(c.id not in node_ids for c in p.children)
+            node["wbs"] = p.wbs
+            node["expandable"] = expandable
+            node["borderWidth"] = 3 if expandable else 1
+        out.write(("," if i else "") + _to_js(node))
+    out.write("]);\nvar edges = new vis.DataSet([")
+    sep = ""
+    for p in persons:
+        if p.parent_id and p.parent_id in node_ids:
+            out.write(sep + _to_js({"arrows": "to", "from": p.parent_id, "to": p.id}))
+            sep = ","
+    out.write("]")
+    out.write(tail)
+
+
+@timed("visualize_family")
 def visualize_family(
     persons: List[Person],
     output_html: str = "family.html",
     lineage_path: str = "data/lineage.yaml",
     config: Optional[VisualizationConfig] = None,
+    data_version: Optional[str] = None,
 ):
-    lineage = LineageSystem.from_yaml(lineage_path)
+    """Write an interactive hierarchical graph of `persons` to `output_html`.
+
+    The default ``native`` backend streams the node and edge arrays straight
+    into a fixed vis-network page; ``config.backend = "pyvis"`` builds the same
+    graph through pyvis's `Network` instead. With ``config.lazy_children_url``
+    the native page fetches unrendered branches on click. The lineage file is
+    loaded through the `LineageSystem.load` cache, and with `data_version`
+    annotated names are reused across renders of the same data.
+    """
+    lineage = LineageSystem.load(lineage_path)
     config = config or VisualizationConfig()
+    if config.backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got {config.backend!r}")
+    if config.lazy_children_url is not None and config.backend != "native":
+        raise ValueError("lazy expansion requires the native backend")
+
+    names = lineage.annotate_batch(persons, data_version)
+    if config.backend == "native":
+        with open(output_html, "w", encoding="utf-8") as f:
+            _write_native(persons, f, lineage, config, names)
+        return
 
     net = Network(
         height=config.height,
@@ -46,68 +271,17 @@ def visualize_family(
         layout=True,
     )
 
-    net.set_options(
-        """
-    {
-      "layout": {
-        "hierarchical": {
-          "enabled": true,
-          "direction": "UD",
-          "sortMethod": "directed",
-          "levelSeparation": 150,
-          "nodeSpacing": 200
-        }
-      },
-      "physics": {
-        "enabled": false
-      },
-      "interaction": {
-        "hover": true,
-        "tooltipDelay": 200
-      },
-      "nodes": {
-        "font": {
-          "size": 14
-        }
-      },
-      "edges": {
-        "arrows": {
-          "to": {
-            "enabled": true,
-            "scaleFactor": 1
-          }
-        },
-        "smooth": {
-          "type": "cubicBezier",
-          "forceDirection": "vertical"
-        }
-      }
-    }
-    """
-    )
-
-    for p in persons:
-        gen = p.generation or p.depth
-        color = GEN_COLORS[(gen - 1) % len(GEN_COLORS)]
-        lineage_char = lineage.generation_char(gen)
-        display_name = lineage.annotate_name(p.name, gen)
-        label = f"{display_name}\n({p.wbs})"
+    net.set_options(json.dumps(GRAPH_OPTIONS))
 
-        birth = p.birth_year if p.birth_year else "不详"
-        death = p.death_year if p.death_year else "不详"
-        note = p.note if p.note else "无"
-
-        title = (
-            f"【{p.name}】\n━━━━━━━━━━━━\nWBS: {p.wbs}\n世代: 第 {gen} 代\n"
-            f"行辈: {lineage_char}\n生卒: {birth} - {death}\n备注: {note}"
-        )
+    for p, name in zip(persons, names):
+        level, color, label, title = _node_style(p, lineage, name)
         net.add_node(
             p.id,
             label=label,
             title=title,
             color=color,
             shape="ellipse",
-            level=gen,
+            level=level,
         )
 
     node_ids = {p.id for p in persons}
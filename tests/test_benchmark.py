@@ -0,0 +1,39 @@
+from benchmarks.pipeline import compare, run
+
+
+def _report(seconds, peak_bytes):
+    return {
+        "results": {
+            "1000": {"stages": {"read_family_csv": {"seconds": seconds, "peak_bytes": peak_bytes}}}
+        }
+    }
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = _report(1.0, 1000.0)
+
+    assert compare(_report(1.1, 1000.0), baseline, threshold=0.25) == []
+    regressions = compare(_report(1.5, 2000.0), baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert "read_family_csv.seconds" in regressions[0]
+
+
+def test_compare_ignores_noise_on_tiny_timings():
+    assert compare(_report(0.002, 1.0), _report(0.001, 1.0), threshold=0.25) == []
+
+
+def test_run_covers_every_stage():
+    report = run([100], repeat=1)
+
+    stages = report["results"]["100"]["stages"]
+    assert set(stages) == {
+        "read_family_csv",
+        "validate_family",
+        "build_tree",
+        "filter_subtree",
+        "filter_subtree_indexed",
+        "subtree_payload",
+        "build_migration_timeline",
+        "visualize_family",
+    }
+    assert all(m["seconds"] >= 0 and m["peak_bytes"] >= 0 for m in stages.values())
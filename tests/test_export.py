@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from src import export
+from src.export import export_family
+from src.parser import read_family_csv
+from src.service import FamilyTreeService
+
+
+def _service():
+    return FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+
+
+def test_csv_export_round_trips_through_the_parser(tmp_path):
+    service = _service()
+    out = tmp_path / "export.csv"
+
+    with open(out, "wb") as f:
+        for chunk in export_family(service, "csv", chunk_chars=256):
+            f.write(chunk)
+
+    reloaded = read_family_csv(str(out))
+    assert reloaded.keys() == service.persons.keys()
+    for pid, person in reloaded.items():
+        original = service.persons[pid]
+        for name in ("wbs", "name", "birth_year", "note", "parent_id"):
+            assert getattr(person, name) == getattr(original, name)
+
+
+def test_jsonl_export_streams_subtree_in_preorder():
+    service = _service()
+    root = service.find_by_wbs("1.3")
+
+    chunks = list(export_family(service, "jsonl", root_wbs="1.3", max_depth=2, chunk_chars=64))
+    records = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+
+    expected = service.subtree(root_id=root.id, max_depth=2)
+    assert len(chunks) > 1
+    assert [r["id"] for r in records] == [p.id for p in expected]
+    assert records[1]["parent_id"] == root.id
+
+
+def test_gedcom_links_only_exported_relatives():
+    service = _service()
+
+    text = b"".join(export_family(service, "gedcom", root_wbs="1.3", max_depth=1)).decode()
+
+    root = service.find_by_wbs("1.3")
+    assert text.startswith("0 HEAD\n") and text.endswith("0 TRLR\n")
+    assert f"0 @I{root.id}@ INDI" in text
+    assert f"1 FAMC @F{root.parent_id}@" not in text
+    assert text.count("1 CHIL ") == len(root.children)
+    assert text.count(" INDI\n") == 1 + len(root.children)
+
+
+def test_bad_arguments_fail_before_streaming():
+    service = _service()
+
+    with pytest.raises(ValueError):
+        export_family(service, "xml")
+    with pytest.raises(ValueError):
+        export_family(service, "csv", root_wbs="9.9")
+
+
+def test_cli_exports_from_the_store_without_a_service(tmp_path, monkeypatch):
+    src_csv = tmp_path / "family.csv"
+    src_csv.write_bytes(open("data/family.csv", "rb").read())
+    out = tmp_path / "family.jsonl"
+
+    def no_service(*args, **kwargs):
+        raise AssertionError("CLI export must not build a FamilyTreeService")
+
+    monkeypatch.setattr(export.FamilyTreeService, "from_store", no_service)
+    export.main([str(src_csv), str(out), "--format", "jsonl", "--root-wbs", "1.3"])
+
+    expected = b"".join(export_family(_service(), "jsonl", root_wbs="1.3"))
+    assert out.read_bytes() == expected
+    # 只读导出不在输入旁写快照，除非显式要求
+    assert not (tmp_path / "family.csv.snap").exists()
+    export.main([str(src_csv), str(out), "--root-wbs", "1.3", "--write-snapshot"])
+    assert (tmp_path / "family.csv.snap").exists()
+    assert out.read_bytes() == expected
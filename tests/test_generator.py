@@ -1,4 +1,8 @@
-from src.generator import generate_family_data
+import pytest
+
+from src.generator import generate_family_csv, generate_family_data, main
+from src.parser import read_family_csv
+from src.validate import validate_family
 
 
 def test_generate_family_data_ids_are_unique(tmp_path):
@@ -12,3 +16,45 @@ def test_generate_family_data_ids_are_unique(tmp_path):
     ids = [p["id"] for p in persons]
     assert len(ids) == len(set(ids))
     assert output.exists()
+
+
+def test_cli_passes_seed_and_max_children_without_population(tmp_path):
+    outputs = [tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "c.csv"]
+    for out in outputs[:2]:
+        main(["--output", str(out), "--seed", "5", "--roots", "2"])
+    main(["--output", str(outputs[2]), "--seed", "5", "--roots", "2", "--max-children", "0"])
+
+    assert outputs[0].read_bytes() == outputs[1].read_bytes()
+    assert len(read_family_csv(str(outputs[2]))) == 2
+    with pytest.raises(SystemExit):
+        main(["--output", str(outputs[0]), "--workers", "2"])
+
+
+def test_generate_family_csv_writes_exact_population(tmp_path):
+    output = tmp_path / "exact.csv"
+
+    written = generate_family_csv(str(output), 1234, seed=7, num_roots=3)
+
+    persons = read_family_csv(str(output))
+    validate_family(persons)
+    assert written == len(persons) == 1234
+    assert sorted(persons) == list(range(1, 1235))
+
+
+def test_generate_family_csv_is_reproducible_across_workers(tmp_path):
+    serial = tmp_path / "serial.csv"
+    parallel = tmp_path / "parallel.csv"
+
+    generate_family_csv(str(serial), 500, seed=3, num_roots=4)
+    generate_family_csv(str(parallel), 500, seed=3, num_roots=4, workers=2)
+
+    assert serial.read_bytes() == parallel.read_bytes()
+
+
+def test_generate_family_csv_handles_deep_lineages(tmp_path):
+    output = tmp_path / "deep.csv"
+
+    generate_family_csv(str(output), 3000, seed=1, max_children=1)
+
+    persons = read_family_csv(str(output))
+    assert max(p.depth for p in persons.values()) == 3000
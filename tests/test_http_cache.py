@@ -0,0 +1,73 @@
+import gzip
+import json
+
+from werkzeug.datastructures import MultiDict
+
+from web.http_cache import (
+    MIN_COMPRESS_BYTES,
+    EncodedResponseCache,
+    choose_encoding,
+    compress,
+    dumps_json,
+    make_etag,
+)
+
+
+def test_etag_depends_on_version_and_query_only():
+    base = make_etag("v1", "tree", {"root_wbs": "1", "depth": "2"})
+
+    assert base == make_etag("v1", "tree", {"depth": "2", "root_wbs": "1"})
+    assert base != make_etag("v2", "tree", {"root_wbs": "1", "depth": "2"})
+    assert base != make_etag("v1", "tree", {"root_wbs": "1", "depth": "3"})
+    # 重复参数的每个取值都参与计算
+    repeated = MultiDict([("root_wbs", "1"), ("depth", "2"), ("depth", "3")])
+    assert make_etag("v1", "tree", repeated) != base
+    assert make_etag("v1", "tree", repeated) == make_etag(
+        "v1", "tree", MultiDict([("depth", "2"), ("depth", "3"), ("root_wbs", "1")])
+    )
+
+
+def test_choose_encoding_respects_quality():
+    assert choose_encoding("gzip, deflate") in ("gzip", "br")
+    assert choose_encoding("deflate") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding(None) is None
+
+
+def test_small_bodies_are_not_compressed():
+    small = dumps_json({"nodes": []})
+    large = dumps_json({"name": "张" * MIN_COMPRESS_BYTES})
+
+    assert compress(small, "gzip") == (small, None)
+    body, encoding = compress(large, "gzip")
+    assert encoding == "gzip"
+    assert json.loads(gzip.decompress(body)) == {"name": "张" * MIN_COMPRESS_BYTES}
+
+
+def test_encoded_cache_builds_once_per_etag_and_encoding():
+    cache = EncodedResponseCache(max_entries=2)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"ok": True}
+
+    first = cache.get_or_encode("a", None, build)
+    second = cache.get_or_encode("a", None, build)
+    cache.get_or_encode("b", None, build)
+    cache.get_or_encode("c", None, build)
+
+    assert first == second
+    assert len(calls) == 3
+    assert len(cache) == 2
+
+
+def test_encoded_cache_stays_within_byte_budget():
+    cache = EncodedResponseCache(max_entries=100, max_bytes=100)
+
+    for key in "abcd":
+        cache.get_or_encode(key, None, lambda: "x" * 38)
+    cache.get_or_encode("huge", None, lambda: "x" * 500)
+
+    assert cache.total_bytes <= 100
+    assert len(cache) == 2
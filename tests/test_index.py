@@ -0,0 +1,49 @@
+import pytest
+
+from src.filter import filter_subtree
+from src.index import FamilyIndex
+from src.parser import read_family_csv
+from src.tree import build_tree
+
+
+def _load():
+    persons = read_family_csv("data/family.csv")
+    build_tree(persons)
+    return persons, FamilyIndex.build(persons)
+
+
+def test_index_preorder_covers_all_persons():
+    persons, index = _load()
+
+    assert sorted(index.preorder) == sorted(persons)
+    assert index.id_for_wbs("1.3") == next(p.id for p in persons.values() if p.wbs == "1.3")
+
+
+def test_index_subtree_matches_recursive_filter():
+    persons, index = _load()
+    root_id = index.id_for_wbs("1.3")
+
+    expected = [p.id for p in filter_subtree(persons, root_id=root_id)]
+
+    assert index.subtree_ids(root_id) == expected
+    for kwargs in ({"max_depth": 2}, {"max_depth": 10, "gen_min": 4, "gen_max": 6}):
+        indexed = filter_subtree(persons, root_wbs="1.3", index=index, **kwargs)
+        assert indexed == filter_subtree(persons, root_wbs="1.3", **kwargs)
+
+
+def test_index_ancestor_checks():
+    persons, index = _load()
+    root_id = index.id_for_wbs("1")
+    child_id = index.id_for_wbs("1.3")
+
+    assert index.is_ancestor(root_id, child_id)
+    assert not index.is_ancestor(child_id, root_id)
+    assert not index.is_ancestor(child_id, child_id)
+    assert index.contains(child_id, child_id)
+
+
+def test_index_unknown_wbs_raises():
+    _, index = _load()
+
+    with pytest.raises(ValueError, match="WBS not found"):
+        index.id_for_wbs("9.9.9")
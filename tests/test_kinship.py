@@ -0,0 +1,71 @@
+from src.model import Person
+from src.service import FamilyTreeService
+
+# (id, wbs, name, gender, birth_year)
+ROWS = [
+    (1, "1", "始祖", "M", 1800),
+    (2, "1.1", "长子", "M", 1825),
+    (3, "1.2", "次女", "F", 1828),
+    (4, "1.3", "三子", "M", 1830),
+    (5, "1.1.1", "长孙", "M", 1850),
+    (6, "1.2.1", "外孙女", "F", 1852),
+    (7, "1.3.1", "次孙", "M", 1855),
+    (8, "1.1.1.1", "曾孙", "M", 1875),
+    (9, "1.3.1.1", "曾孙女", "F", 1880),
+    (10, "2", "他族", "M", 1800),
+]
+
+
+def _service():
+    persons = {}
+    for pid, wbs, name, gender, birth in ROWS:
+        parent_wbs = wbs.rpartition(".")[0]
+        parent_id = next((r[0] for r in ROWS if r[1] == parent_wbs), None)
+        persons[pid] = Person(
+            id=pid, parent_id=parent_id, wbs=wbs, name=name, gender=gender, birth_year=birth
+        )
+    return FamilyTreeService.from_persons(persons)
+
+
+def _label(service, a, b):
+    return service.kinship(a, b).label
+
+
+def test_direct_line_labels():
+    service = _service()
+
+    assert _label(service, "1", "1.1.1") == "孙子"
+    assert _label(service, "1.1.1.1", "1") == "曾祖父"
+    assert _label(service, "1.1", "1.1") == "本人"
+
+
+def test_collateral_labels_distinguish_tang_and_biao():
+    service = _service()
+
+    assert _label(service, "1.1", "1.3") == "弟弟"
+    assert _label(service, "1.1.1", "1.3.1") == "堂弟"
+    assert _label(service, "1.1.1", "1.2.1") == "表妹"
+    assert _label(service, "1.1.1.1", "1.3.1.1") == "再从妹"
+    assert _label(service, "1.1", "1.2.1") == "外甥女"
+    assert _label(service, "1.3", "1.1.1") == "侄子"
+    assert _label(service, "1.3.1", "1.1") == "伯父"
+    assert _label(service, "1.1.1", "1.2") == "姑母"
+
+
+def test_lca_distance_and_generation_label():
+    kin = _service().kinship("1.1.1.1", "1.3.1")
+
+    assert kin.lca == "1"
+    assert (kin.a_distance, kin.b_distance) == (3, 2)
+    assert kin.generation_label == "长1代"
+    assert _service().kinship("1", "2").label == "无亲缘关系"
+
+
+def test_batch_reports_errors_in_place():
+    pairs = [["1.1.1", "1.3.1"], ["1", "9.9"], ["1"], ["1.1.1", "1.3.1"]]
+    results = _service().kinship_batch(pairs)
+
+    assert results[0]["label"] == "堂弟"
+    assert results[1]["error"] == "WBS not found: 9.9"
+    assert "error" in results[2]
+    assert results[3] == results[0]
@@ -0,0 +1,63 @@
+import os
+
+from src import lineage as lineage_module
+from src.lineage import GENERATION_TABLE_SIZE, LineageSystem
+from src.model import Person
+
+
+def _write(path, poem):
+    path.write_text("lineage_poem:\n" + "".join(f"  - {c}\n" for c in poem), encoding="utf-8")
+
+
+def test_load_is_cached_per_file_version(tmp_path):
+    path = tmp_path / "lineage.yaml"
+    _write(path, ["忠", "厚"])
+
+    first = LineageSystem.load(str(path))
+    _write(path, ["传", "家", "久"])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    second = LineageSystem.load(str(path))
+
+    assert LineageSystem.load(str(path)) is second
+    assert first is not second
+    assert second.poem == ["传", "家", "久"]
+
+
+def test_generation_table_matches_poem_cycle():
+    lineage = LineageSystem(["忠", "厚", "传"])
+
+    for gen in (1, 3, 4, GENERATION_TABLE_SIZE - 1, GENERATION_TABLE_SIZE + 5):
+        assert lineage.generation_char(gen) == lineage.poem[(gen - 1) % 3]
+    assert lineage.generation_char(0) is None
+
+
+def test_annotate_batch_memoizes_per_data_version():
+    lineage = LineageSystem(["忠", "厚"])
+    people = [
+        Person(id=1, parent_id=None, wbs="1", name="张三"),
+        Person(id=2, parent_id=1, wbs="1.1", name="张四", generation=2),
+    ]
+
+    assert lineage.annotate_batch(people, "v1") == ["张忠三", "张厚四"]
+    people[0].name = "李三"
+    assert lineage.annotate_batch(people, "v1")[0] == "张忠三"
+    assert lineage.annotate_batch(people, "v2")[0] == "李忠三"
+    assert lineage.annotate_batch(people) == ["李忠三", "张厚四"]
+
+
+def test_annotate_batch_skips_memo_without_version_and_bounds_entries(monkeypatch):
+    monkeypatch.setattr(lineage_module, "ANNOTATION_CACHE_MAX_ENTRIES", 3)
+    lineage = LineageSystem(["忠"])
+    people = [Person(id=i, parent_id=None, wbs=str(i), name=f"张{i}") for i in range(1, 4)]
+
+    assert lineage.annotate_batch(people, "") == ["张忠1", "张忠2", "张忠3"]
+    people[0].name = "李1"
+    assert lineage.annotate_batch(people, "")[0] == "李忠1"
+    assert lineage._memo_entries == 0
+
+    lineage.annotate_batch(people, "v1")
+    lineage.annotate_batch(people[:2], "v2")
+    # 新版本挤出最久未用的版本，合计条数不超过上限
+    assert list(lineage._memo) == ["v2"]
+    assert lineage._memo_entries == 2
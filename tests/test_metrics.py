@@ -0,0 +1,49 @@
+import pytest
+
+from src.metrics import STAGE_ERRORS, STAGE_SECONDS, MetricsRegistry, stage_timer, timed
+
+
+def test_histogram_exposes_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("req_seconds", "Latency.", labels=("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        hist.observe(value, "/a")
+
+    text = registry.expose()
+
+    assert "# TYPE req_seconds histogram" in text
+    assert 'req_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'req_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'req_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'req_seconds_count{route="/a"} 3' in text
+    assert 'req_seconds_sum{route="/a"} 5.55' in text
+
+
+def test_counter_and_gauge_exposition_escapes_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("hits_total", "Hits.", labels=("path",))
+    counter.inc('a"b')
+    counter.inc('a"b', amount=2)
+    registry.gauge("size", "Size.").set_function(lambda: 7)
+
+    text = registry.expose()
+
+    assert registry.counter("hits_total", "Hits.") is counter
+    assert 'hits_total{path="a\\"b"} 3' in text
+    assert "size 7" in text
+
+
+def test_timed_records_duration_and_errors():
+    @timed("test_stage")
+    def boom():
+        raise ValueError("bad")
+
+    before = STAGE_SECONDS.count("test_stage")
+    with stage_timer("test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        boom()
+
+    assert STAGE_SECONDS.count("test_stage") == before + 2
+    assert STAGE_ERRORS.value("test_stage") >= 1
+    assert boom.__name__ == "boom"
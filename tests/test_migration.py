@@ -1,5 +1,6 @@
-from src.migration import build_migration_timeline
+from src.migration import MigrationTimeline, build_migration_timeline
 from src.parser import read_family_csv
+from src.service import FamilyTreeService
 
 
 def test_migration_timeline_sorted_by_year():
@@ -8,3 +9,88 @@ def test_migration_timeline_sorted_by_year():
 
     years = list(timeline.keys())
     assert years == sorted(years)
+
+
+def test_timeline_structure_matches_full_rebuild():
+    persons = read_family_csv("data/family.csv")
+
+    assert MigrationTimeline.build(persons).as_dict() == build_migration_timeline(persons)
+
+
+def test_timeline_incremental_updates_keep_order():
+    persons = read_family_csv("data/family.csv")
+    timeline = MigrationTimeline.build(persons)
+    person = persons[2]
+
+    timeline.remove(person.id)
+    assert all(e["wbs"] != person.wbs for e in timeline.iter_entries())
+
+    person.birth_year = 1700
+    timeline.add(person)
+    first = next(timeline.iter_entries())
+    assert (first["year"], first["wbs"]) == (1700, person.wbs)
+
+    del persons[2]
+    persons[2] = person
+    assert timeline.as_dict() == build_migration_timeline(persons)
+
+
+def test_timeline_range_location_and_subtree_queries():
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+
+    page = service.timeline_page(year_min=1850, year_max=1900, limit=1000)
+    assert page.entries
+    assert all(1850 <= e["year"] <= 1900 for e in page.entries)
+
+    location = page.entries[0]["location"]
+    by_location = service.timeline_page(location=location, limit=1000).entries
+    assert by_location and all(e["location"] == location for e in by_location)
+
+    scoped = service.timeline_page(root_wbs="1.3", limit=1000).entries
+    assert scoped and all(e["wbs"] == "1.3" or e["wbs"].startswith("1.3.") for e in scoped)
+
+
+def test_timeline_pagination():
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    full = service.timeline_page(limit=1000).entries
+
+    first = service.timeline_page(limit=10)
+    second = service.timeline_page(offset=first.next_offset, limit=1000)
+
+    assert first.entries + second.entries == full
+    assert second.next_offset is None
+
+
+def test_subtree_queries_match_filtered_full_timeline():
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    full = service.timeline_page(limit=10**6).entries
+
+    for root_wbs in ("1", "1.3", "1.3.1", "1.2"):
+        for year_min, year_max in ((None, None), (1850, 1900), (1900, None)):
+            expected = [
+                e
+                for e in full
+                if (e["wbs"] == root_wbs or e["wbs"].startswith(root_wbs + "."))
+                and (year_min is None or e["year"] >= year_min)
+                and (year_max is None or e["year"] <= year_max)
+            ]
+            kwargs = dict(root_wbs=root_wbs, year_min=year_min, year_max=year_max)
+            assert service.timeline_page(limit=10**6, **kwargs).entries == expected
+            first = service.timeline_page(limit=2, **kwargs)
+            assert first.entries == expected[:2]
+            if first.next_offset is not None:
+                rest = service.timeline_page(offset=first.next_offset, limit=10**6, **kwargs)
+                assert first.entries + rest.entries == expected
+
+    location = full[0]["location"]
+    scoped = service.timeline_page(root_wbs="1.3", location=location, limit=10**6).entries
+    assert scoped == [e for e in full if e["location"] == location and e["wbs"].startswith("1.3")]
+
+
+def test_as_dict_returns_copies():
+    timeline = MigrationTimeline.build(read_family_csv("data/family.csv"))
+    year, entries = next(iter(timeline.as_dict().items()))
+    entries[0]["name"] = "改名"
+    entries.clear()
+
+    assert timeline.as_dict()[year][0]["name"] != "改名"
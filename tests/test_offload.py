@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from src.offload import PoolBusyError, PoolTimeoutError, WorkPool
+
+
+def test_identical_jobs_are_coalesced():
+    pool = WorkPool(2, max_pending=2)
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    first = pool.submit("k", job)
+    second = pool.submit("k", job)
+    release.set()
+
+    assert first is second
+    assert first.result(timeout=5) == "done"
+    assert calls == [1]
+    pool.shutdown()
+
+
+def test_full_pool_rejects_new_jobs():
+    pool = WorkPool(1, max_pending=1)
+    release = threading.Event()
+    pool.submit("a", lambda: release.wait(5))
+
+    with pytest.raises(PoolBusyError):
+        pool.submit("b", lambda: None)
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while pool.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.run("b", lambda: 42, timeout=5) == 42
+    pool.shutdown()
+
+
+def test_run_times_out_without_cancelling_job():
+    pool = WorkPool(1, max_pending=2)
+    release = threading.Event()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.run("slow", lambda: release.wait(5) and "late", timeout=0.05)
+
+    future = pool.submit("slow", lambda: "other")
+    release.set()
+    assert future.result(timeout=5) == "late"
+    pool.shutdown()
@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from src.parser import read_family_csv
+from src import parser
+from src.parser import FamilyCsvError, read_family_csv
 
 
 def test_parser_rejects_invalid_wbs(tmp_path):
@@ -34,3 +37,102 @@ def test_parser_accepts_valid_csv():
     assert persons
     assert 1 in persons
     assert persons[1].wbs == "1"
+
+
+def _write_bad_csv(tmp_path):
+    csv_file = tmp_path / "bad.csv"
+    csv_file.write_text(
+        "id,wbs,name,birth_year\n"
+        "1,1,张始祖,1800\n"
+        "2,1.1,张一,abc\n"
+        "3,1,张二,1830\n"
+        "4,1.9.1,张三,1850\n",
+        encoding="utf-8",
+    )
+    return csv_file
+
+
+def test_parser_parallel_matches_serial():
+    serial = read_family_csv("data/family.csv")
+    parallel = read_family_csv("data/family.csv", workers=2, chunk_bytes=256)
+
+    assert parallel == serial
+
+
+def test_parser_parallel_bounds_chunks_in_flight(monkeypatch):
+    submitted = []
+
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args, **kwargs):
+            submitted.append(args[1])
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(parser, "ProcessPoolExecutor", CountingPool)
+    items = parser._iter_parallel("data/family.csv", 2, 64)
+
+    next(iter(items))
+    assert len(submitted) == 4
+    assert len(parser._chunk_ranges("data/family.csv", 64)[1]) > 4
+    items.close()
+
+
+def test_parser_parallel_reports_same_line_numbers(tmp_path):
+    csv_file = _write_bad_csv(tmp_path)
+
+    with pytest.raises(ValueError) as serial:
+        read_family_csv(str(csv_file))
+    with pytest.raises(ValueError) as parallel:
+        read_family_csv(str(csv_file), workers=2, chunk_bytes=16)
+
+    assert str(serial.value) == str(parallel.value)
+    assert str(serial.value).startswith("Line 3: field 'birth_year' must be integer")
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_parser_collects_all_errors(tmp_path, workers):
+    csv_file = _write_bad_csv(tmp_path)
+
+    with pytest.raises(FamilyCsvError) as exc_info:
+        read_family_csv(str(csv_file), workers=workers, chunk_bytes=16, collect_errors=True)
+
+    errors = exc_info.value.errors
+    assert errors[0].startswith("Line 3:")
+    assert errors[1] == "Line 4: duplicated wbs 1"
+    assert "parent wbs 1.9 not found" in errors[2]
+
+
+def test_parser_precomputes_integer_wbs_path():
+    persons = read_family_csv("data/family.csv")
+    person = next(p for p in persons.values() if p.wbs == "1.3")
+
+    assert person.wbs_path == (1, 3)
+    assert person.depth == 2
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_parser_reports_errors_in_original_check_order(tmp_path, workers):
+    csv_file = tmp_path / "order.csv"
+    csv_file.write_text(
+        "id,wbs,name,birth_year\n"
+        "1,1,张始祖,1800\n"
+        "2,1,张重复,abc\n"
+        "1,1.1,张一,abc\n",
+        encoding="utf-8",
+    )
+
+    with pytest.raises(FamilyCsvError) as exc_info:
+        read_family_csv(str(csv_file), workers=workers, chunk_bytes=16, collect_errors=True)
+
+    assert exc_info.value.errors == [
+        "Line 3: duplicated wbs 1",
+        "Line 4: field 'birth_year' must be integer, got 'abc'",
+    ]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_parser_rejects_rows_with_extra_fields(tmp_path, workers):
+    csv_file = tmp_path / "extra.csv"
+    csv_file.write_text("id,wbs,name\n1,1,张始祖\n2,1.1,张一,多余\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Line 3: row has 4 fields, header has 3"):
+        read_family_csv(str(csv_file), workers=workers, chunk_bytes=16)
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from src import registry as registry_module
+from src.registry import FamilyRegistry, UnknownDatasetError
+from src.repository import CsvFamilyRepository, SqliteFamilyRepository
+
+HEADER = "id,wbs,name,generation\n"
+
+
+def _registry(tmp_path, sizes, **kwargs):
+    repos = {}
+    for name, size in sizes.items():
+        path = tmp_path / f"{name}.csv"
+        rows = ["1,1,始祖,1\n"] + [f"{i},1.{i - 1},子{i},2\n" for i in range(2, size + 1)]
+        path.write_text(HEADER + "".join(rows), encoding="utf-8")
+        repos[name] = CsvFamilyRepository(path=str(path))
+    return FamilyRegistry(repos, **kwargs)
+
+
+def test_datasets_load_on_first_access(tmp_path):
+    reg = _registry(tmp_path, {"wang": 3, "li": 5})
+
+    assert reg.loaded() == []
+    assert len(reg.get("li").current.persons) == 5
+    assert reg.loaded() == ["li"]
+    assert reg.get("li") is reg.get("li")
+    with pytest.raises(UnknownDatasetError):
+        reg.get("zhao")
+
+
+def test_least_recently_used_dataset_is_evicted_over_budget(tmp_path):
+    reg = _registry(
+        tmp_path, {"a": 4, "b": 4, "c": 4}, memory_budget=10, estimate=lambda s: len(s.persons)
+    )
+    reg.pin("a")
+
+    reg.get("a")
+    reg.get("b")
+    reg.get("c")
+
+    assert reg.loaded() == ["a", "c"]
+    assert reg.total_bytes == 8
+
+
+def test_idle_datasets_are_dropped(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(registry_module.time, "monotonic", lambda: now[0])
+    reg = _registry(tmp_path, {"a": 2, "b": 2}, idle_timeout=60)
+
+    reg.get("a")
+    now[0] += 120
+    reg.get("b")
+
+    assert reg.loaded() == ["b"]
+
+
+def test_concurrent_first_access_loads_once(tmp_path, monkeypatch):
+    reg = _registry(tmp_path, {"a": 3})
+    calls = []
+    load = reg._load
+    monkeypatch.setattr(reg, "_load", lambda name: calls.append(name) or load(name))
+
+    threads = [threading.Thread(target=reg.get, args=("a",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["a"]
+
+
+def test_from_directory_names_datasets_by_stem(tmp_path):
+    _registry(tmp_path, {"wang": 2, "li": 2})
+    SqliteFamilyRepository(path=str(tmp_path / "zhao.db")).import_csv(str(tmp_path / "li.csv"))
+
+    reg = FamilyRegistry.from_directory(str(tmp_path), reload_interval=60)
+
+    assert reg.names() == ["li", "wang", "zhao"]
+    assert isinstance(reg.repositories["zhao"], SqliteFamilyRepository)
+    live = reg.get("zhao")
+    assert len(live.current.persons) == 2
+    # SQLite 数据集不启动 CSV 监视线程
+    assert live._thread is None
+    reg.close()
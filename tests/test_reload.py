@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from src.migration import MigrationTimeline
+from src.parser import read_family_csv
+from src.reload import LiveFamilyService, apply_diff, diff_persons
+from src.repository import CsvFamilyRepository
+from src.service import FamilyTreeService
+from src.store import PersonStore
+
+HEADER = "id,wbs,name,generation,birth_year,location\n"
+BASE_ROWS = [
+    "1,1,张始祖,1,1800,北京\n",
+    "2,1.1,张长子,2,1825,上海\n",
+    "3,1.2,张次子,2,1828,广州\n",
+    "4,1.1.1,张长孙,3,1850,上海\n",
+]
+
+
+def _write(path, rows):
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    # 保证 mtime 变化可被轮询发现
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _service(path):
+    return FamilyTreeService.from_persons(read_family_csv(str(path)))
+
+
+def test_diff_persons_by_id(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    _write(csv_file, BASE_ROWS)
+    old = read_family_csv(str(csv_file))
+    _write(csv_file, BASE_ROWS[:2] + ["3,1.2,张次子,2,1828,杭州\n", "5,1.3,张三子,2,1830,\n"])
+
+    diff = diff_persons(old, read_family_csv(str(csv_file)))
+
+    assert (diff.added, diff.removed, diff.changed) == ([5], [4], [3])
+
+
+def test_apply_diff_is_copy_on_write(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    _write(csv_file, BASE_ROWS)
+    old = _service(csv_file)
+    _write(csv_file, BASE_ROWS[:3] + ["5,1.2.1,张次孙,3,1855,成都\n"])
+    persons = read_family_csv(str(csv_file))
+
+    new = apply_diff(old, persons, diff_persons(old.persons, persons), data_version="v2")
+
+    assert [c.id for c in new.persons[3].children] == [5]
+    assert [c.id for c in new.persons[1].children] == [2, 3]
+    assert 4 not in new.persons and new.persons[2].children == []
+    assert new.index.contains(1, 5) and new.index.subtree_size(1) == 4
+    # 旧快照保持不变，未受影响的记录被共享
+    assert [c.id for c in old.persons[2].children] == [4]
+    assert old.index.subtree_size(1) == 4 and 5 not in old.persons
+    assert len(old.timeline) == 4
+    assert new.persons[2] is not old.persons[2]
+    assert new.data_version == "v2"
+    assert [e["wbs"] for e in new.timeline.iter_entries(location="成都")] == ["1.2.1"]
+
+
+def test_field_only_change_reuses_index(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    _write(csv_file, BASE_ROWS)
+    old = _service(csv_file)
+    _write(csv_file, BASE_ROWS[:3] + ["4,1.1.1,张长孙,3,1850,南京\n"])
+    persons = read_family_csv(str(csv_file))
+
+    new = apply_diff(old, persons, diff_persons(old.persons, persons), data_version="v2")
+
+    assert new.index is old.index
+    assert new.persons[3] is old.persons[3]
+    assert new.persons[2].children[0] is new.persons[4]
+    assert new.timeline.query(location="南京").entries[0]["name"] == "张长孙"
+    assert old.timeline.query(location="南京").entries == []
+
+
+def test_live_service_reloads_store_backed_service(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    _write(csv_file, BASE_ROWS)
+    repo = CsvFamilyRepository(str(csv_file))
+    live = LiveFamilyService(FamilyTreeService.from_store(repo.load_store()), str(csv_file))
+    before = live.current
+
+    assert live.poll() is None
+    _write(csv_file, BASE_ROWS + ["5,1.1.2,张次孙,3,1852,西安\n"])
+    diff = live.poll()
+
+    assert diff.added == [5]
+    assert live.current is not before
+    assert live.current.data_version != before.data_version
+    assert [p.id for p in live.current.subtree(root_wbs="1.1")] == [2, 4, 5]
+    assert len(before.persons) == 4
+    # 重载后仍由列式存储支撑，且与冷启动结果一致
+    assert isinstance(live.current.persons, PersonStore)
+    assert live.current.persons.version == live.current.data_version
+    cold = FamilyTreeService.from_store(repo.load_store())
+    assert list(live.current.persons) == list(cold.persons)
+    assert list(live.current.index.preorder) == list(cold.index.preorder)
+
+    _write(csv_file, BASE_ROWS + ["5,1.1.2,张次孙,3,1852,洛阳\n"])
+    live.poll()
+    assert isinstance(live.current.persons, PersonStore)
+    assert live.current.timeline.query(location="洛阳").entries[0]["wbs"] == "1.1.2"
+
+
+def test_live_service_keeps_snapshot_on_bad_data(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    _write(csv_file, BASE_ROWS)
+    live = LiveFamilyService(_service(csv_file), str(csv_file))
+    before = live.current
+
+    _write(csv_file, BASE_ROWS + ["5,1.3,张三子,3,,\n"])
+    with pytest.raises(ValueError, match="Generation mismatch"):
+        live.poll()
+
+    assert live.current is before
+    assert live.poll() is None
+
+
+def test_reloaded_timeline_matches_fresh_build(tmp_path):
+    csv_file = tmp_path / "family.csv"
+    rows = [
+        "1,1,张始祖,1,1873,北京\n",
+        "2,1.1,张长子,2,1873,上海\n",
+        "3,1.2,张次子,2,1873,上海\n",
+    ]
+    _write(csv_file, rows)
+    old = _service(csv_file)
+    assert len(old.timeline) == 3
+    _write(csv_file, ["1,1,张太祖,1,1873,北京\n"] + rows[1:])
+    persons = read_family_csv(str(csv_file))
+
+    new = apply_diff(old, persons, diff_persons(old.persons, persons), data_version="v2")
+
+    fresh = MigrationTimeline.build(persons)
+    assert new.timeline.as_dict() == fresh.as_dict()
+    assert [e["wbs"] for e in new.timeline.as_dict()[1873]] == ["1", "1.1", "1.2"]
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from src.render_cache import RenderCache, render_key
+
+
+def _writer(calls, payload="<html></html>", delay=0.0):
+    def render(path):
+        calls.append(path)
+        time.sleep(delay)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+
+    return render
+
+
+def test_render_cache_hit_reuses_file(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    calls = []
+    key = render_key("1.3", 2, "v1")
+
+    first = cache.get_or_render(key, _writer(calls))
+    second = cache.get_or_render(key, _writer(calls))
+
+    assert first == second
+    assert len(calls) == 1
+    assert (tmp_path / first).exists()
+    assert render_key("1.3", 2, "v2") != key
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), max_files=2)
+    calls = []
+    a = cache.get_or_render(render_key("a"), _writer(calls))
+    b = cache.get_or_render(render_key("b"), _writer(calls))
+    cache.get_or_render(render_key("a"), _writer(calls))
+    c = cache.get_or_render(render_key("c"), _writer(calls))
+
+    assert (tmp_path / a).exists()
+    assert not (tmp_path / b).exists()
+    assert (tmp_path / c).exists()
+    assert len(cache) == 2
+
+
+def test_render_cache_respects_byte_budget(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=150)
+    calls = []
+    for name in "abc":
+        cache.get_or_render(render_key(name), _writer(calls, payload="x" * 60))
+
+    assert cache.total_bytes <= 150
+    assert len(cache) == 2
+
+
+def test_render_cache_dedupes_concurrent_renders(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    calls = []
+    key = render_key("same")
+    results = []
+
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_render(key, _writer(calls, delay=0.05)))
+        )
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+
+def test_render_cache_adopts_files_from_previous_process(tmp_path):
+    calls = []
+    key = render_key("persisted")
+    RenderCache(str(tmp_path)).get_or_render(key, _writer(calls))
+
+    cache = RenderCache(str(tmp_path))
+    cache.get_or_render(key, _writer(calls))
+
+    assert len(calls) == 1
@@ -0,0 +1,90 @@
+import pytest
+
+from src.filter import filter_subtree
+from src.parser import read_family_csv
+from src.repository import SqliteFamilyRepository
+from src.tree import build_tree
+
+
+@pytest.fixture
+def sqlite_repo(tmp_path):
+    repo = SqliteFamilyRepository(path=str(tmp_path / "family.db"))
+    repo.import_csv("data/family.csv", batch_size=7)
+    return repo
+
+
+def test_sqlite_import_round_trips_csv(sqlite_repo):
+    persons = read_family_csv("data/family.csv")
+
+    assert sqlite_repo.load_persons() == persons
+    assert len(sqlite_repo) == len(persons)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"max_depth": 2}, {"max_depth": 10, "gen_min": 4, "gen_max": 6}],
+)
+def test_sqlite_subtree_matches_in_memory_filter(sqlite_repo, kwargs):
+    persons = read_family_csv("data/family.csv")
+    build_tree(persons)
+
+    expected = sorted(p.wbs for p in filter_subtree(persons, root_wbs="1.3", **kwargs))
+    result = sqlite_repo.subtree(root_wbs="1.3", **kwargs)
+
+    assert sorted(p.wbs for p in result) == expected
+
+
+def test_sqlite_children_and_ancestors(sqlite_repo):
+    root = sqlite_repo.find_by_wbs("1")
+    child = sqlite_repo.find_by_wbs("1.3")
+
+    assert child.wbs in {p.wbs for p in sqlite_repo.children(root.id)}
+    grandchild = sqlite_repo.children(child.id)[0]
+    assert [p.wbs for p in sqlite_repo.ancestors(grandchild.id)] == ["1.3", "1"]
+
+
+def test_sqlite_import_reports_duplicate_line(tmp_path):
+    csv_file = tmp_path / "dup.csv"
+    csv_file.write_text("id,wbs,name\n1,1,张始祖\n2,1.1,张一\n3,1.1,张二\n", encoding="utf-8")
+    repo = SqliteFamilyRepository(path=str(tmp_path / "family.db"))
+
+    with pytest.raises(ValueError, match="Line 4: duplicated wbs 1.1"):
+        repo.import_csv(str(csv_file), batch_size=2)
+    assert len(repo) == 0
+
+
+def test_sqlite_import_checks_parents(tmp_path):
+    csv_file = tmp_path / "orphan.csv"
+    csv_file.write_text("id,wbs,name\n1,1,张始祖\n2,1.2.1,张一\n", encoding="utf-8")
+    repo = SqliteFamilyRepository(path=str(tmp_path / "family.db"))
+
+    with pytest.raises(ValueError, match="parent wbs 1.2 not found"):
+        repo.import_csv(str(csv_file))
+
+
+def test_sqlite_load_store_serves_whole_family_and_branches(sqlite_repo):
+    persons = read_family_csv("data/family.csv")
+    store = sqlite_repo.load_store()
+    branch = SqliteFamilyRepository(path=sqlite_repo.path, branch="1.3").load_store()
+
+    assert list(store) == list(persons)
+    assert [store[pid].wbs for pid in store] == [p.wbs for p in persons.values()]
+    assert {p.wbs for p in branch.values()} == {
+        p.wbs for p in sqlite_repo.subtree(root_wbs="1.3")
+    }
+    roots = [p for p in branch.values() if p.parent_id is None]
+    assert [p.wbs for p in roots] == ["1.3"]
+    assert branch.version and branch.version != store.version
+
+
+def test_sqlite_keeps_csv_order_when_ids_are_not_sorted(tmp_path):
+    csv_file = tmp_path / "shuffled.csv"
+    csv_file.write_text(
+        "id,wbs,name\n9,1,张始祖\n7,1.1,张一\n3,1.2,张二\n8,2,李始祖\n", encoding="utf-8"
+    )
+    repo = SqliteFamilyRepository(path=str(tmp_path / "family.db"))
+    repo.import_csv(str(csv_file))
+
+    assert list(repo.load_persons()) == [9, 7, 3, 8]
+    assert list(repo.load_store()) == [9, 7, 3, 8]
+    assert [p.id for p in repo.children(9)] == [7, 3]
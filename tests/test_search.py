@@ -0,0 +1,67 @@
+import pytest
+
+from src import search
+from src.model import Person
+from src.search import SearchIndex, search_persons
+
+
+def _persons():
+    rows = [
+        (1, "1", "张始祖", "陕西西安", "始祖"),
+        (2, "1.1", "张三", "陕西西安", None),
+        (3, "1.2", "张三丰", "湖北武当", "道士"),
+        (4, "1.3", "李四", "北京", "迁居张家口"),
+    ]
+    return {
+        pid: Person(id=pid, parent_id=None, wbs=wbs, name=name, location=loc, note=note)
+        for pid, wbs, name, loc, note in rows
+    }
+
+
+def _search(query, limit=10):
+    persons = _persons()
+    return search_persons(persons, SearchIndex.build(persons), query, limit)
+
+
+def test_exact_name_ranks_before_prefix_and_ngram():
+    results = _search("张三")
+
+    assert [(r["id"], r["match"]) for r in results] == [(2, "exact"), (3, "prefix")]
+
+
+def test_ngram_matches_other_fields_and_verifies_substrings():
+    assert [r["id"] for r in _search("武当")] == [3]
+    assert [r["id"] for r in _search("张家")] == [4]
+    assert _search("西武") == []
+
+
+def test_wbs_lookup_and_limit():
+    assert _search("1.2")[0] == {
+        "id": 3,
+        "wbs": "1.2",
+        "name": "张三丰",
+        "generation": 2,
+        "location": "湖北武当",
+        "match": "wbs",
+    }
+    assert len(_search("张", limit=2)) == 2
+    assert _search("  ") == []
+
+
+@pytest.mark.skipif(search.lazy_pinyin is None, reason="pypinyin not installed")
+def test_pinyin_full_and_initials():
+    assert _search("zhangsan")[0]["id"] == 2
+    assert {r["id"] for r in _search("zs")} >= {2, 3}
+
+
+def test_unverified_ngram_candidates_do_not_shrink_results():
+    # 前 10 人含 "ab" 与 "bc" 两个二元组但不含子串 "abc"
+    persons = {
+        pid: Person(id=pid, parent_id=None, wbs=f"1.{pid}", name=f"bcab{pid}")
+        for pid in range(1, 11)
+    }
+    persons[11] = Person(id=11, parent_id=None, wbs="1.11", name="xabcx")
+
+    results = search_persons(persons, SearchIndex.build(persons), "abc", limit=1)
+
+    assert [r["id"] for r in results] == [11]
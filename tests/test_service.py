@@ -1,5 +1,8 @@
+import pytest
+
 from src.parser import read_family_csv
 from src.service import FamilyTreeService
+from src.store import PersonStore
 
 
 def test_service_subtree_payload_contains_nodes_and_edges():
@@ -11,3 +14,33 @@ def test_service_subtree_payload_contains_nodes_and_edges():
     assert "nodes" in payload
     assert "edges" in payload
     assert payload["nodes"]
+
+
+def test_children_page_counts_descendants_and_paginates():
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    root = service.find_by_wbs("1")
+
+    first = service.children_page("1", limit=2)
+    rest = service.children_page("1", limit=100, cursor=first["next_cursor"])
+
+    children = first["nodes"] + rest["nodes"]
+    assert [n["id"] for n in children] == [c.id for c in root.children]
+    assert first["total"] == len(root.children)
+    assert rest["next_cursor"] is None
+    total = sum(n["descendant_count"] + 1 for n in children)
+    assert total == service.index.subtree_size(root.id) - 1
+    for node in children:
+        assert node["has_children"] == bool(service.persons[node["id"]].children)
+
+
+def test_store_children_page_slices_child_range():
+    expected = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    store = PersonStore.from_persons(read_family_csv("data/family.csv"))
+    service = FamilyTreeService.from_store(store)
+    total = len(expected.find_by_wbs("1").children)
+
+    for cursor in (None, "c1", "c2", f"c{total}"):
+        page = service.children_page("1", limit=2, cursor=cursor)
+        assert page == expected.children_page("1", limit=2, cursor=cursor)
+    with pytest.raises(ValueError, match="cursor out of range"):
+        service.children_page("1", cursor=f"c{total + 1}")
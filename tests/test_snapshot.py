@@ -0,0 +1,86 @@
+import os
+import shutil
+
+from src.parser import read_family_csv
+from src.repository import CsvFamilyRepository
+from src.service import FamilyTreeService
+from src.snapshot import load_snapshot, source_key, write_snapshot
+from src.store import PersonStore
+
+
+def _copy_sample(tmp_path):
+    csv_path = tmp_path / "family.csv"
+    shutil.copy("data/family.csv", csv_path)
+    return str(csv_path)
+
+
+def test_repository_writes_and_reuses_snapshot(tmp_path, monkeypatch):
+    csv_path = _copy_sample(tmp_path)
+    repo = CsvFamilyRepository(path=csv_path)
+
+    first = repo.load_store()
+    assert os.path.exists(f"{csv_path}.snap")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV should not be re-parsed")
+
+    monkeypatch.setattr("src.repository.read_family_csv", fail)
+    second = repo.load_store()
+
+    assert list(second) == list(first)
+    assert [p.wbs_path for p in second.values()] == [p.wbs_path for p in first.values()]
+    expected = FamilyTreeService.from_persons(read_family_csv(csv_path))
+    service = FamilyTreeService.from_store(second, validated=True)
+    assert service.subtree_payload(root_wbs="1", max_depth=10) == expected.subtree_payload(
+        root_wbs="1", max_depth=10
+    )
+
+
+def test_snapshot_is_rebuilt_when_csv_changes(tmp_path):
+    csv_path = _copy_sample(tmp_path)
+    repo = CsvFamilyRepository(path=csv_path)
+    before = len(repo.load_store())
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("999,1.99,张新,M,1900,,2,张氏,陕西西安,\n")
+
+    assert len(repo.load_store()) == before + 1
+
+
+def test_snapshot_survives_touch_without_content_change(tmp_path, monkeypatch):
+    csv_path = _copy_sample(tmp_path)
+    repo = CsvFamilyRepository(path=csv_path)
+    repo.load_store()
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    monkeypatch.setattr("src.repository.read_family_csv", lambda *a, **k: {})
+    assert len(repo.load_store()) > 0
+
+
+def test_snapshot_round_trips_strings_containing_nul(tmp_path):
+    csv_path = _copy_sample(tmp_path)
+    persons = read_family_csv(csv_path)
+    persons[1].note = "始\0祖"
+    store = PersonStore.from_persons(persons)
+    snap = str(tmp_path / "family.snap")
+    write_snapshot(store, snap, source_key(csv_path))
+
+    loaded = load_snapshot(snap, csv_path)
+
+    assert loaded is not None
+    assert loaded[1].note == "始\0祖"
+    assert [p.name for p in loaded.values()] == [p.name for p in persons.values()]
+
+
+def test_truncated_snapshot_is_ignored_and_rebuilt(tmp_path):
+    csv_path = _copy_sample(tmp_path)
+    repo = CsvFamilyRepository(path=csv_path)
+    expected = list(repo.load_store())
+    snap = f"{csv_path}.snap"
+    with open(snap, "r+b") as f:
+        f.truncate(os.path.getsize(snap) // 2)
+
+    assert load_snapshot(snap, csv_path) is None
+    assert list(repo.load_store()) == expected
+    assert load_snapshot(snap, csv_path) is not None
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from array import array
+
+import pytest
+
+from src import stats
+from src.parser import read_family_csv
+from src.service import FamilyTreeService
+from src.stats import FamilyStats
+
+
+def _service():
+    return FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+
+
+def test_summary_matches_a_plain_loop_over_the_subtree():
+    service = _service()
+    root = service.find_by_wbs("1.3")
+    members = [service.persons[pid] for pid in service.index.subtree_ids(root.id)]
+
+    summary = service.stats("1.3")
+
+    spans = [
+        p.death_year - p.birth_year
+        for p in members
+        if p.birth_year is not None and p.death_year is not None
+    ]
+    assert summary["total"] == len(members)
+    assert summary["gender"]["male"] == sum(p.gender == "M" for p in members)
+    assert summary["lifespan"]["count"] == len(spans)
+    assert summary["lifespan"]["max"] == max(spans)
+    by_gen = {g["generation"]: g["count"] for g in summary["generations"]}
+    assert sum(by_gen.values()) == len(members)
+    assert by_gen[root.generation] == 1
+    born_1900s = [p for p in members if p.birth_year is not None and p.birth_year <= 1909]
+    alive_1900 = sum(p.death_year is None or p.death_year >= 1900 for p in born_1900s)
+    decades = {d["decade"]: d["count"] for d in summary["living_by_decade"]}
+    assert decades[1900] == alive_1900
+
+
+def test_summary_is_memoized_per_snapshot_and_rejects_unknown_root():
+    service = _service()
+
+    assert service.stats() is service.stats()
+    assert service.stats()["total"] == len(service.persons)
+    assert service.stats(top_locations=2)["locations"][0] == service.stats()["locations"][0]
+    with pytest.raises(ValueError):
+        service.stats("9.9")
+
+
+@pytest.mark.skipif(not stats.HAVE_NUMPY, reason="numpy not installed")
+def test_numpy_and_python_aggregates_agree():
+    service = _service()
+    family = FamilyStats(service.persons, service.index)
+    entry = service.index.entry[service.index.id_for_wbs("1.3")]
+    cols = [col[entry:] for col in family.columns]
+    plain = [array("b" if col.dtype.itemsize == 1 else "q", col.tolist()) for col in cols]
+
+    vectorized = stats._aggregate_numpy(*cols, family.location_names, 5)
+    looped = stats._aggregate_python(*plain, family.location_names, 5)
+
+    assert json.dumps(vectorized) == json.dumps(looped)
+
+
+def test_concurrent_first_requests_build_stats_once(monkeypatch):
+    service = _service()
+    built = []
+
+    class CountingStats(FamilyStats):
+        def __init__(self, persons, index):
+            built.append(1)
+            time.sleep(0.05)
+            super().__init__(persons, index)
+
+    monkeypatch.setattr("src.service.FamilyStats", CountingStats)
+    threads = [threading.Thread(target=service.stats) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert built == [1]
@@ -0,0 +1,72 @@
+from src.index import FamilyIndex
+from src.migration import build_migration_timeline
+from src.parser import read_family_csv
+from src.service import FamilyTreeService
+from src.store import PersonStore
+
+FIELDS = (
+    "id",
+    "parent_id",
+    "wbs",
+    "name",
+    "gender",
+    "birth_year",
+    "death_year",
+    "generation",
+    "clan_name",
+    "location",
+    "note",
+    "depth",
+    "wbs_path",
+)
+
+
+def test_store_views_match_person_records():
+    persons = read_family_csv("data/family.csv")
+    store = PersonStore.from_persons(persons)
+
+    assert len(store) == len(persons)
+    for pid, person in persons.items():
+        view = store[pid]
+        for attr in FIELDS:
+            assert getattr(view, attr) == getattr(person, attr)
+    assert 10**9 not in store
+
+
+def test_service_from_store_matches_dict_backed_service():
+    persons = read_family_csv("data/family.csv")
+    expected = FamilyTreeService.from_persons(persons)
+    store = PersonStore.from_persons(read_family_csv("data/family.csv"))
+    service = FamilyTreeService.from_store(store)
+
+    assert service.subtree_payload(root_wbs="1.3", max_depth=3) == expected.subtree_payload(
+        root_wbs="1.3", max_depth=3
+    )
+    assert [p.wbs for p in service.roots()] == [p.wbs for p in expected.roots()]
+    assert build_migration_timeline(service.persons) == expected.migration_timeline()
+
+
+def test_store_keeps_file_order_and_array_index_matches_dict_index(tmp_path):
+    csv_file = tmp_path / "unordered.csv"
+    csv_file.write_text(
+        "id,wbs,name\n"
+        "30,2,李始祖\n"
+        "5,1,张始祖\n"
+        "40,1.2,张二\n"
+        "7,1.1,张一\n"
+        "9,2.1,李一\n",
+        encoding="utf-8",
+    )
+    persons = read_family_csv(str(csv_file))
+    store = PersonStore.from_persons(read_family_csv(str(csv_file)))
+    service = FamilyTreeService.from_store(store)
+    expected = FamilyTreeService.from_persons(persons).index
+    index = FamilyIndex.from_store(store)
+
+    assert list(store) == [30, 5, 40, 7, 9]
+    assert [p.wbs for p in service.roots()] == ["2", "1"]
+    assert list(index.preorder) == expected.preorder
+    for wbs, pid in expected.wbs_to_id.items():
+        assert index.id_for_wbs(wbs) == pid
+        assert (index.entry[pid], index.exit[pid]) == (expected.entry[pid], expected.exit[pid])
+    assert "1.3" not in index.wbs_to_id
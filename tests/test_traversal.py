@@ -0,0 +1,82 @@
+import sys
+
+import pytest
+
+from src.filter import filter_subtree
+from src.model import Person
+from src.parser import read_family_csv
+from src.service import FamilyTreeService
+from src.traversal import iter_subtree, page_subtree
+from src.tree import build_tree
+
+
+def _chain(length):
+    persons = {}
+    wbs = "1"
+    for pid in range(1, length + 1):
+        parent_id = pid - 1 if pid > 1 else None
+        persons[pid] = Person(id=pid, parent_id=parent_id, wbs=wbs, name=f"P{pid}")
+        wbs += ".1"
+    build_tree(persons)
+    return persons
+
+
+def test_iter_subtree_handles_lineages_deeper_than_recursion_limit():
+    persons = _chain(sys.getrecursionlimit() + 100)
+
+    result = filter_subtree(persons, root_id=1)
+
+    assert len(result) == len(persons)
+
+
+def test_iter_subtree_bfs_orders_by_depth_and_respects_budget():
+    persons = read_family_csv("data/family.csv")
+    build_tree(persons)
+
+    nodes = list(iter_subtree(persons[1], order="bfs", max_nodes=10))
+
+    assert len(nodes) == 10
+    depths = [p.depth for p in nodes]
+    assert depths == sorted(depths)
+
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_pages_concatenate_to_full_subtree(order):
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    root = service.find_by_wbs("1.3")
+    full = list(service.iter_subtree(root_id=root.id, order=order))
+
+    collected = []
+    cursor = None
+    while True:
+        page = page_subtree(
+            service.persons, root, limit=4, cursor=cursor, order=order, index=service.index
+        )
+        collected.extend(page.nodes)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert collected == full
+
+
+def test_paged_payload_links_edges_across_pages():
+    service = FamilyTreeService.from_persons(read_family_csv("data/family.csv"))
+    full = service.subtree_payload(root_wbs="1", max_depth=3)
+
+    first = service.subtree_payload(root_wbs="1", max_depth=3, limit=5)
+    second = service.subtree_payload(
+        root_wbs="1", max_depth=3, limit=100, cursor=first["next_cursor"]
+    )
+
+    assert second["next_cursor"] is None
+    assert first["nodes"] + second["nodes"] == full["nodes"]
+    assert first["edges"] + second["edges"] == full["edges"]
+
+
+def test_page_subtree_rejects_bad_cursor():
+    persons = read_family_csv("data/family.csv")
+    build_tree(persons)
+
+    with pytest.raises(ValueError, match="invalid cursor"):
+        page_subtree(persons, persons[1], limit=5, cursor="bogus")
@@ -0,0 +1,100 @@
+import pytest
+
+from src.model import Person
+from src.parser import CsvRowError, read_family_csv
+from src.validate import validate_family
+
+
+def _persons():
+    rows = [
+        (1, None, "1", "始祖", 1),
+        (2, 1, "1.1", "长子", 3),  # 世代错误
+        (3, 99, "1.2", "次子", 2),  # 父节点不存在
+        (4, 1, "2.1", "外人", 2),  # WBS 不在父节点之下
+    ]
+    return {
+        pid: Person(id=pid, parent_id=parent, wbs=wbs, name=name, generation=gen)
+        for pid, parent, wbs, name, gen in rows
+    }
+
+
+def test_validate_raises_first_violation():
+    with pytest.raises(ValueError, match="Generation mismatch for 长子"):
+        validate_family(_persons())
+
+
+def test_validate_report_collects_all_violations():
+    result = validate_family(_persons(), report=True)
+
+    assert result is not None and not result.ok
+    assert [v.code for v in result.violations] == [
+        "generation_mismatch",
+        "parent_missing",
+        "wbs_parent_mismatch",
+    ]
+    assert [v.person_id for v in result.violations] == [2, 3, 4]
+
+
+def test_validate_parallel_matches_serial(monkeypatch):
+    monkeypatch.setattr("src.validate.VALIDATE_CHUNK_SIZE", 1)
+
+    serial = validate_family(_persons(), report=True)
+    parallel = validate_family(_persons(), report=True, workers=2)
+
+    assert parallel == serial
+
+
+def test_validate_parallel_raises_first_violation(monkeypatch):
+    monkeypatch.setattr("src.validate.VALIDATE_CHUNK_SIZE", 1)
+
+    assert validate_family(read_family_csv("data/family.csv"), workers=2) is None
+    with pytest.raises(ValueError, match="Generation mismatch for 长子"):
+        validate_family(_persons(), workers=2)
+
+
+def test_validate_reports_duplicated_wbs():
+    persons = _persons()
+    persons[5] = Person(id=5, parent_id=1, wbs="1.1", name="重号", generation=2)
+
+    result = validate_family(persons, report=True)
+
+    # 按文件顺序逐人检查：前面行的世代错误先于后面的重复 WBS
+    assert [v.code for v in result.violations][-1] == "duplicated_wbs"
+    assert result.violations[-1].person_id == 5
+    with pytest.raises(ValueError, match="Generation mismatch for 长子"):
+        validate_family(persons)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_duplicated_wbs_is_raised_at_its_row(monkeypatch, workers):
+    monkeypatch.setattr("src.validate.VALIDATE_CHUNK_SIZE", 1)
+    persons = {
+        1: Person(id=1, parent_id=None, wbs="1", name="始祖", generation=1),
+        2: Person(id=2, parent_id=1, wbs="1.1", name="长子", generation=2),
+        3: Person(id=3, parent_id=1, wbs="1.1", name="重号", generation=2),
+        4: Person(id=4, parent_id=1, wbs="1.2", name="次子", generation=5),
+    }
+
+    with pytest.raises(ValueError, match="Duplicated WBS: 1.1"):
+        validate_family(persons, workers=workers)
+    result = validate_family(persons, workers=workers, report=True)
+    assert [(v.code, v.person_id) for v in result.violations] == [
+        ("duplicated_wbs", 3),
+        ("generation_mismatch", 4),
+    ]
+
+
+def test_fused_parse_reports_generation_line(tmp_path):
+    csv_file = tmp_path / "gen.csv"
+    csv_file.write_text(
+        "id,wbs,name,generation\n"
+        "1,1,张始祖,1\n"
+        "2,1.1,张二,3\n",
+        encoding="utf-8",
+    )
+
+    read_family_csv(str(csv_file))
+    with pytest.raises(CsvRowError, match="Line 3: Generation mismatch"):
+        read_family_csv(str(csv_file), validate=True)
+    with pytest.raises(CsvRowError, match="Line 3: Generation mismatch"):
+        read_family_csv(str(csv_file), validate=True, workers=2, chunk_bytes=8)
@@ -1,7 +1,12 @@
+import json
+import re
+
+import pytest
+
 from src.filter import filter_subtree
 from src.parser import read_family_csv
 from src.tree import build_tree
-from src.visualize import visualize_family
+from src.visualize import VisualizationConfig, visualize_family
 
 
 def test_visualize_non_root_subtree_does_not_require_external_parent(tmp_path):
@@ -14,3 +19,40 @@ def test_visualize_non_root_subtree_does_not_require_external_parent(tmp_path):
     visualize_family(subset, str(out), lineage_path="data/lineage.yaml")
 
     assert out.exists()
+
+
+def _datasets(html):
+    arrays = re.findall(r"new vis\.DataSet\((\[.*?\])\);", html, re.S)
+    return [json.loads(array) for array in arrays]
+
+
+def test_native_backend_matches_pyvis_graph(tmp_path):
+    persons = read_family_csv("data/family.csv")
+    build_tree(persons)
+    subset = filter_subtree(persons, root_wbs="1.3", max_depth=2)
+    native_out = tmp_path / "native.html"
+    pyvis_out = tmp_path / "pyvis.html"
+
+    visualize_family(subset, str(native_out), lineage_path="data/lineage.yaml")
+    visualize_family(
+        subset,
+        str(pyvis_out),
+        lineage_path="data/lineage.yaml",
+        config=VisualizationConfig(backend="pyvis"),
+    )
+
+    native_html = native_out.read_text(encoding="utf-8")
+    pyvis_html = pyvis_out.read_text(encoding="utf-8")
+    native_nodes, native_edges = _datasets(native_html)
+    pyvis_nodes, pyvis_edges = _datasets(pyvis_html)
+    integrity = re.compile(r'integrity="(sha512-[^"]+)"')
+    assert integrity.findall(native_html) == integrity.findall(pyvis_html)[:2]
+    assert native_html.count('crossorigin="anonymous"') == 2
+    assert native_nodes == pyvis_nodes
+    assert native_edges == pyvis_edges
+    assert len(native_nodes) == len(subset)
+
+
+def test_visualize_rejects_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="backend"):
+        visualize_family([], str(tmp_path / "x.html"), config=VisualizationConfig(backend="svg"))
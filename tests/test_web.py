@@ -1,5 +1,13 @@
+import gzip
+import json
+import threading
+
 import pytest
 
+from src.lineage import LineageSystem
+from src.parser import read_family_csv
+from src.repository import SqliteFamilyRepository
+from src.service import FamilyTreeService
 from web.app import _parse_depth, create_app
 
 
@@ -36,3 +44,341 @@ def test_form_state_is_preserved_after_submit():
     assert resp.status_code == 200
     assert 'value="1.3" selected' in html
     assert 'name="depth" value="4"' in html
+
+
+def test_tree_api_paginates_with_cursor():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    first = client.get("/api/tree?root_wbs=1&depth=10&limit=5").get_json()
+    second = client.get(f"/api/tree?root_wbs=1&depth=10&limit=5&cursor={first['next_cursor']}")
+
+    assert len(first["nodes"]) == 5
+    assert second.status_code == 200
+    ids = {n["id"] for n in first["nodes"]}
+    assert ids.isdisjoint(n["id"] for n in second.get_json()["nodes"])
+
+
+def test_tree_api_rejects_bad_limit():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    resp = client.get("/api/tree?root_wbs=1&limit=0")
+
+    assert resp.status_code == 400
+
+
+def test_timeline_api_returns_window():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    resp = client.get("/api/timeline?year_min=1850&year_max=1900&limit=5")
+
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data["entries"]) <= 5
+    assert all(1850 <= e["year"] <= 1900 for e in data["entries"])
+
+
+def test_web_serves_reloaded_snapshot(monkeypatch):
+    app, service, _ = create_app()
+    live = app.extensions["family_live"]
+    persons = read_family_csv("data/family.csv")
+    reloaded = FamilyTreeService.from_persons(
+        {pid: p for pid, p in persons.items() if not (p.wbs + ".").startswith("1.3.")}
+    )
+    reloaded.data_version = "reloaded"
+    monkeypatch.setattr(live, "_current", reloaded)
+    client = app.test_client()
+
+    resp = client.get("/api/tree?root_wbs=1.3&depth=2")
+
+    assert resp.status_code == 400
+    assert live.current is not service
+
+
+def test_tree_api_returns_503_when_pool_is_full():
+    app, _, _ = create_app()
+    api_pool = app.extensions["family_pools"]["api"]
+    release = threading.Event()
+    for i in range(api_pool.max_pending):
+        api_pool.submit(f"block-{i}", lambda: release.wait(5))
+    client = app.test_client()
+
+    resp = client.get("/api/tree?root_wbs=1&depth=2")
+    release.set()
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_children_api_supports_graph_view_and_bad_cursor():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    resp = client.get("/api/nodes/1.3/children?view=graph&limit=1")
+    bad = client.get("/api/nodes/1.3/children?cursor=zz")
+
+    assert resp.status_code == 200
+    data = resp.get_json()
+    node = data["nodes"][0]
+    assert {"label", "title", "color", "level", "wbs", "has_children"} <= node.keys()
+    assert data["next_cursor"] == "c1"
+    assert bad.status_code == 400
+
+
+def test_lazy_form_renders_expandable_graph():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    resp = client.post("/", data={"root_wbs": "1", "depth": "1", "lazy": "1"})
+
+    html = resp.data.decode("utf-8")
+    assert 'name="lazy" value="1" checked' in html
+    graph_file = html.split('src="/static/')[1].split('"')[0]
+    graph = client.get(f"/static/{graph_file}").data.decode("utf-8")
+    assert '"expandable": true' in graph
+    assert "/api/nodes/" in graph
+
+
+def test_tree_api_etag_and_gzip():
+    app, service, _ = create_app()
+    client = app.test_client()
+    url = "/api/tree?root_wbs=1&depth=10"
+
+    first = client.get(url, headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    again = client.get(url, headers={"If-None-Match": etag})
+    other = client.get("/api/tree?root_wbs=1&depth=3", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["Vary"]
+    assert json.loads(gzip.decompress(first.data)) == service.subtree_payload(
+        root_wbs="1", max_depth=10, lineage=LineageSystem.load("data/lineage.yaml")
+    )
+    assert again.status_code == 304 and again.data == b""
+    assert other.status_code == 200
+
+
+def test_kinship_endpoints():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    single = client.get("/api/kinship?a=1.1&b=1.3")
+    batch = client.post("/api/kinship/batch", json={"pairs": [["1.1", "1.3"], ["1", "1.1"]]})
+    bad = client.post("/api/kinship/batch", json={"pairs": "1.1"})
+
+    assert single.status_code == 200
+    assert single.get_json()["lca"] == "1"
+    assert [r["label"] for r in batch.get_json()["results"]] == [
+        single.get_json()["label"],
+        "儿子",
+    ]
+    assert bad.status_code == 400
+
+
+def test_search_api_ranks_and_limits():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    resp = client.get("/api/search?q=张三&limit=3")
+    bad = client.get("/api/search?q=张&limit=500")
+
+    results = resp.get_json()["results"]
+    assert results[0]["name"] == "张三"
+    assert len(results) <= 3
+    assert bad.status_code == 400
+
+
+def test_index_page_does_not_embed_population_or_full_timeline():
+    app, service, _ = create_app()
+    client = app.test_client()
+
+    html = client.get("/").data.decode("utf-8")
+
+    assert html.count("<option") == 1
+    assert html.count('class="timeline-item"') == min(len(service.timeline), 50)
+    assert "/api/search" in html
+
+
+def test_metrics_endpoint_reports_requests_and_stages():
+    app, _, _ = create_app()
+    client = app.test_client()
+
+    client.get("/api/tree?root_wbs=1.3&depth=3")
+    resp = client.get("/metrics")
+
+    text = resp.data.decode("utf-8")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain")
+    assert 'family_http_requests_total{endpoint="/api/tree",method="GET",status="200"}' in text
+    assert 'family_stage_seconds_count{stage="subtree_payload"}' in text
+    assert 'family_pool_pending{pool="api"} 0' in text
+
+
+def test_gauges_are_scoped_to_their_app(tmp_path):
+    extra = tmp_path / "extra.csv"
+    extra.write_text("id,wbs,name,generation\n1,1,始祖,1\n", encoding="utf-8")
+    first, _, _ = create_app()
+    second, _, _ = create_app(datasets={"extra": str(extra)})
+    second.extensions["family_registry"].get("extra")
+
+    first_text = first.test_client().get("/metrics").data.decode("utf-8")
+    second_text = second.test_client().get("/metrics").data.decode("utf-8")
+
+    assert "family_datasets_loaded 1\n" in first_text
+    assert "family_datasets_loaded 2\n" in second_text
+    assert first_text.count("# TYPE family_persons gauge") == 1
+
+
+@pytest.mark.parametrize("mode", ["cpu", "memory"])
+def test_profile_header_writes_report(mode):
+    app, _, _ = create_app(profiling=True)
+    client = app.test_client()
+
+    resp = client.get("/api/tree?root_wbs=1.3&depth=2&limit=7", headers={"X-Profile": mode})
+    plain = create_app()[0].test_client().get("/api/tree?root_wbs=1.3", headers={"X-Profile": mode})
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Profile-Report"].endswith(f"-{mode}.txt")
+    assert "X-Profile-Report" not in plain.headers
+
+
+def test_stats_api_scopes_to_subtree_and_revalidates():
+    app, service, _ = create_app()
+    client = app.test_client()
+
+    whole = client.get("/api/stats")
+    branch = client.get("/api/stats?root_wbs=1.3&top_locations=3")
+    again = client.get("/api/stats", headers={"If-None-Match": whole.headers["ETag"]})
+    bad = client.get("/api/stats?top_locations=0")
+
+    assert whole.get_json()["total"] == len(service.persons)
+    assert branch.get_json()["root"] == "1.3"
+    assert len(branch.get_json()["locations"]) <= 3
+    assert again.status_code == 304
+    assert bad.status_code == 400
+
+
+def test_api_routes_select_dataset(tmp_path):
+    extra = tmp_path / "li.csv"
+    extra.write_text("id,wbs,name,generation\n1,1,李始祖,1\n2,1.1,李长子,2\n", encoding="utf-8")
+    app, _, _ = create_app(datasets={"li": str(extra)})
+    client = app.test_client()
+
+    listed = client.get("/api/datasets").get_json()
+    tree = client.get("/api/tree?dataset=li&root_wbs=1")
+    children = client.get("/api/datasets/li/nodes/1/children")
+    missing = client.get("/api/search?dataset=zhao&q=张")
+
+    assert {d["name"] for d in listed["datasets"]} == {"default", "li"}
+    assert {n["name"] for n in tree.get_json()["nodes"]} == {"李始祖", "李长子"}
+    assert [n["name"] for n in children.get_json()["nodes"]] == ["李长子"]
+    assert missing.status_code == 404
+    assert app.extensions["family_registry"].loaded() == ["default", "li"]
+
+
+def test_datasets_can_be_served_from_sqlite(tmp_path):
+    db_path = str(tmp_path / "family.db")
+    SqliteFamilyRepository(path=db_path).import_csv("data/family.csv")
+    app, _, _ = create_app(
+        datasets={
+            "db": db_path,
+            "branch": SqliteFamilyRepository(path=db_path, branch="1.3"),
+        }
+    )
+    client = app.test_client()
+
+    whole = client.get("/api/tree?dataset=db&root_wbs=1&depth=1").get_json()
+    branch = client.get("/api/tree?dataset=branch&root_wbs=1.3&depth=1").get_json()
+    outside = client.get("/api/tree?dataset=branch&root_wbs=1.2")
+
+    assert {n["wbs"] for n in whole["nodes"]} >= {"1", "1.3"}
+    assert "1.3" in {n["wbs"] for n in branch["nodes"]}
+    assert outside.status_code == 400
+
+
+def test_search_and_tree_carry_annotated_names():
+    app, service, _ = create_app()
+    client = app.test_client()
+    lineage = LineageSystem.load("data/lineage.yaml")
+    person = service.find_by_wbs("1.3")
+
+    hit = client.get("/api/search?q=1.3").get_json()["results"][0]
+    node = client.get("/api/tree?root_wbs=1.3&depth=0").get_json()["nodes"][0]
+
+    expected = lineage.annotate_name(person.name, person.generation or person.depth)
+    assert hit["display_name"] == node["display_name"] == expected
+
+
+def test_export_api_streams_attachment():
+    app, service, _ = create_app()
+    client = app.test_client()
+
+    resp = client.get("/api/export?format=csv&root_wbs=1.3")
+    bad = client.get("/api/export?format=xml")
+
+    assert resp.is_streamed
+    assert resp.headers["Content-Type"].startswith("text/csv")
+    assert 'filename="family-default-1.3.csv"' in resp.headers["Content-Disposition"]
+    lines = resp.get_data(as_text=True).splitlines()
+    assert len(lines) == 1 + service.index.subtree_size(service.find_by_wbs("1.3").id)
+    assert bad.status_code == 400
+
+
+def test_asgi_bridge_runs_requests_concurrently():
+    pytest.importorskip("asgiref")
+    import asyncio
+    import time
+
+    from web.asgi import ThreadedWsgiToAsgi
+
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            yield b"ok"
+
+        def close(self):
+            closed.append(True)
+
+    def slow_app(environ, start_response):
+        time.sleep(0.2)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return Body()
+
+    bridge = ThreadedWsgiToAsgi(slow_app, threads=8)
+
+    async def call():
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "http_version": "1.1",
+            "headers": [],
+        }
+        await bridge(scope, receive, send)
+        return sent
+
+    async def main():
+        return await asyncio.gather(*(call() for _ in range(8)))
+
+    start = time.perf_counter()
+    responses = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+
+    # 串行执行需 1.6 秒；并发时接近单个请求的耗时
+    assert elapsed < 0.8
+    assert all(sent[0]["status"] == 200 for sent in responses)
+    assert all(b"".join(m.get("body", b"") for m in sent[1:]) == b"ok" for sent in responses)
+    assert len(closed) == 8
@@ -1,22 +1,68 @@
+import hashlib
 import logging
 import os
 import shutil
 import sys
 import tempfile
-import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, replace
 from pathlib import Path
-from typing import Tuple
+from typing import Callable, Dict, Mapping, Optional, Tuple, TypeVar, Union
+from urllib.parse import quote
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
+from markupsafe import Markup
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.export import CONTENT_TYPES, FILE_EXTENSIONS, export_family
+from src.lineage import LineageSystem
+from src.metrics import MetricsRegistry
+from src.model import Person
+from src.offload import PoolBusyError, PoolTimeoutError, WorkPool
+from src.registry import (
+    DEFAULT_MEMORY_BUDGET,
+    DatasetRepository,
+    FamilyRegistry,
+    UnknownDatasetError,
+    open_repository,
+)
+from src.render_cache import RenderCache, render_key
 from src.repository import CsvFamilyRepository
 from src.service import FamilyTreeService
-from src.visualize import visualize_family
+from src.stats import DEFAULT_TOP_LOCATIONS
+from src.visualize import VisualizationConfig, vis_node, visualize_family
+from web.http_cache import (
+    RESPONSE_CACHE_MAX_BYTES,
+    EncodedResponseCache,
+    choose_encoding,
+    dumps_json,
+    make_etag,
+)
+from web.instrumentation import install_instrumentation, profiling_active
 
 MIN_DEPTH = 0
 MAX_DEPTH = 10
+MAX_PAGE_SIZE = 5000
+CHILDREN_PAGE_SIZE = 200
+MAX_KINSHIP_PAIRS = 10000
+MAX_SEARCH_RESULTS = 50
+MAX_TOP_LOCATIONS = 100
+TIMELINE_PAGE_SIZE = 50
+FRAGMENT_CACHE_SIZE = 16
+LAZY_CHILDREN_URL = "/api/nodes/"
+DEFAULT_DATASET = "default"
+RENDER_CACHE_MAX_FILES = 200
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RENDER_WORKERS = 2
+RENDER_MAX_PENDING = 16
+RENDER_TIMEOUT = 30.0
+API_WORKERS = 8
+API_MAX_PENDING = 64
+API_TIMEOUT = 10.0
+
+T = TypeVar("T")
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +116,75 @@ def _parse_depth(value: str) -> int:
     return depth
 
 
-def create_app() -> Tuple[Flask, FamilyTreeService, str]:
+def _parse_limit(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("limit 必须是整数") from exc
+
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise ValueError(f"limit 必须在 1 到 {MAX_PAGE_SIZE} 之间")
+    return limit
+
+
+def _parse_optional_int(value: Optional[str], name: str) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} 必须是整数") from exc
+
+
+def _cacheable_response(
+    body: Optional[bytes], etag: str, encoding: Optional[str] = None
+) -> Response:
+    """JSON response that clients must revalidate; ``body=None`` means 304."""
+    if body is None:
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+def create_app(
+    render_cache_max_files: int = RENDER_CACHE_MAX_FILES,
+    render_cache_max_bytes: int = RENDER_CACHE_MAX_BYTES,
+    response_cache_max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+    reload_interval: Optional[float] = None,
+    render_workers: int = RENDER_WORKERS,
+    render_max_pending: int = RENDER_MAX_PENDING,
+    render_timeout: float = RENDER_TIMEOUT,
+    api_workers: int = API_WORKERS,
+    api_max_pending: int = API_MAX_PENDING,
+    api_timeout: float = API_TIMEOUT,
+    profiling: bool = False,
+    profile_sample_rate: float = 0.0,
+    datasets: Optional[Mapping[str, Union[str, DatasetRepository]]] = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    dataset_idle_timeout: Optional[float] = None,
+) -> Tuple[Flask, FamilyTreeService, str]:
+    """Build the web app; with `reload_interval` the CSV is watched for edits.
+
+    Graph renders and `/api/tree` payloads run on separate bounded pools, so
+    queued heavy renders never hold up JSON requests. A full queue answers
+    503 and a request that outlives its timeout answers 504. Request and
+    pipeline-stage metrics are served on ``/metrics``; `profiling` lets a
+    request ask for a cProfile/tracemalloc report (see `web.instrumentation`).
+
+    `datasets` maps extra dataset names to repositories or file paths (CSV,
+    or SQLite for ``.sqlite``/``.db``); routes pick one with the ``dataset``
+    parameter and the bundled family is ``"default"``. Extra
+    families load on first use and are evicted under `memory_budget` or after
+    `dataset_idle_timeout` seconds idle (see `FamilyRegistry`).
+    """
     _configure_logging()
 
     bundle_root = _bundle_root()
@@ -85,11 +199,90 @@ def create_app() -> Tuple[Flask, FamilyTreeService, str]:
         static_url_path="/static",
     )
 
-    repo = CsvFamilyRepository(path=str(bundle_root / "data" / "family.csv"))
-    service = FamilyTreeService.from_persons(repo.load_persons())
+    repositories: Dict[str, DatasetRepository] = {
+        DEFAULT_DATASET: CsvFamilyRepository(path=str(bundle_root / "data" / "family.csv"))
+    }
+    for name, source in (datasets or {}).items():
+        repositories[name] = open_repository(source) if isinstance(source, str) else source
+    registry = FamilyRegistry(
+        repositories,
+        memory_budget=memory_budget,
+        idle_timeout=dataset_idle_timeout,
+        reload_interval=reload_interval,
+    )
+    registry.pin(DEFAULT_DATASET)
+    live = registry.get(DEFAULT_DATASET)
+    service = live.current
+    startup_service = service
+    app.extensions["family_live"] = live
+    app.extensions["family_registry"] = registry
+
+    def dataset_name() -> str:
+        return (
+            (request.view_args or {}).get("dataset")
+            or request.values.get("dataset")
+            or DEFAULT_DATASET
+        )
+
+    def current_service() -> FamilyTreeService:
+        """Snapshot of the requested dataset; raises `UnknownDatasetError`."""
+        return registry.get(dataset_name()).current
+
+    @app.errorhandler(UnknownDatasetError)
+    def unknown_dataset(exc: UnknownDatasetError):
+        logger.warning("Unknown dataset requested: %s", exc.name)
+        return jsonify({"error": str(exc)}), 404
 
     lineage_path = str(bundle_root / "data" / "lineage.yaml")
     root_person = service.default_root()
+    vis_config = VisualizationConfig()
+    lazy_vis_config = replace(vis_config, lazy_children_url=LAZY_CHILDREN_URL)
+    render_config_digest = hashlib.sha256(repr(asdict(vis_config)).encode("utf-8")).hexdigest()
+
+    def current_lineage() -> LineageSystem:
+        # 按文件版本缓存，修改 lineage.yaml 后下次请求即生效
+        return LineageSystem.load(lineage_path)
+
+    render_cache = RenderCache(
+        str(static_dir), max_files=render_cache_max_files, max_bytes=render_cache_max_bytes
+    )
+
+    render_pool = WorkPool(render_workers, max_pending=render_max_pending, name="render")
+    api_pool = WorkPool(api_workers, max_pending=api_max_pending, name="api")
+    app.extensions["family_pools"] = {"render": render_pool, "api": api_pool}
+    response_cache = EncodedResponseCache(max_bytes=response_cache_max_bytes)
+
+    # 仪表回调引用本应用的对象，登记在应用自己的注册表中，避免再次 create_app 时改绑全局指标
+    metrics = MetricsRegistry()
+    app.extensions["family_metrics"] = metrics
+    install_instrumentation(
+        app,
+        profile_dir=str(Path(tempfile.gettempdir()) / "py_family_tree3_profiles"),
+        profiling=profiling,
+        profile_sample_rate=profile_sample_rate,
+        metrics=metrics,
+    )
+    metrics.gauge("family_persons", "Persons in the current snapshot.").set_function(
+        lambda: len(live.current.persons)
+    )
+    metrics.gauge("family_datasets_loaded", "Datasets resident in memory.").set_function(
+        lambda: len(registry.loaded())
+    )
+    metrics.gauge(
+        "family_datasets_bytes", "Estimated memory of resident datasets."
+    ).set_function(lambda: registry.total_bytes)
+    render_cache_files = metrics.gauge("family_render_cache_files", "Cached graph files.")
+    render_cache_files.set_function(lambda: len(render_cache))
+    pool_pending = metrics.gauge(
+        "family_pool_pending", "Queued or running pool tasks.", labels=("pool",)
+    )
+    pool_pending.set_function(lambda: render_pool.pending, "render")
+    pool_pending.set_function(lambda: api_pool.pending, "api")
+
+    def offload(pool: WorkPool, key: str, fn: Callable[[], T], timeout: float) -> T:
+        if profiling_active():
+            return fn()
+        return pool.run(key, fn, timeout=timeout)
 
     default_file = "family_default.html"
     default_path = os.path.join(static_dir, default_file)
@@ -98,29 +291,99 @@ def create_app() -> Tuple[Flask, FamilyTreeService, str]:
         if os.path.exists(default_path):
             return
         subset = service.subtree(root_id=root_person.id, max_depth=2)
-        visualize_family(subset, default_path, lineage_path=lineage_path)
+        visualize_family(
+            subset, default_path, lineage_path=lineage_path, data_version=service.data_version
+        )
         logger.info("Generated default family graph at %s", default_path)
 
     ensure_default_graph()
 
+    def render_graph(
+        service: FamilyTreeService,
+        root_wbs: str,
+        depth: int,
+        lazy: bool = False,
+        dataset: str = DEFAULT_DATASET,
+    ) -> str:
+        key = render_key(
+            root_wbs,
+            depth,
+            lazy,
+            dataset,
+            service.data_version,
+            current_lineage().version,
+            render_config_digest,
+        )
+        config = vis_config
+        if lazy and dataset == DEFAULT_DATASET:
+            config = lazy_vis_config
+        elif lazy:
+            # 懒加载地址带上数据集，展开时请求同一家族
+            children_url = f"/api/datasets/{quote(dataset, safe='')}/nodes/"
+            config = replace(vis_config, lazy_children_url=children_url)
+
+        def render(output_path: str) -> None:
+            subset = service.subtree(root_wbs=root_wbs, max_depth=depth)
+            visualize_family(
+                subset,
+                output_path,
+                lineage_path=lineage_path,
+                config=config,
+                data_version=service.data_version,
+            )
+
+        return offload(
+            render_pool, key, lambda: render_cache.get_or_render(key, render), render_timeout
+        )
+
+    fragments: "OrderedDict[Tuple[str, str], Markup]" = OrderedDict()
+    fragments_lock = threading.Lock()
+
+    def cached_fragment(
+        service: FamilyTreeService, name: str, render: Callable[[], str]
+    ) -> Markup:
+        """Render a page fragment once per data version."""
+        key = (service.data_version, name)
+        with fragments_lock:
+            html = fragments.get(key)
+            if html is not None:
+                fragments.move_to_end(key)
+                return html
+        html = Markup(render())
+        with fragments_lock:
+            fragments[key] = html
+            while len(fragments) > FRAGMENT_CACHE_SIZE:
+                fragments.popitem(last=False)
+        return html
+
+    def render_timeline_head(service: FamilyTreeService) -> str:
+        page = service.timeline_page(limit=TIMELINE_PAGE_SIZE)
+        return render_template(
+            "_timeline.html", entries=page.entries, next_offset=page.next_offset
+        )
+
     @app.route("/", methods=["GET", "POST"])
     def index():
+        dataset = dataset_name()
+        service = current_service()
+        root_wbs_default = service.default_root().wbs
         error = None
-        graph_file = default_file
-        selected_root_wbs = root_person.wbs
+        status = 200
+        # 热加载后默认图谱按新数据版本重新渲染（经缓存）
+        graph_file = default_file if service is startup_service else None
+        selected_root_wbs = root_wbs_default
         current_depth = 2
+        lazy = False
 
         if request.method == "POST":
-            root_wbs = request.form.get("root_wbs") or root_person.wbs
+            root_wbs = request.form.get("root_wbs") or root_wbs_default
             depth_raw = request.form.get("depth", "2")
+            lazy = request.form.get("lazy") == "1"
             selected_root_wbs = root_wbs
             try:
                 depth = _parse_depth(depth_raw)
                 current_depth = depth
-                subset = service.subtree(root_wbs=root_wbs, max_depth=depth)
-                graph_file = f"family_{uuid.uuid4().hex}.html"
-                output_path = os.path.join(static_dir, graph_file)
-                visualize_family(subset, output_path, lineage_path=lineage_path)
+                graph_file = render_graph(service, root_wbs, depth, lazy, dataset)
                 logger.info(
                     "Rendered subtree graph: root_wbs=%s depth=%s file=%s",
                     root_wbs,
@@ -139,26 +402,64 @@ def create_app() -> Tuple[Flask, FamilyTreeService, str]:
                     depth_raw,
                     exc,
                 )
+            except PoolBusyError as exc:
+                error = "图谱生成队列已满，请稍后重试"
+                status = 503
+                logger.warning("Render pool busy: root_wbs=%s err=%s", root_wbs, exc)
+            except PoolTimeoutError as exc:
+                error = "图谱生成超时，请稍后刷新重试"
+                status = 504
+                logger.warning("Render timed out: root_wbs=%s err=%s", root_wbs, exc)
             except Exception as exc:  # monitoring hook
                 error = "生成图谱时发生内部错误"
                 graph_file = default_file
                 logger.exception("Unexpected rendering failure: %s", exc)
 
-        timeline = service.migration_timeline()
+        if graph_file is None:
+            try:
+                graph_file = render_graph(service, root_wbs_default, 2, dataset=dataset)
+            except (PoolBusyError, PoolTimeoutError) as exc:
+                graph_file = default_file
+                logger.warning("Default graph render deferred: %s", exc)
+
+        selected_id = service.index.wbs_to_id.get(selected_root_wbs)
         return render_template(
             "index.html",
-            persons=service.persons.values(),
-            timeline=timeline,
+            selected_root_name=None if selected_id is None else service.persons[selected_id].name,
+            timeline_html=cached_fragment(
+                service, "timeline", lambda: render_timeline_head(service)
+            ),
+            timeline_page_size=TIMELINE_PAGE_SIZE,
             graph_file=graph_file,
             error=error,
             min_depth=MIN_DEPTH,
             max_depth=MAX_DEPTH,
             selected_root_wbs=selected_root_wbs,
             current_depth=current_depth,
+            lazy=lazy,
+            dataset=None if dataset == DEFAULT_DATASET else dataset,
+            dataset_query="" if dataset == DEFAULT_DATASET else "&dataset=" + quote(dataset),
+        ), status
+
+    @app.route("/api/datasets", methods=["GET"])
+    def datasets_api():
+        loaded = set(registry.loaded())
+        return jsonify(
+            {
+                "default": DEFAULT_DATASET,
+                "datasets": [
+                    {"name": name, "loaded": name in loaded} for name in registry.names()
+                ],
+            }
         )
 
     @app.route("/api/tree", methods=["GET"])
     def tree_api():
+        service = current_service()
+        lineage = current_lineage()
+        etag = make_etag(f"{service.data_version}:{lineage.version}", "tree", request.args)
+        if request.if_none_match.contains_weak(etag):
+            return _cacheable_response(None, etag)
         root_wbs = request.args.get("root_wbs")
         depth_raw = request.args.get("depth", "2")
         gen_min_raw = request.args.get("gen_min")
@@ -167,20 +468,198 @@ def create_app() -> Tuple[Flask, FamilyTreeService, str]:
             depth = _parse_depth(depth_raw)
             gen_min = int(gen_min_raw) if gen_min_raw else None
             gen_max = int(gen_max_raw) if gen_max_raw else None
-            payload = service.subtree_payload(
-                root_wbs=root_wbs or root_person.wbs,
+            params = dict(
+                root_wbs=root_wbs or service.default_root().wbs,
                 max_depth=depth,
                 gen_min=gen_min,
                 gen_max=gen_max,
+                limit=_parse_limit(request.args.get("limit")),
+                cursor=request.args.get("cursor") or None,
+                order=request.args.get("order", "dfs"),
+                lineage=lineage,
             )
-            return jsonify(payload)
+            encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+            body, content_encoding = offload(
+                api_pool,
+                f"{etag}:{encoding}",
+                lambda: response_cache.get_or_encode(
+                    etag, encoding, lambda: service.subtree_payload(**params)
+                ),
+                api_timeout,
+            )
+            return _cacheable_response(body, etag, content_encoding)
         except ValueError as exc:
             logger.warning("/api/tree bad request: %s", exc)
             return jsonify({"error": str(exc)}), 400
+        except PoolBusyError as exc:
+            logger.warning("/api/tree pool busy: %s", exc)
+            return jsonify({"error": "server busy"}), 503, {"Retry-After": "1"}
+        except PoolTimeoutError as exc:
+            logger.warning("/api/tree timed out: %s", exc)
+            return jsonify({"error": "request timed out"}), 504
         except Exception as exc:  # monitoring hook
             logger.exception("/api/tree unexpected error: %s", exc)
             return jsonify({"error": "internal server error"}), 500
 
+    def graph_formatter(service: FamilyTreeService) -> Callable[[Person], dict]:
+        lineage = current_lineage()
+
+        def graph_node(person: Person) -> dict:
+            (name,) = lineage.annotate_batch([person], service.data_version)
+            return vis_node(person, lineage, vis_config.font_color, name)
+
+        return graph_node
+
+    @app.route("/api/nodes/<wbs>/children", methods=["GET"])
+    @app.route("/api/datasets/<dataset>/nodes/<wbs>/children", methods=["GET"])
+    def children_api(wbs: str, dataset: Optional[str] = None):
+        service = current_service()
+        try:
+            formatter = graph_formatter(service) if request.args.get("view") == "graph" else None
+            payload = service.children_page(
+                wbs,
+                limit=_parse_limit(request.args.get("limit")) or CHILDREN_PAGE_SIZE,
+                cursor=request.args.get("cursor") or None,
+                formatter=formatter,
+            )
+            return jsonify(payload)
+        except ValueError as exc:
+            logger.warning("/api/nodes/%s/children bad request: %s", wbs, exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/nodes/%s/children unexpected error: %s", wbs, exc)
+            return jsonify({"error": "internal server error"}), 500
+
+    @app.route("/api/search", methods=["GET"])
+    def search_api():
+        service = current_service()
+        try:
+            limit = _parse_optional_int(request.args.get("limit"), "limit") or 10
+            if not (1 <= limit <= MAX_SEARCH_RESULTS):
+                raise ValueError(f"limit 必须在 1 到 {MAX_SEARCH_RESULTS} 之间")
+            query = request.args.get("q", "")
+            results = service.search(query, limit, lineage=current_lineage())
+            return jsonify({"query": query, "results": results})
+        except ValueError as exc:
+            logger.warning("/api/search bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/search unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
+    @app.route("/api/stats", methods=["GET"])
+    def stats_api():
+        service = current_service()
+        etag = make_etag(service.data_version, "stats", request.args)
+        if request.if_none_match.contains_weak(etag):
+            return _cacheable_response(None, etag)
+        try:
+            top = _parse_optional_int(request.args.get("top_locations"), "top_locations")
+            if top is None:
+                top = DEFAULT_TOP_LOCATIONS
+            if not (1 <= top <= MAX_TOP_LOCATIONS):
+                raise ValueError(f"top_locations 必须在 1 到 {MAX_TOP_LOCATIONS} 之间")
+            payload = service.stats(request.args.get("root_wbs") or None, top_locations=top)
+            return _cacheable_response(dumps_json(payload), etag)
+        except ValueError as exc:
+            logger.warning("/api/stats bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/stats unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
+    @app.route("/api/export", methods=["GET"])
+    def export_api():
+        service = current_service()
+        etag = make_etag(service.data_version, "export", request.args)
+        if request.if_none_match.contains_weak(etag):
+            return _cacheable_response(None, etag)
+        try:
+            fmt = request.args.get("format", "jsonl")
+            root_wbs = request.args.get("root_wbs") or None
+            max_depth = _parse_optional_int(request.args.get("max_depth"), "max_depth")
+            if max_depth is not None and max_depth < 0:
+                raise ValueError("max_depth 不能为负数")
+            chunks = export_family(
+                service,
+                fmt,
+                root_wbs=root_wbs,
+                max_depth=max_depth,
+                gen_min=_parse_optional_int(request.args.get("gen_min"), "gen_min"),
+                gen_max=_parse_optional_int(request.args.get("gen_max"), "gen_max"),
+            )
+        except ValueError as exc:
+            logger.warning("/api/export bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/export unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
+        # 生成器逐块输出（分块传输），导出规模不受内存限制
+        resp = Response(chunks, content_type=CONTENT_TYPES[fmt])
+        filename = "-".join(part for part in ("family", dataset_name(), root_wbs) if part)
+        resp.headers["Content-Disposition"] = (
+            f'attachment; filename="{quote(filename)}.{FILE_EXTENSIONS[fmt]}"'
+        )
+        resp.set_etag(etag, weak=True)
+        return resp
+
+    @app.route("/api/kinship", methods=["GET"])
+    def kinship_api():
+        service = current_service()
+        try:
+            a_wbs, b_wbs = request.args.get("a"), request.args.get("b")
+            if not a_wbs or not b_wbs:
+                raise ValueError("a 和 b 均为必填的 WBS 编码")
+            return jsonify(service.kinship(a_wbs, b_wbs).as_dict())
+        except ValueError as exc:
+            logger.warning("/api/kinship bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/kinship unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
+    @app.route("/api/kinship/batch", methods=["POST"])
+    def kinship_batch_api():
+        service = current_service()
+        try:
+            body = request.get_json(silent=True)
+            pairs = body.get("pairs") if isinstance(body, dict) else None
+            if not isinstance(pairs, list):
+                raise ValueError('请求体必须是 {"pairs": [[a_wbs, b_wbs], ...]}')
+            if len(pairs) > MAX_KINSHIP_PAIRS:
+                raise ValueError(f"pairs 数量不能超过 {MAX_KINSHIP_PAIRS}")
+            return jsonify({"results": service.kinship_batch(pairs)})
+        except ValueError as exc:
+            logger.warning("/api/kinship/batch bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/kinship/batch unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
+    @app.route("/api/timeline", methods=["GET"])
+    def timeline_api():
+        service = current_service()
+        try:
+            offset = _parse_optional_int(request.args.get("offset"), "offset") or 0
+            if offset < 0:
+                raise ValueError("offset 不能为负数")
+            page = service.timeline_page(
+                year_min=_parse_optional_int(request.args.get("year_min"), "year_min"),
+                year_max=_parse_optional_int(request.args.get("year_max"), "year_max"),
+                location=request.args.get("location") or None,
+                root_wbs=request.args.get("root_wbs") or None,
+                offset=offset,
+                limit=_parse_limit(request.args.get("limit")) or 100,
+            )
+            return jsonify({"entries": page.entries, "next_offset": page.next_offset})
+        except ValueError as exc:
+            logger.warning("/api/timeline bad request: %s", exc)
+            return jsonify({"error": str(exc)}), 400
+        except Exception as exc:  # monitoring hook
+            logger.exception("/api/timeline unexpected error: %s", exc)
+            return jsonify({"error": "internal server error"}), 500
+
     return app, service, default_path
 
 
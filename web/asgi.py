@@ -0,0 +1,114 @@
+"""ASGI entry point: ``uvicorn web.asgi:asgi_app``.
+
+Requests are served by an ASGI event loop; each Flask view runs on a thread
+of the bridge's own pool and waits on the bounded render/API pools, so a
+burst of heavy renders queues (or is rejected with 503) instead of occupying
+every server worker. Requires the optional ``asgiref`` package.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Iterable, MutableMapping
+
+try:
+    from asgiref.wsgi import WsgiToAsgiInstance
+except ImportError as exc:  # pragma: no cover - optional dependency
+    raise ImportError("ASGI mode requires asgiref: pip install asgiref uvicorn") from exc
+
+from web.app import app
+
+# 桥接线程数；需大于渲染与 API 线程池之和，等待池结果的请求才不会占满全部线程
+ASGI_THREADS = 32
+
+Scope = MutableMapping[str, Any]
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Coroutine[Any, Any, None]]
+
+
+class _ThreadedInstance(WsgiToAsgiInstance):
+    """One request: reuses asgiref's environ and `start_response` handling."""
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            raise ValueError("WSGI wrapper received a non-HTTP scope")
+        self.scope = scope
+        loop = asyncio.get_running_loop()
+
+        def sync_send(message: Message) -> None:
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        self.sync_send = sync_send
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    raise ValueError("WSGI wrapper received a non-HTTP-request message")
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            await loop.run_in_executor(self.executor, self._run, body)
+
+    def _run(self, body) -> None:
+        """Run the WSGI app on a pool thread, streaming its output through `sync_send`."""
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # 重复请求头超过上限
+            self.sync_send(
+                {
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [(b"content-type", b"text/plain")],
+                }
+            )
+            self.sync_send({"type": "http.response.body", "body": b"Bad Request"})
+            return
+
+        result: Iterable[bytes] = self.wsgi_application(environ, self.start_response)
+        try:
+            bytes_sent = 0
+            for output in result:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                if self.response_content_length is not None:
+                    output = output[: self.response_content_length - bytes_sent]
+                self.sync_send({"type": "http.response.body", "body": output, "more_body": True})
+                bytes_sent += len(output)
+                if bytes_sent == self.response_content_length:
+                    break
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            self.sync_send({"type": "http.response.body"})
+        finally:
+            # WSGI 要求调用 close()，流式导出等生成器借此释放资源
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+
+class ThreadedWsgiToAsgi:
+    """WSGI-to-ASGI bridge running requests concurrently on `threads` threads.
+
+    asgiref's `WsgiToAsgi` runs every request on one shared thread, so a slow
+    view stalls all others; this bridge gives each request its own pool
+    thread.
+    """
+
+    def __init__(self, wsgi_application, threads: int = ASGI_THREADS):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await _ThreadedInstance(self.wsgi_application, self.executor)(scope, receive, send)
+
+
+asgi_app = ThreadedWsgiToAsgi(app)
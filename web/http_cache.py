@@ -0,0 +1,131 @@
+"""Conditional requests, compression and fast JSON encoding for API responses."""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from werkzeug.datastructures import MultiDict
+
+# 可选依赖以标志位判断，模块名在未安装时不会被引用
+try:
+    import orjson
+
+    HAVE_ORJSON = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAVE_ORJSON = False
+
+try:
+    import brotli
+
+    HAVE_BROTLI = True
+except ImportError:  # pragma: no cover - optional dependency
+    HAVE_BROTLI = False
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_BYTES = 1024
+# 编码后响应体缓存的条目数与总字节上限
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_etag(data_version: str, endpoint: str, args: Mapping[str, str]) -> str:
+    """Tag value for a response defined by the data version and its query.
+
+    Every value of a repeated query parameter counts when `args` is a
+    ``MultiDict`` such as ``request.args``.
+    """
+    pairs = args.items(multi=True) if isinstance(args, MultiDict) else args.items()
+    encoded = json.dumps([data_version, endpoint, sorted(pairs)], ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Serialize with orjson when installed, else compact stdlib JSON."""
+    if HAVE_ORJSON:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header (q=0 excluded)."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+    if HAVE_BROTLI and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == "br" and HAVE_BROTLI:
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+class EncodedResponseCache:
+    """LRU of serialized (and possibly compressed) bodies keyed by ETag and encoding.
+
+    Repeated polls of the same query skip both payload building and encoding;
+    entries naturally go stale when the data version, and with it the ETag,
+    changes. Least recently used bodies are dropped once `max_entries` or
+    `max_bytes` is exceeded; a body larger than `max_bytes` is not cached.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Tuple[bytes, Optional[str]]]" = (
+            OrderedDict()
+        )
+        self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get_or_encode(
+        self, etag: str, encoding: Optional[str], build: Callable[[], Any]
+    ) -> Tuple[bytes, Optional[str]]:
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        encoded = compress(dumps_json(build()), encoding)
+        size = len(encoded[0])
+        if size > self.max_bytes:
+            return encoded
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous[0])
+            self._entries[key] = encoded
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (body, _) = self._entries.popitem(last=False)
+                self._total_bytes -= len(body)
+        return encoded
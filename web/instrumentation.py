@@ -0,0 +1,179 @@
+"""Request metrics, the Prometheus ``/metrics`` endpoint and on-demand request profiling."""
+
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Optional
+
+from flask import Flask, Response, g, request
+
+from src.metrics import REGISTRY, MetricsRegistry
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_PARAM = "profile"
+PROFILE_MODES = ("cpu", "memory")
+PROFILE_REPORT_HEADER = "X-Profile-Report"
+# 报告中保留的函数/分配点条数
+PROFILE_TOP_N = 40
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "family_http_requests_total",
+    "HTTP requests by route, method and status.",
+    labels=("endpoint", "method", "status"),
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "family_http_request_seconds", "HTTP request latency by route.", labels=("endpoint",)
+)
+PROFILED_REQUESTS = REGISTRY.counter(
+    "family_profiled_requests_total", "Requests captured by the profiler.", labels=("mode",)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """Profile one request at a time with cProfile (``cpu``) or tracemalloc (``memory``).
+
+    Both profilers are process-wide in effect, so overlapping requests are not
+    profiled rather than producing mixed-up reports.
+    """
+
+    def __init__(self, report_dir: str):
+        self.report_dir = Path(report_dir)
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        self._busy = threading.Lock()
+
+    def start(self, mode: str) -> Optional[Callable[[str], str]]:
+        """Begin profiling; returns a ``finish(label) -> report file name`` callback."""
+        if not self._busy.acquire(blocking=False):
+            logger.info("Profiler busy, skipping %s profile", mode)
+            return None
+        if mode == "cpu":
+            profile = cProfile.Profile()
+            profile.enable()
+
+            def finish(label: str) -> str:
+                profile.disable()
+                out = io.StringIO()
+                pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(
+                    PROFILE_TOP_N
+                )
+                return self._write(label, mode, out.getvalue())
+
+        else:
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+
+            def finish(label: str) -> str:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                if started_here:
+                    tracemalloc.stop()
+                stats = after.compare_to(before, "lineno")[:PROFILE_TOP_N]
+                lines = [f"peak traced memory: {peak} bytes"] + [str(s) for s in stats]
+                return self._write(label, mode, "\n".join(lines) + "\n")
+
+        def finish_and_release(label: str) -> str:
+            try:
+                return finish(label)
+            finally:
+                self._busy.release()
+
+        PROFILED_REQUESTS.inc(mode)
+        return finish_and_release
+
+    def _write(self, label: str, mode: str, text: str) -> str:
+        safe = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**6:06d}"
+        name = f"{name}-{safe}-{mode}.txt"
+        (self.report_dir / name).write_text(text, encoding="utf-8")
+        return name
+
+
+def _requested_mode(allow_trigger: bool, sample_rate: float) -> Optional[str]:
+    if allow_trigger:
+        mode = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+        if mode in PROFILE_MODES:
+            return mode
+    if sample_rate > 0 and random.random() < sample_rate:
+        return "cpu"
+    return None
+
+
+def profiling_active() -> bool:
+    """Whether the current request is being profiled.
+
+    cProfile only sees the calling thread, so callers run pooled work inline
+    for profiled requests.
+    """
+    return g.get("profile_finish") is not None
+
+
+def install_instrumentation(
+    app: Flask,
+    *,
+    profile_dir: str,
+    profiling: bool = False,
+    profile_sample_rate: float = 0.0,
+    metrics: Optional[MetricsRegistry] = None,
+) -> RequestProfiler:
+    """Time every request and serve ``/metrics``.
+
+    ``/metrics`` renders the process-wide `REGISTRY` followed by `metrics`,
+    the app's own registry for gauges sampling this app's state, so several
+    apps in one process each report their own values.
+
+    With `profiling` a request can ask for a profile via the ``X-Profile``
+    header or ``?profile=`` parameter (``cpu`` or ``memory``); independently,
+    `profile_sample_rate` profiles that fraction of all requests with
+    cProfile. The report file name is returned in ``X-Profile-Report``.
+    """
+    profiler = RequestProfiler(profile_dir)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.profile_finish = None
+        if request.path == "/metrics":
+            return
+        mode = _requested_mode(profiling, profile_sample_rate)
+        if mode is not None:
+            g.profile_finish = profiler.start(mode)
+
+    @app.after_request
+    def record_request(response: Response) -> Response:
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        finish = g.pop("profile_finish", None)
+        if finish is not None:
+            response.headers[PROFILE_REPORT_HEADER] = finish(endpoint)
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def release_profiler(_exc):
+        # after_request 未执行（如其他钩子抛错）时也要释放分析器
+        finish = g.pop("profile_finish", None)
+        if finish is not None:
+            finish("aborted")
+
+    @app.route("/metrics", methods=["GET"], endpoint="metrics")
+    def metrics_endpoint():
+        text = REGISTRY.expose()
+        if metrics is not None:
+            text += metrics.expose()
+        return Response(text, content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return profiler